@@ -12,12 +12,12 @@ import logging
 import oauthlib.oauth1
 import oauthlib.oauth2
 from copy import copy
-from functools import wraps
+from functools import wraps, partial
 from oauthlib.common import to_unicode, PY3, add_params_to_uri
 from flask import request, redirect, json, session, current_app
 from werkzeug import url_quote, url_decode, url_encode
 from werkzeug import parse_options_header, cached_property
-from .utils import to_bytes
+from .utils import to_bytes, LRUCache
 try:
     from urlparse import urljoin
     import urllib2 as http
@@ -34,6 +34,11 @@ class OAuth(object):
     """Registry for remote applications.
 
     :param app: the app instance of Flask
+    :param state_store: optional. the storage of temporary tokens during
+                        authorization, default is the Flask session. See
+                        :class:`~flask_oauthlib.contrib.state.CacheStateStore`.
+    :param lazy_cache_size: max number of lazy remote applications which
+                            are kept alive, default is 1000.
 
     Create an instance with Flask::
 
@@ -41,8 +46,14 @@ class OAuth(object):
     """
     state_key = 'oauthlib.client'
 
-    def __init__(self, app=None):
+    def __init__(self, app=None, state_store=None, lazy_cache_size=1000):
         self.remote_apps = {}
+        self.state_store = state_store
+        self._lazy_remote_apps = {}
+        self._remote_app_loader = None
+        self._lazy_cache = LRUCache(lazy_cache_size)
+        # the tokengetters of lazy apps, which outlive the evicted apps
+        self._lazy_registrations = {}
 
         self.app = app
         if app:
@@ -74,11 +85,81 @@ class OAuth(object):
             self.remote_apps[name] = remote
         return remote
 
+    def lazy_remote_app(self, name, loader=None, **kwargs):
+        """Registers a remote application which will be created on the
+        first access via ``oauth[name]`` or ``oauth.name``::
+
+            oauth.lazy_remote_app('tenant_a', app_key='TENANT_A', ...)
+
+        :param name: the name of the remote application
+        :param loader: optional. a function returns the parameters of
+                       :class:`OAuthRemoteApp`, instead of ``kwargs``.
+        """
+        if loader is None:
+            loader = partial(dict, kwargs)
+        self._lazy_remote_apps[name] = loader
+
+    def remote_app_loader(self, f):
+        """Register a function to load the parameters of remote
+        applications which are not registered. The function accepts the
+        name and returns the parameters of :class:`OAuthRemoteApp`, or
+        ``None`` if there is no such application::
+
+            @oauth.remote_app_loader
+            def load_tenant_app(name):
+                tenant = Tenant.query.filter_by(name=name).first()
+                if tenant is None:
+                    return None
+                return tenant.oauth_parameters
+
+        The created remote applications are kept in a LRU cache, limited
+        by ``lazy_cache_size``. The ``tokengetter`` of an application is
+        registered again when it is created after an eviction, other
+        attributes set on it are not kept.
+        """
+        self._remote_app_loader = f
+        return f
+
+    def _get_remote_app(self, name):
+        remote = self.remote_apps.get(name)
+        if remote is not None:
+            return remote
+        remote = self._lazy_cache.get(name)
+        if remote is not None:
+            return remote
+
+        if name in self._lazy_remote_apps:
+            kwargs = self._lazy_remote_apps[name]()
+        elif self._remote_app_loader is not None:
+            kwargs = self._remote_app_loader(name)
+        else:
+            kwargs = None
+        if kwargs is None:
+            return None
+
+        kwargs = dict(kwargs)
+        kwargs.pop('name', None)
+        kwargs.pop('register', None)
+        remote = OAuthRemoteApp(self, name, **kwargs)
+        for key, value in self._lazy_registrations.get(name, {}).items():
+            setattr(remote, key, value)
+        remote._lazy = True
+        self._lazy_cache.set(name, remote)
+        return remote
+
+    def __getitem__(self, name):
+        remote = self._get_remote_app(name)
+        if remote is None:
+            raise KeyError(name)
+        return remote
+
     def __getattr__(self, key):
         try:
             return object.__getattribute__(self, key)
         except AttributeError:
-            app = self.remote_apps.get(key)
+            if key.startswith('_'):
+                raise
+            app = self._get_remote_app(key)
             if app:
                 return app
             raise AttributeError('No such app: %s' % key)
@@ -248,6 +329,7 @@ class OAuthRemoteApp(object):
         self._access_token_method = access_token_method
         self._content_type = content_type
         self._tokengetter = None
+        self._lazy = False
 
         self.app_key = app_key
         self.encoding = encoding
@@ -272,6 +354,14 @@ class OAuthRemoteApp(object):
                         "OAuthRemoteApp requires consumer key and secret"
                     )
 
+    @property
+    def state_store(self):
+        """The storage of temporary tokens during authorization."""
+        store = getattr(self.oauth, 'state_store', None)
+        if store is None:
+            return session
+        return store
+
     @cached_property
     def base_url(self):
         return self._get_property('base_url')
@@ -515,7 +605,7 @@ class OAuthRemoteApp(object):
                 # state can be function for generate a random string
                 state = state()
 
-            session['%s_oauthredir' % self.name] = callback
+            self.state_store['%s_oauthredir' % self.name] = callback
             url = client.prepare_request_uri(
                 self.expand_url(self.authorize_url),
                 redirect_uri=callback,
@@ -530,6 +620,9 @@ class OAuthRemoteApp(object):
         Register a function as token getter.
         """
         self._tokengetter = f
+        if self._lazy:
+            registrations = self.oauth._lazy_registrations
+            registrations.setdefault(self.name, {})['_tokengetter'] = f
         return f
 
     def expand_url(self, url):
@@ -572,7 +665,7 @@ class OAuthRemoteApp(object):
                 data=data,
             )
         tup = (data['oauth_token'], data['oauth_token_secret'])
-        session['%s_oauthtok' % self.name] = tup
+        self.state_store['%s_oauthtok' % self.name] = tup
         return tup
 
     def get_request_token(self):
@@ -586,7 +679,7 @@ class OAuthRemoteApp(object):
         """Handles an oauth1 authorization response."""
         client = self.make_client()
         client.verifier = request.args.get('oauth_verifier')
-        tup = session.get('%s_oauthtok' % self.name)
+        tup = self.state_store.get('%s_oauthtok' % self.name)
         if not tup:
             raise OAuthException(
                 'Token not found, maybe you disabled cookie',
@@ -619,7 +712,9 @@ class OAuthRemoteApp(object):
         remote_args = {
             'code': request.args.get('code'),
             'client_secret': self.consumer_secret,
-            'redirect_uri': session.get('%s_oauthredir' % self.name)
+            'redirect_uri': self.state_store.get(
+                '%s_oauthredir' % self.name
+            )
         }
         log.debug('Prepare oauth2 remote args %r', remote_args)
         remote_args.update(self.access_token_params)
@@ -673,8 +768,8 @@ class OAuthRemoteApp(object):
             data = self.handle_unknown_response()
 
         # free request token
-        session.pop('%s_oauthtok' % self.name, None)
-        session.pop('%s_oauthredir' % self.name, None)
+        self.state_store.pop('%s_oauthtok' % self.name, None)
+        self.state_store.pop('%s_oauthredir' % self.name, None)
         return data
 
     def authorized_handler(self, f):
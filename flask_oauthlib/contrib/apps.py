@@ -26,10 +26,16 @@
     Some apps with OAuth 1.0a such as Twitter could not accept the ``scope``
     argument.
 
+    With lots of apps, register them lazily. They will be created on the
+    first access of ``oauth.github3`` or ``oauth['github3']``::
+
+        github.register_to(oauth, name='github3', lazy=True)
+
     Contributed by: tonyseek
 """
 
 import copy
+from functools import partial
 
 from oauthlib.common import unicode_type, bytes_type
 
@@ -54,10 +60,17 @@ class RemoteAppFactory(object):
         self._kwargs_processor = None
         self.__doc__ = docstring.lstrip()
 
-    def register_to(self, oauth, name=None, **kwargs):
-        """Creates a remote app and registers it."""
-        kwargs = self._process_kwargs(
-            name=(name or self.default_name), **kwargs)
+    def register_to(self, oauth, name=None, lazy=False, **kwargs):
+        """Creates a remote app and registers it.
+
+        With ``lazy=True``, the remote app will not be created until it is
+        accessed from the ``oauth`` by its name, and ``None`` is returned.
+        """
+        name = name or self.default_name
+        if lazy:
+            loader = partial(self._process_kwargs, name=name, **kwargs)
+            return oauth.lazy_remote_app(name, loader=loader)
+        kwargs = self._process_kwargs(name=name, **kwargs)
         return oauth.remote_app(**kwargs)
 
     def create(self, oauth, **kwargs):
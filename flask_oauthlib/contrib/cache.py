@@ -2,6 +2,7 @@
 
 from werkzeug.contrib.cache import NullCache, SimpleCache, FileSystemCache
 from werkzeug.contrib.cache import MemcachedCache, RedisCache
+from .mmapcache import MmapCache
 
 
 class Cache(object):
@@ -43,6 +44,29 @@ class Cache(object):
             raise RuntimeError('%s is missing.' % prior)
         return default
 
+    def consume(self, key):
+        """Gets and deletes a value at once, so that only one caller gets
+        it. It is atomic in a single round trip with Redis (MULTI) and the
+        ``mmap`` cache. Other caches get and then delete the value, the
+        caller whose delete succeeds gets it.
+        """
+        cache = self.cache
+        if isinstance(cache, RedisCache):
+            key = cache.key_prefix + key
+            pipe = cache._client.pipeline(transaction=True)
+            pipe.get(key)
+            pipe.delete(key)
+            value, deleted = pipe.execute()
+            if not deleted:
+                return None
+            return cache.load_object(value)
+        if isinstance(cache, MmapCache):
+            return cache.consume(key)
+        value = cache.get(key)
+        if value is None or not cache.delete(key):
+            return None
+        return value
+
     def _null(self, **kwargs):
         """Returns a :class:`NullCache` instance"""
         return NullCache()
@@ -82,3 +106,13 @@ class Cache(object):
             threshold=self._config('threshold', 500),
         ))
         return FileSystemCache(self._config('dir', None), **kwargs)
+
+    def _mmap(self, **kwargs):
+        """Returns a :class:`MmapCache` instance, shared by the processes
+        of a host.
+        """
+        kwargs.update(dict(
+            slots=self._config('MMAP_SLOTS', 8192),
+            slot_size=self._config('MMAP_SLOT_SIZE', 512),
+        ))
+        return MmapCache(self._config('MMAP_PATH'), **kwargs)
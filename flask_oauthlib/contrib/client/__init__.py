@@ -18,12 +18,16 @@ class OAuth(object):
 
         oauth = OAuth()
         oauth.init_app(app)
+
+    :param state_store: optional. the storage of the temporary data during
+                        authorization for all added applications.
     """
 
     state_key = 'oauthlib.contrib.client'
 
-    def __init__(self, app=None):
+    def __init__(self, app=None, state_store=None):
         self.remote_apps = {}
+        self.state_store = state_store
         if app is not None:
             self.init_app(app)
 
@@ -51,6 +55,8 @@ class OAuth(object):
             vars(remote_app).update(kwargs)
         if not hasattr(remote_app, 'clients'):
             remote_app.clients = cached_clients
+        if remote_app.state_store is None:
+            remote_app.state_store = self.state_store
         self.remote_apps[name] = remote_app
         return remote_app
 
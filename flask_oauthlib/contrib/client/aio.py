@@ -0,0 +1,261 @@
+"""
+    flask_oauthlib.contrib.client.aio
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    The asyncio counterparts of the contrib client applications. It requires
+    Python 3.5 or later.
+
+    The remote methods are coroutines, but they still need the Flask request
+    context for reading the callback and storing the temporary credentials
+    in the session::
+
+        from flask_oauthlib.contrib.client.aio import AsyncOAuth2Application
+
+        github = AsyncOAuth2Application(
+            'github', clients=cached_clients, ...)
+
+        @app.route('/authorized')
+        def authorized():
+            loop = asyncio.get_event_loop()
+            response = loop.run_until_complete(github.authorized_response())
+"""
+
+import asyncio
+import functools
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+import requests
+from flask import redirect, request
+from oauthlib.common import add_params_to_uri, generate_token, urldecode
+from oauthlib.common import urlencode
+from oauthlib.oauth1 import Client as OAuth1Client
+from oauthlib.oauth2 import WebApplicationClient, is_secure_transport
+from oauthlib.oauth2.rfc6749.errors import (
+    InsecureTransportError, MismatchingStateError)
+
+from .application import OAuth1Application, OAuth2Application
+from .exceptions import OAuthException
+from .structure import OAuth1Response, OAuth2Response
+
+
+__all__ = ['AsyncTransport', 'AsyncOAuth1Application',
+           'AsyncOAuth2Application']
+
+
+class AsyncTransport(object):
+    """The pooled HTTP transport for the asynchronous applications.
+
+    The requests are sent by a shared :class:`requests.Session` in the
+    executor of the running event loop, so the connection pool is reused by
+    all applications which share the transport.
+
+    :param pool_size: the max number of connections kept for each host.
+    :param executor: optional. the executor to run the blocking I/O in.
+    """
+
+    def __init__(self, pool_size=10, executor=None):
+        self.executor = executor
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    async def request(self, method, url, **kwargs):
+        loop = asyncio.get_event_loop()
+        send = functools.partial(self.session.request, method, url, **kwargs)
+        return await loop.run_in_executor(self.executor, send)
+
+    def close(self):
+        self.session.close()
+
+
+#: The transport shared by applications which don't specify one.
+default_transport = AsyncTransport()
+
+
+class AsyncApplicationMixin(object):
+    """The asynchronous surface shared by OAuth 1.0a and OAuth 2 apps.
+
+    The ``make_client`` of subclasses returns an oauthlib client instead of
+    a requests-oauthlib session. The clients are cached with the same
+    ``clients`` dictionary of the blocking applications.
+    """
+
+    transport = default_transport
+
+    async def request(self, method, url, token=None, data=None, headers=None,
+                      **kwargs):
+        if token is None:
+            client = self.client
+        else:
+            client = self._make_client_with_token(token)
+        url = urljoin(self.endpoint_url, url)
+        headers = dict(headers or {})
+        if isinstance(data, dict):
+            data = urlencode(list(data.items()))
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        url, headers, data = self.sign_request(
+            client, method.upper(), url, data, headers)
+        return await self.transport.request(
+            method, url, data=data, headers=headers, **kwargs)
+
+    async def head(self, *args, **kwargs):
+        return await self.request('head', *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await self.request('get', *args, **kwargs)
+
+    async def post(self, *args, **kwargs):
+        return await self.request('post', *args, **kwargs)
+
+    async def put(self, *args, **kwargs):
+        return await self.request('put', *args, **kwargs)
+
+    async def delete(self, *args, **kwargs):
+        return await self.request('delete', *args, **kwargs)
+
+    async def patch(self, *args, **kwargs):
+        return await self.request('patch', *args, **kwargs)
+
+
+class AsyncOAuth1Application(AsyncApplicationMixin, OAuth1Application):
+    """The asynchronous remote application for OAuth 1.0a."""
+
+    def make_client(self, token):
+        """Creates a client with specific access token pair.
+
+        :param token: a tuple of access token pair ``(token, token_secret)``
+                      or a dictionary of access token response.
+        :returns: a :class:`oauthlib.oauth1.Client` object.
+        """
+        if isinstance(token, dict):
+            access_token = token['token']
+            access_token_secret = token['token_secret']
+        else:
+            access_token, access_token_secret = token
+        return self.make_oauth_client(
+            resource_owner_key=access_token,
+            resource_owner_secret=access_token_secret)
+
+    def make_oauth_client(self, **kwargs):
+        return OAuth1Client(
+            self.consumer_key, client_secret=self.consumer_secret, **kwargs)
+
+    def sign_request(self, client, method, url, body, headers):
+        return client.sign(url, method, body, headers)
+
+    async def fetch_token(self, client, url):
+        url, headers, body = client.sign(url, 'POST')
+        response = await self.transport.request(
+            'POST', url, data=body, headers=headers)
+        if response.status_code >= 400:
+            raise OAuthException(
+                'Token request failed with code %s, response was %r.' % (
+                    response.status_code, response.text))
+        return dict(urldecode(response.text))
+
+    async def authorize(self, callback_uri, code=302):
+        client = self.make_oauth_client(callback_uri=callback_uri)
+
+        # fetches request token
+        response = await self.fetch_token(client, self.request_token_url)
+        request_token = response['oauth_token']
+        request_token_secret = response['oauth_token_secret']
+
+        # stores request token and callback uri
+        self._session_request_token = (request_token, request_token_secret)
+
+        # redirects to third-part URL
+        authorization_url = add_params_to_uri(
+            self.authorization_url, [('oauth_token', request_token)])
+        return redirect(authorization_url, code)
+
+    async def authorized_response(self):
+        # obtains verifier
+        if 'denied' in request.args:
+            return  # authorization denied
+        verifier = request.args.get('oauth_verifier')
+        if not verifier:
+            raise ValueError('Response does not contain a verifier.')
+
+        # restores request token from session
+        if not self._session_request_token:
+            return
+        request_token, request_token_secret = self._session_request_token
+        del self._session_request_token
+
+        # obtains access token
+        client = self.make_oauth_client(
+            resource_owner_key=request_token,
+            resource_owner_secret=request_token_secret,
+            verifier=verifier)
+        oauth_tokens = await self.fetch_token(client, self.access_token_url)
+        return OAuth1Response(oauth_tokens)
+
+
+class AsyncOAuth2Application(AsyncApplicationMixin, OAuth2Application):
+    """The asynchronous remote application for OAuth 2.
+
+    The ``compliance_fixes`` and the automatic token refresh work with
+    requests-oauthlib sessions only, so they are not applied here.
+    """
+
+    def make_client(self, token):
+        """Creates a client with specific access token dictionary.
+
+        :param token: a dictionary of access token response.
+        :returns: a :class:`oauthlib.oauth2.WebApplicationClient` object.
+        """
+        return WebApplicationClient(self.client_id, token=token)
+
+    def sign_request(self, client, method, url, body, headers):
+        return client.add_token(
+            url, http_method=method, body=body, headers=headers)
+
+    @property
+    def _scope(self):
+        if self.scope:
+            return u','.join(self.scope)
+
+    async def authorize(self, callback_uri, code=302, **kwargs):
+        client = WebApplicationClient(self.client_id)
+        state = generate_token()
+        authorization_url = client.prepare_request_uri(
+            self.authorization_url, redirect_uri=callback_uri,
+            scope=self._scope, state=state, **kwargs)
+        self._session_state = state
+        self._session_redirect_url = callback_uri
+        return redirect(authorization_url, code)
+
+    async def authorized_response(self):
+        state = self._session_state
+        redirect_uri = self._session_redirect_url
+        del self._session_state
+        del self._session_redirect_url
+
+        if 'code' not in request.args:
+            return
+        if state and request.args.get('state') != state:
+            raise MismatchingStateError()
+
+        token_url = self.access_token_url
+        if not self.insecure_transport and not is_secure_transport(token_url):
+            raise InsecureTransportError()
+
+        client = WebApplicationClient(self.client_id)
+        body = client.prepare_request_body(
+            code=request.args['code'], redirect_uri=redirect_uri,
+            client_secret=self.client_secret)
+        headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8',
+        }
+        response = await self.transport.request(
+            'POST', token_url, data=dict(urldecode(body)), headers=headers)
+        token = client.parse_request_body_response(
+            response.text, scope=self._scope)
+        return OAuth2Response(token)
@@ -6,7 +6,6 @@
 """
 
 import os
-import contextlib
 import warnings
 try:
     from urllib.parse import urljoin
@@ -14,13 +13,14 @@ except ImportError:
     from urlparse import urljoin
 
 from flask import current_app, redirect, request
-from requests_oauthlib import OAuth1Session, OAuth2Session
+from requests_oauthlib import OAuth1Session
 from oauthlib.oauth2.rfc6749.errors import MissingCodeError
 from werkzeug.utils import import_string
 
 from .descriptor import OAuthProperty, WebSessionData
 from .structure import OAuth1Response, OAuth2Response
 from .exceptions import AccessTokenNotFound
+from .session import OAuth2Session
 
 
 __all__ = ['OAuth1Application', 'OAuth2Application']
@@ -34,16 +34,19 @@ class BaseApplication(object):
 
     :param name: the name of this application.
     :param clients: optional. a reference to the cached clients dictionary.
+    :param state_store: optional. the storage of the temporary data during
+                        authorization, default is the Flask session.
     """
 
     session_class = None
+    state_store = None
     endpoint_url = OAuthProperty('endpoint_url', default='')
 
     def __init__(self, name, clients=None, **kwargs):
         # oauth property required
         self.name = name
 
-        if clients:
+        if clients is not None:
             self.clients = clients
 
         # other descriptor assignable attributes
@@ -88,11 +91,11 @@ class BaseApplication(object):
         cached_clients = getattr(self, 'clients', None)
         hashed_token = _hash_token(self, token)
 
-        if cached_clients and hashed_token in cached_clients:
+        if cached_clients is not None and hashed_token in cached_clients:
             return cached_clients[hashed_token]
 
         client = self.make_client(token)  # implemented in subclasses
-        if cached_clients:
+        if cached_clients is not None:
             cached_clients[hashed_token] = client
 
         return client
@@ -271,17 +274,17 @@ class OAuth2Application(BaseApplication):
     def authorized_response(self):
         oauth = self.make_oauth_session(
             state=self._session_state,
-            redirect_uri=self._session_redirect_url)
+            redirect_uri=self._session_redirect_url,
+            insecure_transport=self.insecure_transport)
         del self._session_state
         del self._session_redirect_url
 
-        with self.insecure_transport():
-            try:
-                token = oauth.fetch_token(
-                    self.access_token_url, client_secret=self.client_secret,
-                    authorization_response=request.url)
-            except MissingCodeError:
-                return
+        try:
+            token = oauth.fetch_token(
+                self.access_token_url, client_secret=self.client_secret,
+                authorization_response=request.url)
+        except MissingCodeError:
+            return
 
         return OAuth2Response(token)
 
@@ -306,38 +309,60 @@ class OAuth2Application(BaseApplication):
         oauth = self.session_class(self.client_id, **kwargs)
 
         # patches session
-        compliance_fixes = self.compliance_fixes
-        if compliance_fixes.startswith('.'):
-            compliance_fixes = \
-                'requests_oauthlib.compliance_fixes' + compliance_fixes
-        apply_fixes = import_string(compliance_fixes)
-        oauth = apply_fixes(oauth)
+        for apply_fixes in self._compliance_fix_pipeline():
+            oauth = apply_fixes(oauth)
 
         return oauth
 
-    @contextlib.contextmanager
+    def _compliance_fix_pipeline(self):
+        """Resolves the ``compliance_fixes`` into a tuple of callables.
+
+        The ``compliance_fixes`` could be a callable, an import string or a
+        list of them. An import string started with ``.`` is relative to the
+        ``requests_oauthlib.compliance_fixes``. The resolved pipeline is
+        cached until the ``compliance_fixes`` is changed.
+        """
+        compliance_fixes = self.compliance_fixes
+        cached = vars(self).get('_compliance_fixes_cache')
+        if cached is not None and cached[0] is compliance_fixes:
+            return cached[1]
+
+        if not compliance_fixes:
+            pipeline = ()
+        elif isinstance(compliance_fixes, (list, tuple)):
+            pipeline = tuple(_import_fix(fix) for fix in compliance_fixes)
+        else:
+            pipeline = (_import_fix(compliance_fixes),)
+        self._compliance_fixes_cache = (compliance_fixes, pipeline)
+        return pipeline
+
+    @property
     def insecure_transport(self):
-        """Creates a context to enable the oauthlib environment variable in
-        order to debug with insecure transport.
+        """Whether the access token could be exchanged with insecure
+        transport. It is enabled in debug mode or testing mode only.
+
+        The value is passed down to the OAuth session of each exchange, so
+        the ``OAUTHLIB_INSECURE_TRANSPORT`` environment variable is never
+        modified and concurrent exchanges do not race with each other.
         """
-        origin = os.environ.get('OAUTHLIB_INSECURE_TRANSPORT')
         if current_app.debug or current_app.testing:
-            try:
-                os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
-                yield
-            finally:
-                if origin:
-                    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = origin
-                else:
-                    os.environ.pop('OAUTHLIB_INSECURE_TRANSPORT', None)
-        else:
-            if origin:
-                warnings.warn(
-                    'OAUTHLIB_INSECURE_TRANSPORT has been found in os.environ '
-                    'but the app is not running in debug mode or testing mode.'
-                    ' It may put you in danger of the Man-in-the-middle attack'
-                    ' while using OAuth 2.', RuntimeWarning)
-            yield
+            return True
+        if os.environ.get('OAUTHLIB_INSECURE_TRANSPORT'):
+            warnings.warn(
+                'OAUTHLIB_INSECURE_TRANSPORT has been found in os.environ '
+                'but the app is not running in debug mode or testing mode.'
+                ' It may put you in danger of the Man-in-the-middle attack'
+                ' while using OAuth 2.', RuntimeWarning)
+        return False
+
+
+def _import_fix(fix):
+    """Imports a compliance fix if it is an import string."""
+    if callable(fix):
+        return fix
+    if fix.startswith('.'):
+        fix = 'requests_oauthlib.compliance_fixes' + fix
+    return import_string(fix)
 
 
 def _hash_token(application, token):
@@ -345,7 +370,10 @@ def _hash_token(application, token):
     dictionary key.
     """
     if isinstance(token, dict):
-        hashed_token = tuple(sorted(token.items()))
+        # the scope of parsed token is a list
+        hashed_token = tuple(sorted(
+            (k, tuple(v) if isinstance(v, list) else v)
+            for k, v in token.items()))
     elif isinstance(token, tuple):
         hashed_token = token
     else:
@@ -47,7 +47,11 @@ class OAuthProperty(object):
 
 
 class WebSessionData(object):
-    """The property which providing accessing of Flask session."""
+    """The property which providing accessing of Flask session.
+
+    The data is kept in the ``state_store`` of the application instead, if
+    the application has one.
+    """
 
     key_format = '_oauth_{0}_{1}'
 
@@ -57,13 +61,19 @@ class WebSessionData(object):
     def make_key(self, instance):
         return self.key_format.format(instance.name, self.ident)
 
+    def get_store(self, instance):
+        store = getattr(instance, 'state_store', None)
+        if store is None:
+            return session
+        return store
+
     def __get__(self, instance, owner):
         if instance is None:
             return self
-        return session.get(self.make_key(instance))
+        return self.get_store(instance).get(self.make_key(instance))
 
     def __set__(self, instance, value):
-        session[self.make_key(instance)] = value
+        self.get_store(instance)[self.make_key(instance)] = value
 
     def __delete__(self, instance):
-        session.pop(self.make_key(instance), None)
+        self.get_store(instance).pop(self.make_key(instance), None)
@@ -0,0 +1,76 @@
+import logging
+
+import requests_oauthlib
+from oauthlib.common import urldecode
+from oauthlib.oauth2 import WebApplicationClient
+
+
+__all__ = ['OAuth2Session']
+
+log = logging.getLogger(__name__)
+
+
+class OAuth2Session(requests_oauthlib.OAuth2Session):
+    """The OAuth 2 session which accepts insecure transport per instance.
+
+    The oauthlib checks ``OAUTHLIB_INSECURE_TRANSPORT`` in ``os.environ``
+    before exchanging the access token. Toggling it around each exchange is
+    not safe in a threaded server, so with ``insecure_transport`` this
+    session exchanges the token itself, without the checks. Other sessions
+    and the other requests of this session are still checked.
+
+    :param insecure_transport: allows the token exchange over plain HTTP.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.insecure_transport = kwargs.pop('insecure_transport', False)
+        super(OAuth2Session, self).__init__(*args, **kwargs)
+
+    def fetch_token(self, token_url, code=None, authorization_response=None,
+                    body='', auth=None, method='POST', timeout=None,
+                    headers=None, verify=True, **kwargs):
+        if not self.insecure_transport:
+            return super(OAuth2Session, self).fetch_token(
+                token_url, code=code,
+                authorization_response=authorization_response, body=body,
+                auth=auth, method=method, timeout=timeout, headers=headers,
+                verify=verify, **kwargs)
+
+        if not code and authorization_response:
+            # the scheme is only checked by oauthlib, the query is parsed
+            if authorization_response.startswith('http:'):
+                authorization_response = 'https:' + authorization_response[5:]
+            self._client.parse_request_uri_response(
+                authorization_response, state=self._state)
+            code = self._client.code
+        elif not code and isinstance(self._client, WebApplicationClient):
+            code = self._client.code
+            if not code:
+                raise ValueError('Please supply either code or '
+                                 'authorization_code parameters.')
+
+        body = self._client.prepare_request_body(
+            code=code, body=body, redirect_uri=self.redirect_uri, **kwargs)
+        headers = headers or {
+            'Accept': 'application/json',
+            'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8',
+        }
+        if method.upper() == 'POST':
+            params = {'data': dict(urldecode(body))}
+        elif method.upper() == 'GET':
+            params = {'params': dict(urldecode(body))}
+        else:
+            raise ValueError('The method kwarg must be POST or GET.')
+
+        # skips the transport check of requests_oauthlib.OAuth2Session
+        send = super(requests_oauthlib.OAuth2Session, self).request
+        r = send(method.upper(), token_url, timeout=timeout, headers=headers,
+                 auth=auth, verify=verify, **params)
+        log.debug('Request to fetch token completed with status %s.',
+                  r.status_code)
+        for hook in self.compliance_hook['access_token_response']:
+            r = hook(r)
+
+        self._client.parse_request_body_response(r.text, scope=self.scope)
+        self.token = self._client.token
+        return self.token
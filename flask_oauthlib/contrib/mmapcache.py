@@ -0,0 +1,250 @@
+# coding: utf-8
+"""
+    flask_oauthlib.contrib.mmapcache
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A cache shared by the processes of a host without a network hop, kept
+    in a memory-mapped file.
+"""
+
+import os
+import mmap
+import time
+import struct
+import hashlib
+import threading
+from contextlib import contextmanager
+from werkzeug.contrib.cache import BaseCache
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__all__ = ('MmapCache',)
+
+_MAGIC = b'FOLMMAP1'
+# magic, number of buckets, size of a slot
+_header = struct.Struct('<8sII')
+# digest of the key, expires (0 for never), size of the data
+_slot = struct.Struct('<8sdI')
+_empty = b'\0' * 8
+
+
+class MmapCache(BaseCache):
+    """A fixed-slot hash table in a memory-mapped file, shared by all the
+    processes which open the same file, e.g. the workers of a gunicorn
+    server. The keys are hashed to buckets of 4 slots, a full bucket evicts
+    the entry that expires first. Every operation locks its bucket with
+    ``fcntl``, so ``add`` and ``inc`` are atomic across the processes.
+
+    It requires a POSIX system. Values are pickled, a value which does not
+    fit in a slot is not cached.
+
+    :param path: path of the file, created if it does not exist. A file
+                 created with another ``slots`` or ``slot_size`` raises
+                 :exc:`ValueError`.
+    :param slots: number of slots.
+    :param slot_size: bytes of a slot, including a 20 bytes header.
+    :param default_timeout: the default timeout of :meth:`set`.
+    """
+
+    #: slots of a bucket
+    ways = 4
+
+    def __init__(self, path, slots=8192, slot_size=512,
+                 default_timeout=300):
+        if fcntl is None:
+            raise RuntimeError('MmapCache requires fcntl')
+        BaseCache.__init__(self, default_timeout)
+        self.path = path
+        self.buckets = max(1, slots // self.ways)
+        self.slot_size = slot_size
+        self._bucket_size = self.ways * slot_size
+        self._size = _header.size + self.buckets * self._bucket_size
+        self._thread_lock = threading.Lock()
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._mm = self._map(_header.pack(_MAGIC, self.buckets, slot_size))
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    def _map(self, header):
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                # a new file, the others wait for the lock to read it
+                os.write(self._fd, header)
+                os.ftruncate(self._fd, self._size)
+            elif os.read(self._fd, _header.size) != header or \
+                    os.fstat(self._fd).st_size != self._size:
+                # resizing it would crash the processes mapping it
+                raise ValueError(
+                    'Cache file %s has another layout, remove it or use '
+                    'another path' % self.path
+                )
+            return mmap.mmap(self._fd, self._size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def _locate(self, key):
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        digest = hashlib.md5(key).digest()[:8]
+        bucket = struct.unpack('<Q', digest)[0] % self.buckets
+        return digest, _header.size + bucket * self._bucket_size
+
+    @contextmanager
+    def _lock(self, offset, exclusive=False, length=None):
+        length = length or self._bucket_size
+        cmd = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        # fcntl locks are per process, the threads take turns
+        with self._thread_lock:
+            fcntl.lockf(self._fd, cmd, length, offset)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+
+    def _find(self, digest, offset, now):
+        """Returns the offset of the live slot of the digest, or None."""
+        mm = self._mm
+        for way in range(self.ways):
+            slot = offset + way * self.slot_size
+            if mm[slot:slot + 8] != digest:
+                continue
+            _, expires, _ = _slot.unpack_from(mm, slot)
+            if expires and expires < now:
+                return None
+            return slot
+        return None
+
+    def _read(self, key, slot):
+        _, _, length = _slot.unpack_from(self._mm, slot)
+        start = slot + _slot.size
+        data = self._mm[start:start + length]
+        try:
+            stored_key, value = pickle.loads(data)
+        except Exception:
+            return None
+        if stored_key != key:
+            # a collision of the digests
+            return None
+        return value
+
+    def _write(self, key, value, timeout, digest, offset, now):
+        if timeout is None:
+            timeout = self.default_timeout
+        data = pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL)
+        if _slot.size + len(data) > self.slot_size:
+            return False
+
+        mm = self._mm
+        victim = free = None
+        victim_expires = None
+        for way in range(self.ways):
+            slot = offset + way * self.slot_size
+            stored, expires, _ = _slot.unpack_from(mm, slot)
+            if stored == digest:
+                # the slot of the key, even if another slot is free
+                free = slot
+                break
+            if free is not None:
+                continue
+            if stored == _empty or (expires and expires < now):
+                free = slot
+                continue
+            # evict the entry which expires first, never expiring at last
+            expires = expires or float('inf')
+            if victim is None or expires < victim_expires:
+                victim, victim_expires = slot, expires
+        if free is not None:
+            victim = free
+
+        expires = now + timeout if timeout else 0
+        start = victim + _slot.size
+        mm[start:start + len(data)] = data
+        mm[victim:start] = _slot.pack(digest, expires, len(data))
+        return True
+
+    def get(self, key):
+        digest, offset = self._locate(key)
+        with self._lock(offset):
+            slot = self._find(digest, offset, time.time())
+            if slot is None:
+                return None
+            return self._read(key, slot)
+
+    def has(self, key):
+        digest, offset = self._locate(key)
+        with self._lock(offset):
+            return self._find(digest, offset, time.time()) is not None
+
+    def set(self, key, value, timeout=None):
+        digest, offset = self._locate(key)
+        with self._lock(offset, exclusive=True):
+            return self._write(
+                key, value, timeout, digest, offset, time.time()
+            )
+
+    def add(self, key, value, timeout=None):
+        digest, offset = self._locate(key)
+        now = time.time()
+        with self._lock(offset, exclusive=True):
+            if self._find(digest, offset, now) is not None:
+                return False
+            return self._write(key, value, timeout, digest, offset, now)
+
+    def delete(self, key):
+        digest, offset = self._locate(key)
+        with self._lock(offset, exclusive=True):
+            slot = self._find(digest, offset, time.time())
+            if slot is None:
+                return False
+            self._mm[slot:slot + 8] = _empty
+            return True
+
+    def consume(self, key):
+        """Gets and deletes a value at once, only one of the processes
+        gets it.
+        """
+        digest, offset = self._locate(key)
+        with self._lock(offset, exclusive=True):
+            slot = self._find(digest, offset, time.time())
+            if slot is None:
+                return None
+            value = self._read(key, slot)
+            self._mm[slot:slot + 8] = _empty
+            return value
+
+    def inc(self, key, delta=1):
+        digest, offset = self._locate(key)
+        now = time.time()
+        with self._lock(offset, exclusive=True):
+            slot = self._find(digest, offset, now)
+            value = 0
+            timeout = None
+            if slot is not None:
+                value = self._read(key, slot) or 0
+                _, expires, _ = _slot.unpack_from(self._mm, slot)
+                # keep the expiry of the counter
+                timeout = expires - now if expires else 0
+            value += delta
+            if not self._write(key, value, timeout, digest, offset, now):
+                return None
+            return value
+
+    def dec(self, key, delta=1):
+        return self.inc(key, -delta)
+
+    def clear(self):
+        length = self._size - _header.size
+        with self._lock(_header.size, exclusive=True, length=length):
+            for slot in range(_header.size, self._size, self.slot_size):
+                self._mm[slot:slot + 8] = _empty
+        return True
@@ -3,17 +3,31 @@
     flask_oauthlib.contrib.oauth2
     ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-    SQLAlchemy and Grant-Caching for OAuth2 provider.
+    SQLAlchemy, Grant-Caching and Token-Caching for OAuth2 provider.
 
     contributed by: Randy Topliffe
 """
 
+import time
+import json
 import logging
+import threading
 from datetime import datetime, timedelta
+from flask import _request_ctx_stack
+from werkzeug import cached_property
+from werkzeug.security import gen_salt
+from oauthlib.common import to_unicode
+from ..utils import LRUCache
 from .cache import Cache
+try:
+    from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+except ImportError:
+    Fernet = None
 
 
-__all__ = ('bind_cache_grant', 'bind_sqlalchemy')
+__all__ = ('bind_cache_grant', 'bind_stateless_grant', 'bind_cache_token',
+           'bind_sqlalchemy', 'bind_expiry_sweeper', 'StatelessGrantStore',
+           'TokenCache', 'ExpirySweeper')
 
 
 log = logging.getLogger('flask_oauthlib')
@@ -41,15 +55,17 @@ class Grant(object):
         self.user = user
 
     def delete(self):
-        """Removes itself from the cache
+        """Removes itself from the cache, atomically with Redis and the
+        ``mmap`` cache. Returns False if another request removed it first.
 
         Note: This is required by the oauthlib
         """
+        if self._cache is None:
+            return None
         log.debug(
             "Deleting grant %s for client %s" % (self.code, self.client_id)
         )
-        self._cache.delete(self.key)
-        return None
+        return self._cache.consume(self.key) is not None
 
     @property
     def key(self):
@@ -83,7 +99,7 @@ def bind_cache_grant(app, provider, current_user, config_prefix='OAUTH2'):
     You can define which cache system you would like to use by setting the
     following configuration option::
 
-        OAUTH2_CACHE_TYPE = 'null' // memcache, simple, redis, filesystem
+        OAUTH2_CACHE_TYPE = 'null' // memcache, simple, redis, filesystem, mmap
 
     For more information on the supported cache systems please visit:
     `Cache <http://werkzeug.pocoo.org/docs/contrib/cache/>`_
@@ -118,8 +134,393 @@ def bind_cache_grant(app, provider, current_user, config_prefix='OAUTH2'):
         return grant
 
 
+class StatelessGrant(object):
+    """StatelessGrant is the grant object of a sealed authorization code,
+    returned by :class:`StatelessGrantStore`.
+
+    :param client_id: ID of the client
+    :param code: the sealed code
+    :param redirect_uri: A URI string
+    :param scopes: a list of scopes
+    :param user_id: ID of the user
+    :param expires: a `datetime` when the code expires
+    :param userloader: a function to load the user by ID
+    """
+
+    def __init__(self, client_id, code, redirect_uri, scopes, user_id,
+                 expires, userloader=None):
+        self.client_id = client_id
+        self.code = code
+        self.redirect_uri = redirect_uri
+        self.scopes = scopes
+        self.user_id = user_id
+        self.expires = expires
+        self._userloader = userloader
+
+    @property
+    def user(self):
+        if self.user_id is None or self._userloader is None:
+            return None
+        return self._userloader(self.user_id)
+
+    def delete(self):
+        """The code is used up when it is read, nothing to delete."""
+        return None
+
+
+class ReplaySet(object):
+    """The IDs of the used codes in the process memory, until they expire.
+    It has the ``add`` method of the werkzeug caches. Unlike a cache, it
+    never drops an ID before it expires.
+    """
+
+    def __init__(self):
+        self._expires = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0
+
+    def add(self, key, value, timeout=None):
+        now = time.time()
+        with self._lock:
+            if now > self._next_prune:
+                for k, expires in list(self._expires.items()):
+                    if expires < now:
+                        del self._expires[k]
+                self._next_prune = now + 10
+            if self._expires.get(key, 0) >= now:
+                return False
+            self._expires[key] = now + (timeout or 0)
+            return True
+
+
+class StatelessGrantStore(object):
+    """Keeps the grant in the authorization code itself, instead of a
+    database or a cache. The code is an encrypted and authenticated blob
+    (Fernet) of the client ID, redirect URI, scopes, user ID and expiry,
+    so the token endpoint reads the grant without a lookup.
+
+    A code is used only once: its ID is added to a replay set when it is
+    read, and a code whose ID is in the set is rejected. The replay set is
+    kept in the process memory, pass a shared ``cache`` (e.g. Redis, or the
+    ``mmap`` cache on a single host) when there are several processes.
+
+    :param keys: a Fernet key, or a list of keys. Codes are sealed with
+                 the first key and opened with any of them, so that the
+                 keys can be rotated.
+    :param userloader: a function to load the user by ID
+    :param cache: optional. a werkzeug cache instance for the replay set
+    :param expires_in: seconds before a code expires
+    """
+
+    def __init__(self, keys, userloader, cache=None, expires_in=100):
+        if Fernet is None:
+            raise RuntimeError('cryptography is required for stateless grant')
+        if not isinstance(keys, (list, tuple)):
+            keys = [keys]
+        self._fernet = MultiFernet([Fernet(key) for key in keys])
+        self.userloader = userloader
+        self.cache = cache if cache is not None else ReplaySet()
+        self.expires_in = expires_in
+
+    def seal(self, client_id, redirect_uri, scopes, user_id):
+        """Returns a new code of the grant."""
+        expires = int(time.time()) + self.expires_in
+        payload = json.dumps(
+            [gen_salt(12), client_id, redirect_uri, ' '.join(scopes or []),
+             user_id, expires],
+            separators=(',', ':'),
+        )
+        return to_unicode(self._fernet.encrypt(payload.encode('utf-8')))
+
+    def open(self, client_id, code):
+        """Returns the :class:`StatelessGrant` of a code, or None if it is
+        invalid, expired, of another client or used already.
+        """
+        try:
+            payload = self._fernet.decrypt(code.encode('utf-8'))
+            jti, cid, redirect_uri, scope, user_id, expires = json.loads(
+                to_unicode(payload))
+        except (InvalidToken, ValueError, TypeError):
+            log.debug('Invalid stateless grant for client %s', client_id)
+            return None
+        ttl = expires - time.time()
+        if cid != client_id or ttl <= 0:
+            return None
+        if not self.cache.add('oauth2_grant_used:%s' % jti, 1,
+                              timeout=int(ttl) + 1):
+            log.debug('Stateless grant %s is used already', jti)
+            return None
+        return StatelessGrant(
+            cid, code, redirect_uri, scope.split(), user_id,
+            datetime.utcfromtimestamp(expires), self.userloader,
+        )
+
+
+def bind_stateless_grant(app, provider, current_user, userloader,
+                         keys=None, config_prefix='OAUTH2'):
+    """Configures an :class:`OAuth2Provider` instance to keep the grants in
+    the authorization codes, see :class:`StatelessGrantStore`. No grant is
+    saved, and the token endpoint reads no grant from a database or cache.
+    It requires cryptography.
+
+    :param app: Flask application instance
+    :param provider: :class:`OAuth2Provider` instance
+    :param current_user: function that returns an :class:`User` object
+    :param userloader: function that returns an :class:`User` object by ID
+    :param keys: optional. Fernet keys, default is ``OAUTH2_GRANT_KEYS``
+    :param config_prefix: prefix for config
+
+    A usage example::
+
+        oauth = OAuth2Provider(app)
+        app.config.update({'OAUTH2_GRANT_KEYS': [Fernet.generate_key()]})
+
+        bind_stateless_grant(app, oauth, current_user,
+                             lambda id: User.query.get(id))
+
+    The codes expire in ``OAUTH2_GRANT_EXPIRES_IN`` (default 100) seconds.
+    The used codes are remembered in the cache system if
+    ``OAUTH2_CACHE_TYPE`` is configured, else in the process memory.
+    """
+    if keys is None:
+        keys = app.config['%s_GRANT_KEYS' % config_prefix]
+    cache = None
+    if '%s_CACHE_TYPE' % config_prefix in app.config or \
+       'CACHE_TYPE' in app.config:
+        cache = Cache(app, config_prefix)
+
+    store = StatelessGrantStore(
+        keys, userloader, cache=cache,
+        expires_in=app.config.get(
+            '%s_GRANT_EXPIRES_IN' % config_prefix, 100),
+    )
+
+    @provider.grantsetter
+    def create_grant(client_id, code, request, *args, **kwargs):
+        """Replaces the random code with the sealed grant"""
+        user = current_user()
+        code['code'] = store.seal(
+            client_id, request.redirect_uri, request.scopes,
+            getattr(user, 'id', None),
+        )
+
+    @provider.grantgetter
+    def get(client_id, code):
+        """Opens the sealed grant, once"""
+        return store.open(client_id, code)
+
+    return store
+
+
+class CachedToken(object):
+    """CachedToken is returned by :class:`TokenCache` in place of the
+    token object of the ``tokengetter``. It carries what the bearer
+    validation needs.
+
+    :param access_token: the access token string
+    :param client_id: ID of the client
+    :param user_id: ID of the user
+    :param scopes: a list of scopes
+    :param expires: a `datetime` when the token expires
+    :param user: the user object
+    :param client: optional. the client object
+    """
+
+    def __init__(self, access_token, client_id, user_id, scopes, expires,
+                 user=None, client=None):
+        self.access_token = access_token
+        self.client_id = client_id
+        self.user_id = user_id
+        self.scopes = scopes
+        self.expires = expires
+        self.user = user
+        self.client = client
+
+
+class TokenCache(object):
+    """A cache of validated bearer tokens, in front of the ``tokengetter``
+    of an :class:`OAuth2Provider`.
+
+    The validated tokens are kept in an in-process LRU, and optionally in a
+    shared cache system so that the workers share the entries and the
+    invalidations. An entry lives at most ``timeout`` seconds, and never
+    beyond the ``expires`` of its token. Revoking a token and issuing a new
+    token invalidate the entries of the same client and user.
+
+    The in-process entries keep the client object of the token, and the
+    user object unless there is a ``userloader``. An entry read from the
+    shared cache carries the IDs only, its user is loaded by the
+    ``userloader`` and its client by the ``clientgetter`` of the provider.
+
+    :param cache: optional. a :class:`~flask_oauthlib.contrib.cache.Cache`
+                  instance, or any werkzeug cache object.
+    :param size: max number of entries of the in-process LRU.
+    :param timeout: max seconds to keep an entry.
+    :param userloader: a function to load the user by its ID. It is
+                       required by the shared cache. Without it, the
+                       in-process LRU keeps the user object itself.
+    """
+
+    def __init__(self, cache=None, size=1000, timeout=300, userloader=None):
+        if cache is not None and userloader is None:
+            raise RuntimeError('`userloader` is required for shared cache')
+        self.cache = cache
+        self.timeout = timeout
+        self.userloader = userloader
+        self._local = LRUCache(size)
+
+    def _key(self, access_token):
+        return 'oauth2_token:%s' % access_token
+
+    def _generation_keys(self, client_id, user_id):
+        return (
+            'oauth2_token_gen:%s:%s' % (client_id, user_id),
+            'oauth2_token_gen:%s:' % client_id,
+            'oauth2_token_gen::%s' % user_id,
+        )
+
+    def _generation(self, client_id, user_id):
+        if self.cache is None:
+            return None
+        keys = self._generation_keys(client_id, user_id)
+        return tuple(self.cache.get_many(*keys))
+
+    def get(self, access_token):
+        """Returns a :class:`CachedToken` or None."""
+        entry = self._local.get(access_token)
+        if entry is None and self.cache is not None:
+            entry = self.cache.get(self._key(access_token))
+            if entry is not None:
+                self._local.set(access_token, entry)
+        if entry is None:
+            return None
+
+        generation = self._generation(entry['client_id'], entry['user_id'])
+        if time.time() > entry['deadline'] or \
+           entry['generation'] != generation:
+            self._local.delete(access_token)
+            return None
+
+        if self.userloader is not None:
+            user = self.userloader(entry['user_id'])
+        else:
+            user = entry.get('user')
+        return CachedToken(
+            access_token, entry['client_id'], entry['user_id'],
+            entry['scopes'], entry['expires'], user=user,
+            client=entry.get('client'),
+        )
+
+    def set(self, tok):
+        """Caches a validated token object of the ``tokengetter``."""
+        ttl = (tok.expires - datetime.utcnow()).total_seconds()
+        ttl = int(min(self.timeout, ttl))
+        if ttl <= 0:
+            return
+
+        user_id = getattr(tok, 'user_id', None)
+        if user_id is None:
+            user_id = getattr(tok.user, 'id', None)
+        entry = dict(
+            client_id=tok.client_id,
+            user_id=user_id,
+            scopes=list(tok.scopes),
+            expires=tok.expires,
+            deadline=time.time() + ttl,
+            generation=self._generation(tok.client_id, user_id),
+        )
+        if self.cache is not None:
+            self.cache.set(self._key(tok.access_token), entry, timeout=ttl)
+        # the objects are only kept in the process
+        entry = dict(entry, client=getattr(tok, 'client', None))
+        if self.userloader is None:
+            entry['user'] = tok.user
+        self._local.set(tok.access_token, entry)
+
+    def invalidate(self, client_id, user):
+        """Drops the entries of the tokens of a client and user."""
+        user_id = getattr(user, 'id', None)
+        log.debug('Invalidate cached tokens of %r for client %r',
+                  user_id, client_id)
+        if self.cache is not None:
+            # entries of the older generation are dropped on reading, the
+            # key outlives them
+            self.cache.set(
+                self._generation_keys(client_id, user_id)[0], gen_salt(8),
+                timeout=self.timeout,
+            )
+        for access_token, entry in self._local.items():
+            if entry['client_id'] == client_id and \
+               entry['user_id'] == user_id:
+                self._local.delete(access_token)
+
+    def purge(self, client_id=None, user_id=None):
+        """Drops the entries of all tokens of a client, or of a user, or of
+        both, in one pass.
+        """
+        if client_id is None and user_id is None:
+            raise ValueError('`client_id` or `user_id` is required')
+        log.debug('Purge cached tokens of %r for client %r',
+                  user_id, client_id)
+        if self.cache is not None:
+            keys = self._generation_keys(client_id, user_id)
+            if client_id is not None and user_id is not None:
+                key = keys[0]
+            elif client_id is not None:
+                key = keys[1]
+            else:
+                key = keys[2]
+            self.cache.set(key, gen_salt(8), timeout=self.timeout)
+        for access_token, entry in self._local.items():
+            if client_id is not None and entry['client_id'] != client_id:
+                continue
+            if user_id is not None and entry['user_id'] != user_id:
+                continue
+            self._local.delete(access_token)
+
+
+def bind_cache_token(app, provider, userloader=None, config_prefix='OAUTH2'):
+    """Configures an :class:`OAuth2Provider` instance to cache the validated
+    bearer tokens, which saves a ``tokengetter`` call for every protected
+    request. See :class:`TokenCache`.
+
+    :param app: Flask application instance
+    :param provider: :class:`OAuth2Provider` instance
+    :param userloader: function that returns an :class:`User` object by ID
+    :param config_prefix: prefix for config
+
+    A usage example::
+
+        oauth = OAuth2Provider(app)
+        app.config.update({'OAUTH2_CACHE_TYPE': 'redis'})
+
+        bind_cache_token(app, oauth, lambda id: User.query.get(id))
+
+    The tokens are cached in a shared cache system if ``OAUTH2_CACHE_TYPE``
+    is configured, and in an in-process LRU. The LRU can be configured with::
+
+        OAUTH2_TOKEN_CACHE_SIZE = 1000
+        OAUTH2_TOKEN_CACHE_TIMEOUT = 300
+    """
+    cache = None
+    if '%s_CACHE_TYPE' % config_prefix in app.config or \
+       'CACHE_TYPE' in app.config:
+        cache = Cache(app, config_prefix)
+
+    provider._tokencache = TokenCache(
+        cache,
+        size=app.config.get('%s_TOKEN_CACHE_SIZE' % config_prefix, 1000),
+        timeout=app.config.get(
+            '%s_TOKEN_CACHE_TIMEOUT' % config_prefix, 300),
+        userloader=userloader,
+    )
+    return provider._tokencache
+
+
 def bind_sqlalchemy(provider, session, user=None, client=None,
-                    token=None, grant=None, current_user=None):
+                    token=None, grant=None, current_user=None,
+                    keep_tokens=1, read_session=None, token_options=None,
+                    grant_options=None):
     """Configures the given :class:`OAuth2Provider` instance with the
     required getters and setters for persistence with SQLAlchemy.
 
@@ -158,6 +559,27 @@ def bind_sqlalchemy(provider, session, user=None, client=None,
     for grant caching. If you're using another caching system with
     GrantCacheBinding instead, omit current_user.
 
+    The lookups can be sent to a read replica with a ``read_session``,
+    while the writes go to ``session``::
+
+        replica = db.create_scoped_session(
+            options={'bind': db.get_engine(app, 'replica')}
+        )
+        bind_sqlalchemy(oauth, db.session, user=User, client=Client,
+                        token=Token, grant=Grant, current_user=current_user,
+                        read_session=replica)
+
+    A row which is not found in the replica, e.g. a client which is not
+    replicated yet, is looked up in the primary database. After a write,
+    the lookups of the same request go to the primary database. Grants
+    and refresh tokens are used once, they are always looked up in the
+    primary database.
+
+    The ``user`` and ``client`` of a token or grant are loaded in the same
+    query with a JOIN. Pass other loader options with ``token_options``
+    and ``grant_options``, e.g. ``[joinedload('user')]``, or ``[]`` to load
+    them lazily.
+
     :param provider: :class:`OAuth2Provider` instance
     :param session: A :class:`Session` object
     :param user: :class:`User` model
@@ -165,27 +587,41 @@ def bind_sqlalchemy(provider, session, user=None, client=None,
     :param token: :class:`Token` model
     :param grant: :class:`Grant` model
     :param current_user: function that returns a :class:`User` object
+    :param keep_tokens: number of tokens kept for each user and client,
+                        default is 1, which means a new token replaces
+                        the previous ones.
+    :param read_session: optional. A :class:`Session` object of a read
+                         replica for the lookups.
+    :param token_options: optional. SQLAlchemy loader options of the token
+                          lookups.
+    :param grant_options: optional. SQLAlchemy loader options of the grant
+                          lookups.
     """
     if user:
-        user_binding = UserBinding(user, session)
+        user_binding = UserBinding(user, session, read_session)
         provider.usergetter(user_binding.get)
 
     if client:
-        client_binding = ClientBinding(client, session)
+        client_binding = ClientBinding(client, session, read_session)
         provider.clientgetter(client_binding.get)
 
     if token:
-        token_binding = TokenBinding(token, session, current_user)
+        token_binding = TokenBinding(token, session, current_user,
+                                     keep_tokens, read_session,
+                                     token_options)
         provider.tokengetter(token_binding.get)
         provider.tokensetter(token_binding.set)
+        provider.tokenrevoker(token_binding.revoke_all)
 
     if grant:
         if not current_user:
             raise ValueError(('`current_user` is required'
                               'for Grant Binding'))
-        grant_binding = GrantBinding(grant, session, current_user)
+        grant_binding = GrantBinding(grant, session, current_user,
+                                     read_session, grant_options)
         provider.grantgetter(grant_binding.get)
         provider.grantsetter(grant_binding.set)
+        provider.grantrevoker(grant_binding.revoke_all)
 
 
 class BaseBinding(object):
@@ -193,11 +629,25 @@ class BaseBinding(object):
 
     :param model: SQLAlchemy Model class
     :param session: A :class:`Session` object
+    :param read_session: optional. A :class:`Session` object for lookups
+    :param load_options: optional. SQLAlchemy loader options of lookups
     """
 
-    def __init__(self, model, session):
+    #: attach the rows read from the read session to the session, so that
+    #: they can be deleted
+    writable = False
+
+    def __init__(self, model, session, read_session=None, load_options=None):
         self.session = session
         self.model = model
+        self.read_session = read_session
+        if load_options is not None:
+            self.load_options = load_options
+
+    @cached_property
+    def load_options(self):
+        """Loader options of the lookups, none by default."""
+        return []
 
     @property
     def query(self):
@@ -207,6 +657,86 @@ class BaseBinding(object):
         else:
             return self.session.query(self.model)
 
+    def mark_written(self):
+        """Sends the next lookups of the request to the primary session."""
+        ctx = _request_ctx_stack.top
+        if ctx is not None:
+            ctx.oauthlib_written = True
+
+    def first_primary(self, **kwargs):
+        """Returns the first row filtered by ``kwargs`` from the primary
+        session, for the rows which are used once.
+        """
+        return self.query.options(*self.load_options) \
+            .filter_by(**kwargs).first()
+
+    def first(self, **kwargs):
+        """Returns the first row filtered by ``kwargs``, from the read
+        session if there is one. It falls back to the primary session if
+        the row is not found, or if rows are written in this request.
+        """
+        if self.read_session is None or \
+           getattr(_request_ctx_stack.top, 'oauthlib_written', False):
+            return self.first_primary(**kwargs)
+        rv = self.read_session.query(self.model) \
+            .options(*self.load_options).filter_by(**kwargs).first()
+        if rv is None:
+            return self.first_primary(**kwargs)
+        if self.writable:
+            rv = self._attach(rv)
+        return rv
+
+    def _attach(self, obj):
+        from sqlalchemy import inspect
+        from sqlalchemy.orm.interfaces import MANYTOONE
+        # load the user and client from the read session, they are merged
+        # along without a query
+        for rel in inspect(self.model).relationships:
+            if rel.direction is MANYTOONE:
+                getattr(obj, rel.key)
+        return self.session.merge(obj, load=False)
+
+
+class OwnedBinding(BaseBinding):
+    """Base of the bindings whose rows belong to a user and a client"""
+
+    writable = True
+
+    @cached_property
+    def load_options(self):
+        """Loads the ``user`` and ``client`` relationships of the model in
+        the same query, which are read by the validator.
+        """
+        from sqlalchemy import inspect
+        from sqlalchemy.orm import joinedload
+        from sqlalchemy.orm.interfaces import MANYTOONE
+        relationships = inspect(self.model).relationships
+        return [
+            joinedload(getattr(self.model, key))
+            for key in ('user', 'client')
+            if key in relationships and
+            relationships[key].direction is MANYTOONE
+        ]
+
+    def revoke_all(self, user=None, client=None):
+        """Deletes the rows of a user, or of a client, or of both with a
+        single DELETE statement. Index ``user_id`` and ``client_id`` of
+        the model for a large table.
+
+        :param user: the user object
+        :param client: the client object
+        :returns: number of deleted rows
+        """
+        query = self.query
+        if user is not None:
+            query = query.filter_by(user_id=user.id)
+        if client is not None:
+            query = query.filter_by(client_id=client.client_id)
+        rv = query.delete(synchronize_session=False)
+        self.session.commit()
+        self.mark_written()
+        return rv
+
 
 class UserBinding(BaseBinding):
     """Object use by SQLAlchemyBinding to register the user getter"""
@@ -219,7 +749,7 @@ class UserBinding(BaseBinding):
         :param username: username of the user
         :param password: password of the user
         """
-        user = self.query.filter_by(username=username).first()
+        user = self.first(username=username)
         if user and user.check_password(password):
             return user
         return None
@@ -233,16 +763,23 @@ class ClientBinding(BaseBinding):
 
         :param client_id: ID if the client
         """
-        return self.query.filter_by(client_id=client_id).first()
+        return self.first(client_id=client_id)
 
 
-class TokenBinding(BaseBinding):
+class TokenBinding(OwnedBinding):
     """Object use by SQLAlchemyBinding to register the token
     getter and setter
+
+    :param keep_tokens: number of tokens kept for each user and client,
+                        including the new one. The older tokens are
+                        deleted when a token is issued.
     """
-    def __init__(self, model, session, current_user=None):
+    def __init__(self, model, session, current_user=None, keep_tokens=1,
+                 read_session=None, load_options=None):
         self.current_user = current_user
-        super(TokenBinding, self).__init__(model, session)
+        self.keep_tokens = keep_tokens
+        super(TokenBinding, self).__init__(
+            model, session, read_session, load_options)
 
     def get(self, access_token=None, refresh_token=None):
         """returns a Token object with the given access token or refresh token
@@ -251,14 +788,29 @@ class TokenBinding(BaseBinding):
         :param refresh_token: User's refresh token
         """
         if access_token:
-            return self.query.filter_by(access_token=access_token).first()
+            return self.first(access_token=access_token)
         elif refresh_token:
-            return self.query.filter_by(refresh_token=refresh_token).first()
+            # a lagging replica would accept a used refresh token
+            return self.first_primary(refresh_token=refresh_token)
         return None
 
+    def _delete_previous(self, client_id, user_id):
+        query = self.query.filter_by(client_id=client_id, user_id=user_id)
+        if self.keep_tokens > 1:
+            # keep the tokens expiring last, the primary key may be a uuid
+            pk = self.model.__mapper__.primary_key[0]
+            ids = [row[0] for row in query.with_entities(pk).order_by(
+                self.model.expires.desc(), pk.desc()
+            ).offset(self.keep_tokens - 1)]
+            if not ids:
+                return
+            self.query.filter(pk.in_(ids)).delete(synchronize_session=False)
+        else:
+            query.delete()
+
     def set(self, token, request, *args, **kwargs):
-        """Creates a Token object and removes all expired tokens that belong
-        to the user
+        """Creates a Token object and removes the previous tokens that belong
+        to the user and client, in one transaction.
 
         :param token: token object
         :param request: OAuthlib request object
@@ -271,14 +823,6 @@ class TokenBinding(BaseBinding):
 
         client = request.client
 
-        tokens = self.query.filter_by(
-            client_id=client.client_id,
-            user_id=user.id).all()
-        if tokens:
-            for tk in tokens:
-                self.session.delete(tk)
-            self.session.commit()
-
         expires_in = token.get('expires_in')
         expires = datetime.utcnow() + timedelta(seconds=expires_in)
 
@@ -287,19 +831,27 @@ class TokenBinding(BaseBinding):
         tok.client_id = client.client_id
         tok.user_id = user.id
 
-        self.session.add(tok)
-        self.session.commit()
+        try:
+            self._delete_previous(client.client_id, user.id)
+            self.session.add(tok)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        self.mark_written()
         return tok
 
 
-class GrantBinding(BaseBinding):
+class GrantBinding(OwnedBinding):
     """Object use by SQLAlchemyBinding to register the grant
     getter and setter
     """
 
-    def __init__(self, model, session, current_user):
+    def __init__(self, model, session, current_user, read_session=None,
+                 load_options=None):
         self.current_user = current_user
-        super(GrantBinding, self).__init__(model, session)
+        super(GrantBinding, self).__init__(
+            model, session, read_session, load_options)
 
     def set(self, client_id, code, request, *args, **kwargs):
         """Creates Grant object with the given params
@@ -320,6 +872,7 @@ class GrantBinding(BaseBinding):
         self.session.add(grant)
 
         self.session.commit()
+        self.mark_written()
 
     def get(self, client_id, code):
         """Get the Grant object with the given client ID and code
@@ -327,4 +880,164 @@ class GrantBinding(BaseBinding):
         :param client_id: ID of the client
         :param code:
         """
-        return self.query.filter_by(client_id=client_id, code=code).first()
+        # a lagging replica would accept a used code
+        return self.first_primary(client_id=client_id, code=code)
+
+
+class ExpirySweeper(object):
+    """Deletes the expired rows of token and grant models in bounded
+    batches, so that a sweep never locks the tables for long. Index the
+    ``expires`` column of the models for a large table.
+
+    The ``expires`` of a token is the expiry of its access token, while its
+    refresh token is still valid. Rows with a ``refresh_token`` are kept
+    unless ``refresh_expires_in`` is set.
+
+    :param session: A :class:`Session` object
+    :param models: the models to sweep, which have ``expires`` columns
+    :param batch_size: max number of rows deleted in a statement
+    :param pause: seconds to sleep between batches, which limits the rate
+    :param interval: seconds between sweeps of the background thread
+    :param refresh_expires_in: optional. seconds after ``expires`` when the
+                               rows with a ``refresh_token`` are deleted
+    :param app: optional. the Flask app to push an app context for the
+                background thread
+    """
+
+    def __init__(self, session, models, batch_size=1000, pause=0,
+                 interval=3600, app=None, refresh_expires_in=None):
+        self.session = session
+        self.models = models
+        self.batch_size = batch_size
+        self.pause = pause
+        self.interval = interval
+        self.refresh_expires_in = refresh_expires_in
+        self.app = app
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def sweep_batch(self, model, now=None):
+        """Deletes a batch of expired rows of a model.
+
+        :returns: number of deleted rows
+        """
+        if now is None:
+            now = datetime.utcnow()
+        pk = model.__mapper__.primary_key[0]
+        expired = model.expires < now
+        refresh_token = getattr(model, 'refresh_token', None)
+        if refresh_token is not None:
+            refreshable = refresh_token.isnot(None)
+            if self.refresh_expires_in is None:
+                expired = expired & ~refreshable
+            else:
+                refresh_expires = now - timedelta(
+                    seconds=self.refresh_expires_in)
+                expired = expired & (
+                    ~refreshable | (model.expires < refresh_expires)
+                )
+        ids = [row[0] for row in self.session.query(pk).filter(
+            expired).limit(self.batch_size)]
+        if not ids:
+            return 0
+        rv = self.session.query(model).filter(pk.in_(ids)).delete(
+            synchronize_session=False)
+        self.session.commit()
+        return rv
+
+    def sweep(self):
+        """Deletes all expired rows, batch by batch.
+
+        :returns: number of deleted rows
+        """
+        now = datetime.utcnow()
+        total = 0
+        for model in self.models:
+            while not self._stopped.is_set():
+                count = self.sweep_batch(model, now)
+                total += count
+                if count < self.batch_size:
+                    break
+                if self.pause:
+                    time.sleep(self.pause)
+        log.debug('Swept %d expired rows', total)
+        return total
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self.sweep()
+                else:
+                    self.sweep()
+            except Exception as e:
+                log.warn('Sweep expired rows failed: %r', e)
+            finally:
+                if hasattr(self.session, 'remove'):
+                    self.session.remove()
+            self._stopped.wait(self.interval)
+
+    def start(self):
+        """Sweeps in a daemon thread every ``interval`` seconds."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def bind_expiry_sweeper(app, session, token=None, grant=None,
+                        config_prefix='OAUTH2'):
+    """Creates an :class:`ExpirySweeper` for the token and grant models,
+    and registers a ``flask oauth2-sweep`` command on Flask 0.11+::
+
+        sweeper = bind_expiry_sweeper(app, db.session, token=Token,
+                                      grant=Grant)
+
+        # or sweep in a background thread of the server
+        sweeper.start()
+
+    The sweeper can be configured with::
+
+        OAUTH2_SWEEPER_BATCH_SIZE = 1000
+        OAUTH2_SWEEPER_PAUSE = 0
+        OAUTH2_SWEEPER_INTERVAL = 3600
+        OAUTH2_SWEEPER_REFRESH_EXPIRES_IN = None
+
+    :param app: Flask application instance
+    :param session: A :class:`Session` object
+    :param token: :class:`Token` model
+    :param grant: :class:`Grant` model
+    :param config_prefix: prefix for config
+    """
+    def _config(key, default):
+        return app.config.get('%s_SWEEPER_%s' % (config_prefix, key), default)
+
+    models = [model for model in (token, grant) if model is not None]
+    sweeper = ExpirySweeper(
+        session, models,
+        batch_size=_config('BATCH_SIZE', 1000),
+        pause=_config('PAUSE', 0),
+        interval=_config('INTERVAL', 3600),
+        app=app,
+        refresh_expires_in=_config('REFRESH_EXPIRES_IN', None),
+    )
+
+    cli = getattr(app, 'cli', None)
+    if cli is not None:
+        @cli.command('%s-sweep' % config_prefix.lower())
+        def sweep_command():
+            """Delete the expired tokens and grants."""
+            import click
+            click.echo('Deleted %d expired rows.' % sweeper.sweep())
+
+    return sweeper
@@ -0,0 +1,73 @@
+# coding: utf-8
+"""
+    flask_oauthlib.contrib.state
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Server-side storage for the temporary data of client OAuth flows.
+"""
+
+from flask import session
+from werkzeug.security import gen_salt
+
+
+__all__ = ('CacheStateStore',)
+
+
+class CacheStateStore(object):
+    """Keeps the request tokens, states and redirect URIs of the client
+    OAuth flows in a cache, instead of the Flask cookie session. Only a
+    short opaque handle is stored in the Flask session.
+
+    :param cache: a :class:`~flask_oauthlib.contrib.cache.Cache` instance,
+                  or any werkzeug cache object.
+    :param timeout: seconds to keep the data of an unfinished flow.
+    :param session_key: the key of the handle in the Flask session.
+
+    Pass the store to the client extension::
+
+        from flask_oauthlib.client import OAuth
+        from flask_oauthlib.contrib.cache import Cache
+
+        app.config.update({'OAUTHLIB_STATE_CACHE_TYPE': 'redis'})
+        cache = Cache(app, 'OAUTHLIB_STATE')
+        oauth = OAuth(app, state_store=CacheStateStore(cache))
+
+    The contrib client accepts it as well::
+
+        from flask_oauthlib.contrib.client import OAuth
+
+        oauth = OAuth(app, state_store=CacheStateStore(cache))
+    """
+
+    def __init__(self, cache, timeout=600, session_key='_oauth_state'):
+        self.cache = cache
+        self.timeout = timeout
+        self.session_key = session_key
+
+    def _make_key(self, key, create=False):
+        handle = session.get(self.session_key)
+        if handle is None:
+            if not create:
+                return None
+            handle = session[self.session_key] = gen_salt(20)
+        return 'oauth_state:%s:%s' % (handle, key)
+
+    def get(self, key, default=None):
+        cache_key = self._make_key(key)
+        if cache_key is None:
+            return default
+        value = self.cache.get(cache_key)
+        if value is None:
+            return default
+        return value
+
+    def __setitem__(self, key, value):
+        cache_key = self._make_key(key, create=True)
+        self.cache.set(cache_key, value, timeout=self.timeout)
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        cache_key = self._make_key(key)
+        if cache_key is not None:
+            self.cache.delete(cache_key)
+        return value
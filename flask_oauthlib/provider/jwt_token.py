@@ -0,0 +1,211 @@
+# coding: utf-8
+"""
+    flask_oauthlib.provider.jwt_token
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Self-contained signed access tokens (JSON Web Tokens) for the OAuth2
+    provider. It requires PyJWT, and cryptography for RSA and EC keys.
+"""
+
+import logging
+import datetime
+from werkzeug import cached_property
+from oauthlib.common import generate_token, to_unicode
+from ..utils import request_memoize
+try:
+    import jwt
+    from jwt.algorithms import get_default_algorithms
+except ImportError:
+    jwt = None
+
+if jwt is not None and int(jwt.__version__.split('.')[0]) < 2:
+    _decode_options = {'require_exp': True}
+else:
+    _decode_options = {'require': ['exp']}
+
+__all__ = ('KeyRing', 'SignedTokenGenerator', 'SignedToken')
+
+log = logging.getLogger('flask_oauthlib')
+
+
+class KeyRing(object):
+    """A ring of keys identified by ``kid``. New tokens are signed with the
+    current key, and tokens signed with any key in the ring are verified,
+    so that the keys can be rotated::
+
+        keyring = KeyRing()
+        keyring.add('2015-01', 'secret')
+
+        # later, sign with a new key, and verify both
+        keyring.add('2015-02', private_pem, 'RS256')
+
+        # finally, retire the old key
+        keyring.remove('2015-01')
+
+    The keys are parsed once when they are added.
+    """
+
+    def __init__(self):
+        if jwt is None:
+            raise RuntimeError('PyJWT is required for signed tokens')
+        self._keys = {}
+        self.current = None
+
+    def add(self, kid, key, algorithm='HS256', public_key=None,
+            current=True):
+        """Add a key to the ring.
+
+        :param kid: the key ID, saved in the header of tokens.
+        :param key: the secret of HMAC, or the private key of RSA and EC.
+                    It can be ``None`` for a key which verifies only.
+        :param algorithm: the algorithm, e.g. HS256, RS256, ES256.
+        :param public_key: optional. the public key of RSA and EC, default
+                           is derived from the private key.
+        :param current: sign new tokens with this key.
+        """
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms:
+            raise ValueError('Unsupported algorithm %r' % algorithm)
+        alg = algorithms[algorithm]
+
+        signing_key = None
+        if key is not None:
+            signing_key = alg.prepare_key(key)
+
+        if public_key is not None:
+            verifying_key = alg.prepare_key(public_key)
+        elif hasattr(signing_key, 'public_key'):
+            verifying_key = signing_key.public_key()
+        else:
+            verifying_key = signing_key
+
+        self._keys[kid] = (algorithm, signing_key, verifying_key)
+        if current and signing_key is not None:
+            self.current = kid
+
+    def remove(self, kid):
+        """Remove a key from the ring."""
+        self._keys.pop(kid, None)
+        if self.current == kid:
+            self.current = None
+
+    def sign(self, claims):
+        """Sign the claims with the current key."""
+        if self.current is None:
+            raise RuntimeError('No key to sign the token')
+        algorithm, key, _ = self._keys[self.current]
+        token = jwt.encode(
+            claims, key, algorithm=algorithm,
+            headers={'kid': self.current},
+        )
+        return to_unicode(token, 'utf-8')
+
+    def verify(self, token):
+        """Verify the token, returns the claims or None."""
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+        except jwt.InvalidTokenError:
+            return None
+        if kid not in self._keys:
+            log.debug('Unknown key %r of signed token', kid)
+            return None
+
+        algorithm, _, key = self._keys[kid]
+        try:
+            return jwt.decode(
+                token, key, algorithms=[algorithm],
+                options=_decode_options,
+            )
+        except jwt.InvalidTokenError as e:
+            log.debug('Invalid signed token: %s', e)
+            return None
+
+
+class SignedToken(object):
+    """SignedToken is the token object of a verified signed token.
+
+    :param access_token: the signed token string
+    :param claims: the verified claims
+    :param userloader: a function to load the user by the ``sub`` claim,
+                       the ID of the user as a string
+    :param clientgetter: a function to load the client by ``client_id``
+
+    The user and client are loaded once they are read.
+    """
+
+    def __init__(self, access_token, claims, userloader=None,
+                 clientgetter=None):
+        self.access_token = access_token
+        self.claims = claims
+        self.client_id = claims.get('client_id')
+        self.user_id = claims.get('sub')
+        self.scopes = claims.get('scope', '').split()
+        self.expires = datetime.datetime.utcfromtimestamp(claims['exp'])
+        self._userloader = userloader
+        self._clientgetter = clientgetter
+
+    @cached_property
+    def user(self):
+        if self.user_id is None or self._userloader is None:
+            return None
+        return self._userloader(self.user_id)
+
+    @cached_property
+    def client(self):
+        if self.client_id is None or self._clientgetter is None:
+            return None
+        return self._clientgetter(self.client_id)
+
+
+class SignedTokenGenerator(object):
+    """Generates signed access tokens which are verified without the
+    ``tokengetter``. Configure it as the token generator::
+
+        keyring = KeyRing()
+        keyring.add('2015-01', app.config['SECRET_KEY'])
+
+        app.config['OAUTH2_PROVIDER_TOKEN_GENERATOR'] = SignedTokenGenerator(
+            keyring, userloader=lambda id: User.query.get(id)
+        )
+
+    The token carries the ``sub`` (ID of the user), ``client_id``,
+    ``scope`` and ``exp`` claims. The refresh tokens are still random
+    strings unless ``OAUTH2_PROVIDER_REFRESH_TOKEN_GENERATOR`` is set.
+
+    A signed token can not be revoked before it expires, keep
+    ``OAUTH2_PROVIDER_TOKEN_EXPIRES_IN`` short.
+
+    :param keyring: a :class:`KeyRing` instance
+    :param userloader: optional. a function to load the user by ID, which
+                       is given as a string
+    """
+
+    def __init__(self, keyring, userloader=None):
+        self.keyring = keyring
+        self.userloader = request_memoize(userloader)
+
+    def __call__(self, request):
+        now = datetime.datetime.utcnow()
+        claims = {
+            'jti': generate_token(),
+            'client_id': request.client.client_id,
+            'scope': ' '.join(request.scopes or []),
+            'iat': now,
+            'exp': now + datetime.timedelta(seconds=request.expires_in),
+        }
+        user = getattr(request, 'user', None)
+        if user is not None:
+            # the claim is a string, PyJWT 2 rejects other types
+            claims['sub'] = str(user.id)
+        return self.keyring.sign(claims)
+
+    def verify(self, token, clientgetter=None):
+        """Verify the token, returns a :class:`SignedToken` or None.
+
+        :param clientgetter: optional. a function to load the client of
+                             the token by ``client_id``
+        """
+        claims = self.keyring.verify(token)
+        if claims is None:
+            return None
+        return SignedToken(token, claims, self.userloader, clientgetter)
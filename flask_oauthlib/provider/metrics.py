@@ -0,0 +1,446 @@
+# coding: utf-8
+"""
+    flask_oauthlib.provider.metrics
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Latency histograms, counts and errors of the provider endpoints and
+    of the registered getters and setters, and request-level traces of
+    the validator calls.
+"""
+
+import os
+import time
+import random
+import bisect
+import binascii
+import threading
+from collections import deque
+from functools import wraps
+from timeit import default_timer
+from flask import after_this_request, request
+
+__all__ = ('Metrics', 'Tracer')
+
+
+class Histogram(object):
+    """Latency histogram of a single endpoint or getter."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = {}
+
+    def observe(self, seconds, error=None):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def snapshot(self):
+        cumulative = []
+        total = 0
+        for le, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            cumulative.append((le, total))
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': cumulative,
+            'errors': dict(self.errors),
+        }
+
+
+def _error_type(e):
+    code = getattr(e, 'code', None)
+    if isinstance(code, int):
+        return str(code)
+    return e.__class__.__name__
+
+
+class Metrics(object):
+    """Collects the latency of the provider endpoints and the getters and
+    setters. Enable it with Flask config::
+
+        OAUTH2_PROVIDER_METRICS = True
+
+    Then read ``oauth.metrics.snapshot()``, or serve the Prometheus text
+    format with :meth:`wsgi_app`::
+
+        app.add_url_rule('/metrics', 'metrics', oauth.metrics.wsgi_app)
+
+    A :class:`Metrics` instance can also be configured, e.g. to share it
+    between the OAuth1 and OAuth2 providers.
+
+    :param namespace: prefix of the Prometheus metric names
+    :param buckets: upper bounds of the histogram buckets in seconds
+    """
+
+    #: default upper bounds of the histogram buckets in seconds
+    buckets = (
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+        0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    )
+
+    def __init__(self, namespace='oauth', buckets=None):
+        self.namespace = namespace
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind, name, seconds, error=None):
+        """Records a call.
+
+        :param kind: ``endpoint`` or ``getter``
+        :param name: name of the endpoint or getter
+        :param seconds: the latency
+        :param error: optional. the error type of a failed call
+        """
+        key = (kind, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(self.buckets)
+                self._histograms[key] = histogram
+            histogram.observe(seconds, error)
+
+    def instrument(self, kind, name, f):
+        """Wraps a function to record its calls. Exceptions are recorded
+        by their HTTP code or class name, responses by their status code
+        if it is 400 or greater.
+        """
+        if f is None:
+            return f
+
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            start = default_timer()
+            try:
+                rv = f(*args, **kwargs)
+            except Exception as e:
+                self.observe(kind, name, default_timer() - start,
+                             _error_type(e))
+                raise
+            if isinstance(rv, tuple) and len(rv) > 1:
+                # a view returns (body, status)
+                status = rv[1]
+            else:
+                status = getattr(rv, 'status_code', None)
+            error = None
+            if isinstance(status, int) and status >= 400:
+                error = str(status)
+            self.observe(kind, name, default_timer() - start, error)
+            return rv
+        return decorated
+
+    def snapshot(self):
+        """Returns the collected data::
+
+            {
+                'endpoint': {
+                    'token': {
+                        'count': 10,
+                        'sum': 0.12,
+                        'buckets': [(0.001, 0), ..., (inf, 10)],
+                        'errors': {'400': 2},
+                    },
+                },
+                'getter': {'clientgetter': {...}},
+            }
+
+        The bucket counts are cumulative.
+        """
+        rv = {'endpoint': {}, 'getter': {}}
+        with self._lock:
+            for (kind, name), histogram in self._histograms.items():
+                rv.setdefault(kind, {})[name] = histogram.snapshot()
+        return rv
+
+    def reset(self):
+        """Drops the collected data."""
+        with self._lock:
+            self._histograms.clear()
+
+    def prometheus_text(self):
+        """Renders the collected data in the Prometheus text format."""
+        lines = []
+        for kind, series in sorted(self.snapshot().items()):
+            metric = '%s_%s_seconds' % (self.namespace, kind)
+            lines.append('# HELP %s Latency of the OAuth %ss.' % (
+                metric, kind))
+            lines.append('# TYPE %s histogram' % metric)
+            for name, data in sorted(series.items()):
+                for le, count in data['buckets']:
+                    le = '+Inf' if le == float('inf') else repr(le)
+                    lines.append('%s_bucket{name="%s",le="%s"} %d' % (
+                        metric, name, le, count))
+                lines.append('%s_sum{name="%s"} %r' % (
+                    metric, name, data['sum']))
+                lines.append('%s_count{name="%s"} %d' % (
+                    metric, name, data['count']))
+
+            metric = '%s_%s_errors_total' % (self.namespace, kind)
+            lines.append('# HELP %s Errors of the OAuth %ss.' % (
+                metric, kind))
+            lines.append('# TYPE %s counter' % metric)
+            for name, data in sorted(series.items()):
+                for error, count in sorted(data['errors'].items()):
+                    lines.append('%s{name="%s",error="%s"} %d' % (
+                        metric, name, error, count))
+        lines.append('')
+        return '\n'.join(lines)
+
+    def wsgi_app(self, environ=None, start_response=None):
+        """A WSGI application serving :meth:`prometheus_text`. It can be
+        called as a Flask view as well.
+        """
+        body = self.prometheus_text().encode('utf-8')
+        headers = [
+            ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+            ('Content-Length', str(len(body))),
+        ]
+        if start_response is None:
+            return body, 200, headers
+        start_response('200 OK', headers)
+        return [body]
+
+
+class _TraceLocal(threading.local):
+    #: the trace of the current request
+    trace = None
+
+
+class Span(object):
+    """A timed call in a trace."""
+
+    __slots__ = ('kind', 'name', 'duration', 'error', 'children')
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.duration = None
+        self.error = None
+        self.children = []
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'duration': self.duration,
+            'error': self.error,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+class Trace(object):
+    """The call tree of a sampled request."""
+
+    def __init__(self, endpoint):
+        self.id = binascii.hexlify(os.urandom(8)).decode('ascii')
+        self.endpoint = endpoint
+        self.method = request.method
+        self.path = request.path
+        self.started = time.time()
+        self.root = Span('endpoint', endpoint)
+        self.stack = [self.root]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'path': self.path,
+            'started': self.started,
+            'root': self.root.to_dict(),
+        }
+
+
+class Tracer(object):
+    """Records the validator methods called by oauthlib, the getters and
+    setters each of them triggered, and the time spent in each, for a
+    sample of the requests. Enable it with Flask config::
+
+        OAUTH2_PROVIDER_TRACING = True
+        OAUTH2_PROVIDER_TRACE_SAMPLE_RATE = 0.01
+
+    A sampled response has a ``X-OAuth-Trace`` header with the ID of its
+    trace, which can be looked up with ``oauth.tracer.get(trace_id)``. The
+    latest traces are kept in memory.
+
+    :param size: number of traces to keep
+    :param sample_rate: the fraction of the requests to trace
+    :param header: the response header of the trace ID
+    """
+
+    def __init__(self, size=100, sample_rate=1.0, header='X-OAuth-Trace'):
+        self.sample_rate = sample_rate
+        self.header = header
+        self._traces = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._local = _TraceLocal()
+
+    def get(self, trace_id):
+        """Returns the trace of the given ID as a dict, or None."""
+        with self._lock:
+            for trace in self._traces:
+                if trace.id == trace_id:
+                    return trace.to_dict()
+        return None
+
+    def traces(self):
+        """Returns the kept traces as dicts, the latest first."""
+        with self._lock:
+            traces = list(self._traces)
+        return [trace.to_dict() for trace in reversed(traces)]
+
+    def clear(self):
+        """Drops the kept traces."""
+        with self._lock:
+            self._traces.clear()
+
+    def trace_endpoint(self, name, f):
+        """Wraps an endpoint to start a trace for a sample of requests."""
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if self._local.trace is not None:
+                return self.trace('endpoint', name, f)(*args, **kwargs)
+            if random.random() >= self.sample_rate:
+                return f(*args, **kwargs)
+
+            trace = self._local.trace = Trace(name)
+
+            @after_this_request
+            def add_header(response):
+                response.headers[self.header] = trace.id
+                return response
+
+            start = default_timer()
+            try:
+                return f(*args, **kwargs)
+            except Exception as e:
+                trace.root.error = _error_type(e)
+                raise
+            finally:
+                trace.root.duration = default_timer() - start
+                self._local.trace = None
+                with self._lock:
+                    self._traces.append(trace)
+        return decorated
+
+    def trace(self, kind, name, f):
+        """Wraps a function to record its calls in the current trace."""
+        if f is None:
+            return f
+
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            trace = self._local.trace
+            if trace is None:
+                return f(*args, **kwargs)
+
+            span = Span(kind, name)
+            trace.stack[-1].children.append(span)
+            trace.stack.append(span)
+            start = default_timer()
+            try:
+                return f(*args, **kwargs)
+            except Exception as e:
+                span.error = _error_type(e)
+                raise
+            finally:
+                span.duration = default_timer() - start
+                trace.stack.pop()
+        return decorated
+
+
+class TracedValidator(object):
+    """Proxies a request validator, recording its method calls in the
+    traces of a :class:`Tracer`.
+    """
+
+    def __init__(self, validator, tracer):
+        self._validator = validator
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        attr = getattr(self._validator, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        traced = self._tracer.trace('validator', name, attr)
+        # the validator is fixed, keep the traced method
+        self.__dict__[name] = traced
+        return traced
+
+
+def instrument_endpoint(provider, name, f):
+    """Records the calls of an endpoint if the metrics or the tracer of the
+    provider are enabled. Disabled, they cost two attribute lookups.
+    """
+    instrumented = []
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        metrics = provider.metrics
+        tracer = provider.tracer
+        if metrics is None and tracer is None:
+            return f(*args, **kwargs)
+        if not instrumented:
+            rv = f
+            if tracer is not None:
+                rv = tracer.trace_endpoint(name, rv)
+            if metrics is not None:
+                rv = metrics.instrument('endpoint', name, rv)
+            instrumented.append(rv)
+        return instrumented[0](*args, **kwargs)
+    return decorated
+
+
+def instrument_getter(provider, name, f):
+    """Records the calls of a getter or setter if the metrics or the tracer
+    of the provider are enabled.
+    """
+    if f is None:
+        return f
+    if provider.tracer is not None:
+        f = provider.tracer.trace('getter', name, f)
+    if provider.metrics is not None:
+        f = provider.metrics.instrument('getter', name, f)
+    return f
+
+
+def instrument_validator(provider, validator):
+    """Traces the method calls of a validator if the tracer of the provider
+    is enabled.
+    """
+    if provider.tracer is None:
+        return validator
+    return TracedValidator(validator, provider.tracer)
+
+
+def create_metrics(config, namespace):
+    """Creates the metrics of a provider from its Flask config value,
+    which is a boolean or a :class:`Metrics` instance.
+    """
+    if isinstance(config, Metrics):
+        return config
+    if config:
+        return Metrics(namespace)
+    return None
+
+
+def create_tracer(config, prefix):
+    """Creates the tracer of a provider from its Flask config, the value of
+    ``<prefix>_TRACING`` is a boolean or a :class:`Tracer` instance.
+    """
+    tracing = config.get('%s_TRACING' % prefix)
+    if isinstance(tracing, Tracer):
+        return tracing
+    if tracing:
+        return Tracer(
+            size=config.get('%s_TRACE_SIZE' % prefix, 100),
+            sample_rate=config.get('%s_TRACE_SAMPLE_RATE' % prefix, 1.0),
+        )
+    return None
@@ -19,6 +19,12 @@ from oauthlib.oauth1 import SIGNATURE_HMAC, SIGNATURE_RSA
 from oauthlib.common import to_unicode, add_params_to_uri, urlencode
 from oauthlib.oauth1.rfc5849 import errors
 from ..utils import extract_params, create_response
+from ..utils import request_memoize, clear_request_memo, ScopeRegistry
+from .metrics import create_metrics, create_tracer
+from .metrics import instrument_endpoint, instrument_getter
+from .metrics import instrument_validator
+from .ratelimit import create_rate_limiter, check_rate_limit, limit_endpoint
+from .ratelimit import limit_authenticated
 
 SIGNATURE_METHODS = (SIGNATURE_HMAC, SIGNATURE_RSA)
 
@@ -89,6 +95,44 @@ class OAuth1Provider(object):
             return url_for(error_endpoint)
         return '/oauth/errors'
 
+    @cached_property
+    def metrics(self):
+        """The :class:`~flask_oauthlib.provider.metrics.Metrics` of the
+        endpoints, getters and setters, or None if it is disabled. Enable
+        it with Flask config::
+
+            OAUTH1_PROVIDER_METRICS = True
+        """
+        return create_metrics(
+            self.app.config.get('OAUTH1_PROVIDER_METRICS'), 'oauth1'
+        )
+
+    @cached_property
+    def tracer(self):
+        """The :class:`~flask_oauthlib.provider.metrics.Tracer` of the
+        validator calls, or None if it is disabled. Enable it with Flask
+        config::
+
+            OAUTH1_PROVIDER_TRACING = True
+            OAUTH1_PROVIDER_TRACE_SAMPLE_RATE = 0.01
+        """
+        return create_tracer(self.app.config, 'OAUTH1_PROVIDER')
+
+    @cached_property
+    def rate_limiter(self):
+        """The :class:`~flask_oauthlib.provider.ratelimit.RateLimiter` of the
+        endpoints, or None if it is disabled. Enable it with Flask config::
+
+            OAUTH1_PROVIDER_RATE_LIMITS = {
+                'access_token': {'client': '10/minute', 'ip': '100/minute'},
+                'require_oauth': {'user': '100/second'},
+            }
+
+        The client and user limits apply once the client or user is
+        authenticated, the IP limits before.
+        """
+        return create_rate_limiter(self.app.config, 'OAUTH1_PROVIDER')
+
     @cached_property
     def server(self):
         """
@@ -96,7 +140,7 @@ class OAuth1Provider(object):
         if you have implemented all the getters and setters.
         """
         if hasattr(self, '_validator'):
-            return Server(self._validator)
+            return Server(instrument_validator(self, self._validator))
 
         if hasattr(self, '_clientgetter') and \
            hasattr(self, '_tokengetter') and \
@@ -108,21 +152,26 @@ class OAuth1Provider(object):
            hasattr(self, '_verifiergetter') and \
            hasattr(self, '_verifiersetter'):
 
+            def _getter(name):
+                return instrument_getter(
+                    self, name, getattr(self, '_' + name)
+                )
+
             validator = OAuth1RequestValidator(
-                clientgetter=self._clientgetter,
-                tokengetter=self._tokengetter,
-                tokensetter=self._tokensetter,
-                grantgetter=self._grantgetter,
-                grantsetter=self._grantsetter,
-                noncegetter=self._noncegetter,
-                noncesetter=self._noncesetter,
-                verifiergetter=self._verifiergetter,
-                verifiersetter=self._verifiersetter,
+                clientgetter=_getter('clientgetter'),
+                tokengetter=_getter('tokengetter'),
+                tokensetter=_getter('tokensetter'),
+                grantgetter=_getter('grantgetter'),
+                grantsetter=_getter('grantsetter'),
+                noncegetter=_getter('noncegetter'),
+                noncesetter=_getter('noncesetter'),
+                verifiergetter=_getter('verifiergetter'),
+                verifiersetter=_getter('verifiersetter'),
                 config=self.app.config,
             )
 
             self._validator = validator
-            server = Server(validator)
+            server = Server(instrument_validator(self, validator))
             if self.app.testing:
                 # It will always be false, since the redirect_uri
                 # didn't match when doing the testing
@@ -408,7 +457,8 @@ class OAuth1Provider(object):
                 return redirect(e.in_uri(self.error_uri))
             except errors.InvalidClientError as e:
                 return redirect(e.in_uri(self.error_uri))
-        return decorated
+        decorated = limit_endpoint(self, 'authorize', decorated)
+        return instrument_endpoint(self, 'authorize', decorated)
 
     def confirm_authorization_request(self):
         """When consumer confirm the authrozation."""
@@ -454,7 +504,8 @@ class OAuth1Provider(object):
                 return create_response(*ret)
             except errors.OAuth1Error as e:
                 return _error_response(e)
-        return decorated
+        decorated = limit_endpoint(self, 'request_token', decorated)
+        return instrument_endpoint(self, 'request_token', decorated)
 
     def access_token_handler(self, f):
         """Access token handler decorator.
@@ -481,11 +532,15 @@ class OAuth1Provider(object):
                 return create_response(*ret)
             except errors.OAuth1Error as e:
                 return _error_response(e)
-        return decorated
+        decorated = limit_endpoint(self, 'access_token', decorated)
+        return instrument_endpoint(self, 'access_token', decorated)
 
     def require_oauth(self, *realms, **kwargs):
         """Protect resource with specified scopes."""
         def wrapper(f):
+            # the realms are compiled once the server is created
+            compiled = []
+
             @wraps(f)
             def decorated(*args, **kwargs):
                 for func in self._before_request_funcs:
@@ -495,10 +550,17 @@ class OAuth1Provider(object):
                     return f(*args, **kwargs)
 
                 server = self.server
+                if not compiled:
+                    registry = getattr(
+                        server.request_validator, 'realm_registry', None)
+                    if registry is not None:
+                        compiled.append(registry.compile(realms))
+                    else:
+                        compiled.append(realms)
                 uri, http_method, body, headers = extract_params()
                 try:
                     valid, req = server.validate_protected_resource_request(
-                        uri, http_method, body, headers, realms
+                        uri, http_method, body, headers, compiled[0]
                     )
                 except Exception as e:
                     log.warn('Exception: %r', e)
@@ -512,9 +574,17 @@ class OAuth1Provider(object):
                     return abort(401)
                 # alias user for convenience
                 req.user = req.access_token.user
+
+                limited = check_rate_limit(
+                    self, 'require_oauth',
+                    getattr(req.client, 'client_key', None),
+                    getattr(req.user, 'id', None),
+                )
+                if limited is not None:
+                    return limited
                 request.oauth = req
                 return f(*args, **kwargs)
-            return decorated
+            return instrument_endpoint(self, 'require_oauth', decorated)
         return wrapper
 
 
@@ -528,27 +598,30 @@ class OAuth1RequestValidator(RequestValidator):
     :param grantsetter: a function to save request token
     :param noncegetter: a function to get nonce and timestamp
     :param noncesetter: a function to save nonce and timestamp
+
+    The results of the getters are memoized in each request. Calling a
+    setter drops the memoized results of the matching getter.
     """
 
     def __init__(self, clientgetter, tokengetter, tokensetter,
                  grantgetter, grantsetter, noncegetter, noncesetter,
                  verifiergetter, verifiersetter, config=None):
-        self._clientgetter = clientgetter
+        self._clientgetter = request_memoize(clientgetter)
 
         # access token getter and setter
-        self._tokengetter = tokengetter
+        self._tokengetter = request_memoize(tokengetter)
         self._tokensetter = tokensetter
 
         # request token getter and setter
-        self._grantgetter = grantgetter
+        self._grantgetter = request_memoize(grantgetter)
         self._grantsetter = grantsetter
 
         # nonce and timestamp
-        self._noncegetter = noncegetter
+        self._noncegetter = request_memoize(noncegetter)
         self._noncesetter = noncesetter
 
         # verifier getter and setter
-        self._verifiergetter = verifiergetter
+        self._verifiergetter = request_memoize(verifiergetter)
         self._verifiersetter = verifiersetter
 
         self._config = config or {}
@@ -607,6 +680,11 @@ class OAuth1RequestValidator(RequestValidator):
     def realms(self):
         return self._config.get('OAUTH1_PROVIDER_REALMS', [])
 
+    @cached_property
+    def realm_registry(self):
+        """The registry of realms for the realm checks."""
+        return ScopeRegistry(self._config.get('OAUTH1_PROVIDER_REALMS'))
+
     @property
     def enforce_ssl(self):
         """Enforce SSL request.
@@ -760,6 +838,7 @@ class OAuth1RequestValidator(RequestValidator):
             nonce=nonce, request_token=request_token,
             access_token=access_token
         )
+        clear_request_memo(self._noncegetter)
         return True
 
     def validate_redirect_uri(self, client_key, redirect_uri, request):
@@ -800,7 +879,7 @@ class OAuth1RequestValidator(RequestValidator):
             request.access_token = tok
         if not tok:
             return False
-        return set(tok.realms).issuperset(set(realms))
+        return self.realm_registry.issuperset(tok.realms, realms)
 
     def validate_verifier(self, client_key, token, verifier, request):
         """Validate verifier exists."""
@@ -836,7 +915,7 @@ class OAuth1RequestValidator(RequestValidator):
         if not hasattr(tok, 'realms'):
             # realms not enabled
             return True
-        return set(tok.realms) == set(realms)
+        return self.realm_registry.equals(tok.realms, realms)
 
     def save_access_token(self, token, request):
         """Save access token to database.
@@ -855,7 +934,11 @@ class OAuth1RequestValidator(RequestValidator):
                 return access_token.save()
         """
         log.debug('Save access token %r', token)
+        limit_authenticated(
+            request.client_key, getattr(request.user, 'id', None)
+        )
         self._tokensetter(token, request)
+        clear_request_memo(self._tokengetter)
 
     def save_request_token(self, token, request):
         """Save request token to database.
@@ -874,7 +957,9 @@ class OAuth1RequestValidator(RequestValidator):
                 return grant.save()
         """
         log.debug('Save request token %r', token)
+        limit_authenticated(request.client_key)
         self._grantsetter(token, request)
+        clear_request_memo(self._grantgetter)
 
     def save_verifier(self, token, verifier, request):
         """Save verifier to database.
@@ -897,6 +982,7 @@ class OAuth1RequestValidator(RequestValidator):
         self._verifiersetter(
             token=token, verifier=verifier, request=request
         )
+        clear_request_memo(self._verifiergetter, self._grantgetter)
 
 
 def _error_response(e):
@@ -9,17 +9,31 @@
 """
 
 import os
+import time
+import calendar
 import logging
 import datetime
 from functools import wraps
-from flask import request, url_for
+from flask import request, url_for, json
 from flask import redirect, abort
 from werkzeug import cached_property
 from werkzeug.utils import import_string
 from oauthlib import oauth2
 from oauthlib.oauth2 import RequestValidator, Server
-from oauthlib.common import to_unicode
+from oauthlib.oauth2.rfc6749.tokens import random_token_generator
+from oauthlib.common import to_unicode, urldecode, Request
+from oauthlib.common import CaseInsensitiveDict
+from oauthlib.oauth2.rfc6749.tokens import BearerToken
 from ..utils import extract_params, decode_base64, create_response
+from ..utils import _get_uri_from_request, FORM_MIMETYPES
+from ..utils import request_memoize, clear_request_memo, ScopeRegistry
+from .jwt_token import SignedTokenGenerator, SignedToken
+from .metrics import create_metrics, create_tracer
+from .metrics import instrument_endpoint, instrument_getter
+from .metrics import instrument_validator
+from .ratelimit import create_rate_limiter, check_rate_limit, limit_endpoint
+from .ratelimit import limit_authenticated
+from .rotation import create_refresh_rotation
 
 __all__ = ('OAuth2Provider', 'OAuth2RequestValidator')
 
@@ -106,6 +120,66 @@ class OAuth2Provider(object):
             return url_for(error_endpoint)
         return '/oauth/errors'
 
+    @cached_property
+    def scope_registry(self):
+        """The registry of scopes for the scope checks.
+
+        The known scopes can be configured with Flask config::
+
+            OAUTH2_PROVIDER_SCOPES = ['email', 'address']
+
+        Otherwise the scopes are registered once they are seen.
+        """
+        return ScopeRegistry(self.app.config.get('OAUTH2_PROVIDER_SCOPES'))
+
+    @cached_property
+    def metrics(self):
+        """The :class:`~flask_oauthlib.provider.metrics.Metrics` of the
+        endpoints, getters and setters, or None if it is disabled. Enable
+        it with Flask config::
+
+            OAUTH2_PROVIDER_METRICS = True
+        """
+        return create_metrics(
+            self.app.config.get('OAUTH2_PROVIDER_METRICS'), 'oauth2'
+        )
+
+    @cached_property
+    def tracer(self):
+        """The :class:`~flask_oauthlib.provider.metrics.Tracer` of the
+        validator calls, or None if it is disabled. Enable it with Flask
+        config::
+
+            OAUTH2_PROVIDER_TRACING = True
+            OAUTH2_PROVIDER_TRACE_SAMPLE_RATE = 0.01
+        """
+        return create_tracer(self.app.config, 'OAUTH2_PROVIDER')
+
+    @cached_property
+    def rate_limiter(self):
+        """The :class:`~flask_oauthlib.provider.ratelimit.RateLimiter` of the
+        endpoints, or None if it is disabled. Enable it with Flask config::
+
+            OAUTH2_PROVIDER_RATE_LIMITS = {
+                'token': {'client': '10/minute', 'ip': '100/minute'},
+                'require_oauth': {'user': '100/second'},
+            }
+
+        The client and user limits apply once the client or user is
+        authenticated, the IP limits before.
+        """
+        return create_rate_limiter(self.app.config, 'OAUTH2_PROVIDER')
+
+    @cached_property
+    def refresh_rotation(self):
+        """The :class:`~flask_oauthlib.provider.rotation.RefreshTokenRotation`
+        of the refresh tokens, or None if it is disabled. Enable it with
+        Flask config::
+
+            OAUTH2_PROVIDER_REFRESH_ROTATION = True
+        """
+        return create_refresh_rotation(self.app.config, 'OAUTH2_PROVIDER')
+
     @cached_property
     def server(self):
         """
@@ -137,9 +211,19 @@ class OAuth2Provider(object):
         if refresh_token_generator and not callable(refresh_token_generator):
             refresh_token_generator = import_string(refresh_token_generator)
 
+        tokenverifier = None
+        if isinstance(token_generator, SignedTokenGenerator):
+            tokenverifier = token_generator
+            # refresh tokens are looked up by the tokengetter anyway
+            if not refresh_token_generator:
+                refresh_token_generator = random_token_generator
+
         if hasattr(self, '_validator'):
+            if getattr(self._validator, '_scopes', False) is None:
+                # the scopes of require_oauth are compiled by this registry
+                self._validator._scopes = self.scope_registry
             return Server(
-                self._validator,
+                instrument_validator(self, self._validator),
                 token_expires_in=expires_in,
                 token_generator=token_generator,
                 refresh_token_generator=refresh_token_generator,
@@ -151,21 +235,26 @@ class OAuth2Provider(object):
            hasattr(self, '_grantgetter') and \
            hasattr(self, '_grantsetter'):
 
-            usergetter = None
-            if hasattr(self, '_usergetter'):
-                usergetter = self._usergetter
+            def _getter(name):
+                return instrument_getter(
+                    self, name, getattr(self, '_' + name, None)
+                )
 
             validator = OAuth2RequestValidator(
-                clientgetter=self._clientgetter,
-                tokengetter=self._tokengetter,
-                grantgetter=self._grantgetter,
-                usergetter=usergetter,
-                tokensetter=self._tokensetter,
-                grantsetter=self._grantsetter,
+                clientgetter=_getter('clientgetter'),
+                tokengetter=_getter('tokengetter'),
+                grantgetter=_getter('grantgetter'),
+                usergetter=_getter('usergetter'),
+                tokensetter=_getter('tokensetter'),
+                grantsetter=_getter('grantsetter'),
+                tokencache=getattr(self, '_tokencache', None),
+                tokenverifier=tokenverifier,
+                scoperegistry=self.scope_registry,
+                refreshrotation=self.refresh_rotation,
             )
             self._validator = validator
             return Server(
-                validator,
+                instrument_validator(self, validator),
                 token_expires_in=expires_in,
                 token_generator=token_generator,
                 refresh_token_generator=refresh_token_generator,
@@ -356,6 +445,67 @@ class OAuth2Provider(object):
         self._grantsetter = f
         return f
 
+    def tokenrevoker(self, f):
+        """Register a function to delete the tokens of a user, or of a
+        client, or of both, used by :meth:`revoke_all`::
+
+            @oauth.tokenrevoker
+            def revoke_tokens(user=None, client=None):
+                query = Token.query
+                if user is not None:
+                    query = query.filter_by(user_id=user.id)
+                if client is not None:
+                    query = query.filter_by(client_id=client.client_id)
+                return query.delete()
+        """
+        self._tokenrevoker = f
+        return f
+
+    def grantrevoker(self, f):
+        """Register a function to delete the grants of a user, or of a
+        client, or of both, used by :meth:`revoke_all`. It accepts the same
+        parameters as :meth:`tokenrevoker`.
+        """
+        self._grantrevoker = f
+        return f
+
+    def revoke_all(self, user=None, client=None):
+        """Revoke all tokens and grants of a user, or of a client, or of
+        both. For instance, when a user changes the password::
+
+            oauth.revoke_all(user=user)
+
+        It requires a :meth:`tokenrevoker`, and calls the
+        :meth:`grantrevoker` if it is registered. The cached tokens are
+        purged too. Signed tokens stay valid until they expire.
+
+        :param user: the user object
+        :param client: the client object
+        """
+        if user is None and client is None:
+            raise ValueError('`user` or `client` is required')
+        if not hasattr(self, '_tokenrevoker'):
+            raise RuntimeError('application not bound to a tokenrevoker')
+
+        log.debug('Revoke all tokens of %r for client %r', user, client)
+        tokenrevoker = instrument_getter(
+            self, 'tokenrevoker', self._tokenrevoker
+        )
+        rv = tokenrevoker(user=user, client=client)
+        if hasattr(self, '_grantrevoker'):
+            grantrevoker = instrument_getter(
+                self, 'grantrevoker', self._grantrevoker
+            )
+            grantrevoker(user=user, client=client)
+
+        tokencache = getattr(self, '_tokencache', None)
+        if tokencache is not None:
+            tokencache.purge(
+                client_id=getattr(client, 'client_id', None),
+                user_id=getattr(user, 'id', None),
+            )
+        return rv
+
     def authorize_handler(self, f):
         """Authorization handler decorator.
 
@@ -418,7 +568,8 @@ class OAuth2Provider(object):
                 e = oauth2.AccessDeniedError()
                 return redirect(e.in_uri(redirect_uri))
             return self.confirm_authorization_request()
-        return decorated
+        decorated = limit_endpoint(self, 'authorize', decorated)
+        return instrument_endpoint(self, 'authorize', decorated)
 
     def confirm_authorization_request(self):
         """When consumer confirm the authorization."""
@@ -460,11 +611,42 @@ class OAuth2Provider(object):
                     return jsonify(user=req.user)
                 return jsonify(status='error')
         """
+        rv = self._verify_bearer_request(scopes)
+        if rv is not None:
+            return rv
         uri, http_method, body, headers = extract_params()
         return self.server.verify_request(
             uri, http_method, body, headers, scopes
         )
 
+    def _verify_bearer_request(self, scopes):
+        """Fast path of :meth:`verify_request` for a request with an
+        ``Authorization: Bearer`` header and no form body. It calls
+        ``validate_bearer_token`` like oauthlib, with a :class:`BearerRequest`
+        which parses the URI and headers only when they are accessed.
+
+        Returns None if the request is not the case.
+        """
+        auth = request.headers.get('Authorization')
+        if not auth or not auth.startswith('Bearer '):
+            return None
+        if request.mimetype in FORM_MIMETYPES:
+            return None
+
+        server = self.server
+        if not server.available or server.catch_errors:
+            return None
+        handler = server.tokens.get('Bearer')
+        if len(server.tokens) != 1 or not isinstance(handler, BearerToken):
+            return None
+
+        req = BearerRequest(request._get_current_object())
+        req.scopes = scopes
+        valid = handler.request_validator.validate_bearer_token(
+            to_unicode(auth[7:], 'utf-8'), scopes, req
+        )
+        return valid, req
+
     def token_handler(self, f):
         """Access/refresh token handler decorator.
 
@@ -485,11 +667,32 @@ class OAuth2Provider(object):
             uri, http_method, body, headers = extract_params()
             credentials = f(*args, **kwargs) or {}
             log.debug('Fetched extra credentials, %r.', credentials)
-            ret = server.create_token_response(
-                uri, http_method, body, headers, credentials
-            )
-            return create_response(*ret)
-        return decorated
+
+            def create_token_response():
+                try:
+                    return server.create_token_response(
+                        uri, http_method, body, headers, credentials
+                    )
+                except oauth2.InvalidGrantError as e:
+                    # the refresh token or the code is used by another
+                    # request after it is validated
+                    return {
+                        'Content-Type': 'application/json',
+                        'Cache-Control': 'no-store',
+                        'Pragma': 'no-cache',
+                    }, e.json, e.status_code
+
+            rotation = self.refresh_rotation
+            if rotation is not None and \
+               request.values.get('grant_type') == 'refresh_token':
+                # the duplicates of a refresh request get the same token
+                ret = rotation.single_flight(
+                    rotation.request_key(request), create_token_response
+                )
+                return create_response(*ret)
+            return create_response(*create_token_response())
+        decorated = limit_endpoint(self, 'token', decorated)
+        return instrument_endpoint(self, 'token', decorated)
 
     def revoke_handler(self, f):
         """Access/refresh token revoke decorator.
@@ -521,11 +724,86 @@ class OAuth2Provider(object):
             ret = server.create_revocation_response(
                 uri, headers=headers, body=body, http_method=http_method)
             return create_response(*ret)
-        return decorated
+        decorated = limit_endpoint(self, 'revoke', decorated)
+        return instrument_endpoint(self, 'revoke', decorated)
+
+    def introspect_handler(self, f):
+        """Token introspection decorator, as defined in [`RFC7662`_].
+
+        The caller must authenticate as a client, like a resource server
+        registered as a confidential client. Any return value by the
+        decorated function will get discarded::
+
+            @app.route('/oauth/introspect', methods=['POST'])
+            @oauth.introspect_handler
+            def introspect_token():
+                pass
+
+        A single ``token`` is answered with its metadata. For a batch, pass
+        the tokens in repeated ``tokens`` parameters, the response is
+        ``{"tokens": [...]}`` in the same order.
+
+        The ``Cache-Control`` header tells how long the response can be
+        cached, until the earliest expiry of the active tokens and at most
+        ``OAUTH2_PROVIDER_INTROSPECT_MAX_AGE`` (default 60) seconds.
+
+        .. _`RFC7662`: http://tools.ietf.org/html/rfc7662
+        """
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            validator = self.server.request_validator
+            uri, http_method, body, headers = extract_params()
+            req = Request(uri, http_method, body, headers)
+
+            headers = {
+                'Content-Type': 'application/json',
+                'Cache-Control': 'no-store',
+                'Pragma': 'no-cache',
+            }
+            if not validator.authenticate_client(req):
+                body = json.dumps({'error': 'invalid_client'})
+                return create_response(headers, body, 401)
+            limit_authenticated(req.client.client_id)
+
+            hint = request.values.get('token_type_hint')
+            tokens = request.values.getlist('tokens')
+            if tokens:
+                data = [validator.introspect_token(t, hint, req) or
+                        {'active': False} for t in tokens]
+            else:
+                token = request.values.get('token')
+                if not token:
+                    body = json.dumps({'error': 'invalid_request'})
+                    return create_response(headers, body, 400)
+                data = [validator.introspect_token(token, hint, req) or
+                        {'active': False}]
+
+            now = int(time.time())
+            max_age = self.app.config.get(
+                'OAUTH2_PROVIDER_INTROSPECT_MAX_AGE', 60)
+            for claims in data:
+                if claims['active'] and 'exp' in claims:
+                    max_age = min(max_age, claims['exp'] - now)
+            if any(claims['active'] for claims in data) and max_age > 0:
+                headers['Cache-Control'] = 'max-age=%d' % max_age
+                del headers['Pragma']
+
+            if tokens:
+                body = json.dumps({'tokens': data})
+            else:
+                body = json.dumps(data[0])
+            return create_response(headers, body, 200)
+        decorated = limit_endpoint(self, 'introspect', decorated)
+        return instrument_endpoint(self, 'introspect', decorated)
 
     def require_oauth(self, *scopes):
         """Protect resource with specified scopes."""
         def wrapper(f):
+            # the scopes are compiled once the provider is configured
+            compiled = []
+            if hasattr(self, 'app'):
+                compiled.append(self.scope_registry.compile(scopes))
+
             @wraps(f)
             def decorated(*args, **kwargs):
                 for func in self._before_request_funcs:
@@ -534,7 +812,9 @@ class OAuth2Provider(object):
                 if hasattr(request, 'oauth') and request.oauth:
                     return f(*args, **kwargs)
 
-                valid, req = self.verify_request(scopes)
+                if not compiled:
+                    compiled.append(self.scope_registry.compile(scopes))
+                valid, req = self.verify_request(compiled[0])
 
                 for func in self._after_request_funcs:
                     valid, req = func(valid, req)
@@ -543,9 +823,18 @@ class OAuth2Provider(object):
                     if self._invalid_response:
                         return self._invalid_response(req)
                     return abort(401)
+
+                if self.rate_limiter is not None:
+                    limited = check_rate_limit(
+                        self, 'require_oauth',
+                        getattr(req.client, 'client_id', None),
+                        getattr(req.user, 'id', None),
+                    )
+                    if limited is not None:
+                        return limited
                 request.oauth = req
                 return f(*args, **kwargs)
-            return decorated
+            return instrument_endpoint(self, 'require_oauth', decorated)
         return wrapper
 
 
@@ -557,15 +846,39 @@ class OAuth2RequestValidator(RequestValidator):
     :param tokensetter: a function to save bearer token
     :param grantgetter: a function to get grant token
     :param grantsetter: a function to save grant token
+    :param tokencache: optional. a cache of validated bearer tokens, see
+                       :class:`~flask_oauthlib.contrib.oauth2.TokenCache`
+    :param tokenverifier: optional. a verifier of signed bearer tokens, see
+                          :mod:`flask_oauthlib.provider.jwt_token`
+    :param scoperegistry: optional. a registry of scopes for scope checks,
+                          default is the registry of the provider
+    :param refreshrotation: optional. the rotation of refresh tokens, see
+                            :mod:`flask_oauthlib.provider.rotation`
+
+    The results of client, token and grant getters are memoized in each
+    request. Saving or deleting a token or grant drops the memoized results
+    of its getter.
     """
     def __init__(self, clientgetter, tokengetter, grantgetter,
-                 usergetter=None, tokensetter=None, grantsetter=None):
-        self._clientgetter = clientgetter
-        self._tokengetter = tokengetter
+                 usergetter=None, tokensetter=None, grantsetter=None,
+                 tokencache=None, tokenverifier=None, scoperegistry=None,
+                 refreshrotation=None):
+        self._clientgetter = request_memoize(clientgetter)
+        self._tokengetter = request_memoize(tokengetter)
         self._usergetter = usergetter
         self._tokensetter = tokensetter
-        self._grantgetter = grantgetter
+        self._grantgetter = request_memoize(grantgetter)
         self._grantsetter = grantsetter
+        self._tokencache = tokencache
+        self._tokenverifier = tokenverifier
+        self._scopes = scoperegistry
+        self._rotation = refreshrotation
+
+    @property
+    def _scope_registry(self):
+        if self._scopes is None:
+            self._scopes = ScopeRegistry()
+        return self._scopes
 
     def client_authentication_required(self, request, *args, **kwargs):
         """Determine if client authentication is required for current request.
@@ -683,7 +996,7 @@ class OAuth2RequestValidator(RequestValidator):
         log.debug('Confirm scopes %r for refresh token %r',
                   scopes, refresh_token)
         tok = self._tokengetter(refresh_token=refresh_token)
-        return set(tok.scopes) == set(scopes)
+        return self._scope_registry.equals(tok.scopes, scopes)
 
     def get_default_redirect_uri(self, client_id, request, *args, **kwargs):
         """Default redirect_uri for the given client."""
@@ -704,12 +1017,28 @@ class OAuth2RequestValidator(RequestValidator):
         """Invalidate an authorization code after use.
 
         We keep the temporary code in a grant, which has a `delete`
-        function to destroy itself.
+        function to destroy itself. If `delete` returns False, the code is
+        used by another request since it was validated: the token issued
+        for it is revoked, and the request fails with ``invalid_grant``.
         """
         log.debug('Destroy grant token for client %r, %r', client_id, code)
         grant = self._grantgetter(client_id=client_id, code=code)
-        if grant:
-            grant.delete()
+        if not grant:
+            return
+        deleted = grant.delete()
+        clear_request_memo(self._grantgetter)
+        if deleted is not False:
+            return
+
+        log.debug('Grant %r is used by another request', code)
+        token = getattr(request, 'issued_token', None)
+        tok = token and self._tokengetter(access_token=token['access_token'])
+        if tok:
+            tok.delete()
+            clear_request_memo(self._tokengetter)
+            if self._tokencache is not None:
+                self._tokencache.invalidate(client_id, request.user)
+        raise oauth2.InvalidGrantError(request=request)
 
     def save_authorization_code(self, client_id, code, request,
                                 *args, **kwargs):
@@ -720,12 +1049,40 @@ class OAuth2RequestValidator(RequestValidator):
         )
         request.client = request.client or self._clientgetter(client_id)
         self._grantsetter(client_id, code, request, *args, **kwargs)
+        clear_request_memo(self._grantgetter)
         return request.client.default_redirect_uri
 
     def save_bearer_token(self, token, request, *args, **kwargs):
-        """Persist the Bearer token."""
+        """Persist the Bearer token.
+
+        With the rotation of refresh tokens, the refresh token of a refresh
+        request is used up here, once the request is validated.
+        """
         log.debug('Save bearer token %r', token)
-        self._tokensetter(token, request, *args, **kwargs)
+        limit_authenticated(
+            request.client.client_id, getattr(request.user, 'id', None)
+        )
+        rotation = self._rotation
+        parent = None
+        if rotation is not None and request.grant_type == 'refresh_token':
+            parent = request.refresh_token
+            if not rotation.claim(parent):
+                log.debug('Refresh token %r is used', parent)
+                raise oauth2.InvalidGrantError(request=request)
+        try:
+            self._tokensetter(token, request, *args, **kwargs)
+        except Exception:
+            if parent is not None:
+                rotation.release(parent)
+            raise
+        clear_request_memo(self._tokengetter)
+        request.issued_token = token
+        if rotation is not None and token.get('refresh_token'):
+            rotation.issue(token['refresh_token'], parent)
+        if self._tokencache is not None:
+            # the setter may have replaced the previous tokens
+            self._tokencache.invalidate(
+                request.client.client_id, request.user)
         return request.client.default_redirect_uri
 
     def validate_bearer_token(self, token, scopes, request):
@@ -742,7 +1099,15 @@ class OAuth2RequestValidator(RequestValidator):
             3) if the scopes are available
         """
         log.debug('Validate bearer token %r', token)
-        tok = self._tokengetter(access_token=token)
+        cached = None
+        if self._tokenverifier is not None and token.count('.') == 2:
+            # a signed token is verified without the tokengetter
+            tok = cached = self._tokenverifier.verify(
+                token, self._clientgetter)
+        else:
+            if self._tokencache is not None:
+                cached = self._tokencache.get(token)
+            tok = cached or self._tokengetter(access_token=token)
         if not tok:
             msg = 'Bearer token not found.'
             request.error_message = msg
@@ -756,18 +1121,28 @@ class OAuth2RequestValidator(RequestValidator):
             log.debug(msg)
             return False
 
+        if self._tokencache is not None and cached is None:
+            self._tokencache.set(tok)
+
         # validate scopes
-        if not set(tok.scopes).issuperset(set(scopes)):
+        if not self._scope_registry.issuperset(tok.scopes, scopes):
             msg = 'Bearer token scope not valid.'
             request.error_message = msg
             log.debug(msg)
             return False
 
         request.access_token = tok
-        request.user = tok.user
         request.scopes = scopes
 
-        if hasattr(tok, 'client'):
+        if isinstance(tok, SignedToken):
+            # a BearerRequest loads them only if the endpoint reads them
+            if not isinstance(request, BearerRequest):
+                request.user = tok.user
+                request.client = tok.client
+            return True
+
+        request.user = tok.user
+        if getattr(tok, 'client', None) is not None:
             request.client = tok.client
         elif hasattr(tok, 'client_id'):
             request.client = self._clientgetter(tok.client_id)
@@ -861,7 +1236,17 @@ class OAuth2RequestValidator(RequestValidator):
         This method is used by the authorization code grant indirectly by
         issuing refresh tokens, resource owner password credentials grant
         (also indirectly) and the refresh token grant.
+
+        With the rotation of refresh tokens, a refresh token is used once.
+        Using it again revokes the latest token of its family. It is used
+        up when the new token is saved, a request which fails before, e.g.
+        with an invalid scope, leaves it valid.
         """
+        rotation = self._rotation
+        if rotation is not None and rotation.is_used(refresh_token):
+            log.debug('Refresh token %r is reused', refresh_token)
+            self._revoke_family(refresh_token)
+            return False
 
         token = self._tokengetter(refresh_token=refresh_token)
 
@@ -872,6 +1257,19 @@ class OAuth2RequestValidator(RequestValidator):
             return True
         return False
 
+    def _revoke_family(self, refresh_token):
+        head = self._rotation.family_head(refresh_token)
+        if head is None:
+            return
+        tok = self._tokengetter(refresh_token=head)
+        if not tok:
+            return
+        log.debug('Revoke the family of refresh token %r', refresh_token)
+        tok.delete()
+        clear_request_memo(self._tokengetter)
+        if self._tokencache is not None:
+            self._tokencache.invalidate(tok.client_id, tok.user)
+
     def validate_response_type(self, client_id, response_type, client, request,
                                *args, **kwargs):
         """Ensure client is authorized to use the response type requested.
@@ -892,7 +1290,7 @@ class OAuth2RequestValidator(RequestValidator):
         """Ensure the client is authorized access to requested scopes."""
         if hasattr(client, 'validate_scopes'):
             return client.validate_scopes(scopes)
-        return set(client.default_scopes).issuperset(set(scopes))
+        return self._scope_registry.issuperset(client.default_scopes, scopes)
 
     def validate_user(self, username, password, client, request,
                       *args, **kwargs):
@@ -912,9 +1310,54 @@ class OAuth2RequestValidator(RequestValidator):
         log.debug('Password credential authorization is disabled.')
         return False
 
+    def introspect_token(self, token, token_type_hint, request,
+                         *args, **kwargs):
+        """Returns the metadata of an active token as defined in RFC 7662,
+        or None if the token is not active.
+        """
+        log.debug('Introspect token %r', token)
+        tok = None
+        if token_type_hint != 'refresh_token':
+            if self._tokenverifier is not None and token.count('.') == 2:
+                tok = self._tokenverifier.verify(token)
+            else:
+                if self._tokencache is not None:
+                    tok = self._tokencache.get(token)
+                tok = tok or self._tokengetter(access_token=token)
+            if tok and datetime.datetime.utcnow() > tok.expires:
+                tok = None
+
+        if tok:
+            claims = {
+                'active': True,
+                'token_type': 'Bearer',
+                'exp': int(calendar.timegm(tok.expires.utctimetuple())),
+            }
+        elif token_type_hint != 'access_token':
+            tok = self._tokengetter(refresh_token=token)
+            if not tok:
+                return None
+            claims = {'active': True, 'token_type': 'refresh_token'}
+        else:
+            return None
+
+        claims['client_id'] = tok.client_id
+        claims['scope'] = ' '.join(tok.scopes)
+        user_id = getattr(tok, 'user_id', None)
+        user = getattr(tok, 'user', None)
+        if user_id is None and user is not None:
+            user_id = getattr(user, 'id', None)
+        if user_id is not None:
+            claims['sub'] = to_unicode(str(user_id))
+        username = getattr(user, 'username', None)
+        if username is not None:
+            claims['username'] = username
+        return claims
+
     def revoke_token(self, token, token_type_hint, request, *args, **kwargs):
         """Revoke an access or refresh token.
         """
+        limit_authenticated(getattr(request.client, 'client_id', None))
         if token_type_hint:
             tok = self._tokengetter(**{token_type_hint: token})
         else:
@@ -926,9 +1369,71 @@ class OAuth2RequestValidator(RequestValidator):
             request.client_id = tok.client_id
             request.user = tok.user
             tok.delete()
+            clear_request_memo(self._tokengetter)
+            if self._tokencache is not None:
+                self._tokencache.invalidate(request.client_id, request.user)
             return True
 
         msg = 'Invalid token supplied.'
         log.debug(msg)
         request.error_message = msg
         return False
+
+
+class BearerRequest(Request):
+    """A lightweight :class:`oauthlib.common.Request` of a bearer request
+    without a form body, see :meth:`OAuth2Provider.verify_request`. The URI,
+    headers and parameters are built from the Flask request only when they
+    are accessed.
+    """
+
+    def __init__(self, flask_request, encoding='utf-8'):
+        self._request = flask_request
+        self._encoding = encoding
+        self.http_method = to_unicode(flask_request.method, encoding)
+        self.body = {}
+        self.decoded_body = []
+        self.oauth_params = []
+        self.token_type = 'Bearer'
+
+    @cached_property
+    def uri(self):
+        return to_unicode(_get_uri_from_request(self._request), self._encoding)
+
+    @cached_property
+    def headers(self):
+        headers = dict(self._request.headers.items())
+        return CaseInsensitiveDict(to_unicode(headers, self._encoding))
+
+    @cached_property
+    def _params(self):
+        params = dict(urldecode(self.uri_query))
+        params.update(self.headers)
+        return params
+
+    @property
+    def user(self):
+        """The user of the request, read from the access token unless it
+        is set, so that the user of a signed token is loaded only when the
+        endpoint reads it.
+        """
+        if 'user' in self.__dict__:
+            return self.__dict__['user']
+        return getattr(self.access_token, 'user', None)
+
+    @user.setter
+    def user(self, value):
+        self.__dict__['user'] = value
+
+    @property
+    def client(self):
+        """The client of the request, read from the access token unless it
+        is set.
+        """
+        if 'client' in self.__dict__:
+            return self.__dict__['client']
+        return getattr(self.access_token, 'client', None)
+
+    @client.setter
+    def client(self, value):
+        self.__dict__['client'] = value
@@ -0,0 +1,290 @@
+# coding: utf-8
+"""
+    flask_oauthlib.provider.ratelimit
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Rate limits of the provider endpoints per client, per user and per
+    remote address.
+"""
+
+import math
+import time
+import threading
+from functools import wraps
+from flask import request, Response, json, _request_ctx_stack
+from ..utils import OrderedDict
+
+__all__ = ('RateLimiter', 'RateLimited', 'MemoryStore', 'CacheStore',
+           'limit_authenticated')
+
+
+_periods = {
+    'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400,
+}
+
+
+def parse_limit(spec):
+    """Parses a limit like ``10/minute`` or ``5/30`` (per 30 seconds) to
+    ``(rate, burst)``, the rate is in tokens per second.
+    """
+    if isinstance(spec, tuple):
+        return spec
+    count, period = spec.split('/', 1)
+    period = period.strip()
+    if period.endswith('s') and period[:-1] in _periods:
+        period = period[:-1]
+    seconds = _periods.get(period)
+    if seconds is None:
+        seconds = float(period)
+    count = int(count)
+    return float(count) / seconds, count
+
+
+class MemoryStore(object):
+    """Token buckets in the process memory.
+
+    :param capacity: max number of buckets, the least recently used
+                     buckets are dropped when it is exceeded.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst):
+        """Takes a token from the bucket.
+
+        :returns: 0 if a token is taken, else seconds to retry after
+        """
+        now = time.time()
+        buckets = self._buckets
+        with self._lock:
+            tokens, last = buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                buckets[key] = (tokens - 1, now)
+                rv = 0
+            else:
+                buckets[key] = (tokens, now)
+                rv = (1 - tokens) / rate
+            if len(buckets) > self.capacity:
+                if OrderedDict is dict:
+                    buckets.popitem()
+                else:
+                    buckets.popitem(last=False)
+        return rv
+
+
+class CacheStore(object):
+    """Counters in a cache system shared by processes, e.g. the caches of
+    :mod:`flask_oauthlib.contrib.cache`. It is a fixed window counter, not
+    a token bucket: ``burst`` requests are allowed in each window of
+    ``burst / rate`` seconds, so up to twice as many can pass around the
+    end of a window. The counters are incremented with ``add`` and
+    ``inc``, which are atomic in Redis and Memcached.
+
+    :param cache: the cache instance
+    :param key_prefix: prefix of the counter keys
+    """
+
+    def __init__(self, cache, key_prefix='ratelimit:'):
+        self.cache = cache
+        self.key_prefix = key_prefix
+
+    def consume(self, key, rate, burst):
+        period = burst / rate
+        now = time.time()
+        window = int(now // period)
+        key = '%s%s:%d' % (self.key_prefix, key, window)
+        self.cache.add(key, 0, timeout=int(math.ceil(period)) + 1)
+        count = self.cache.inc(key)
+        if count is None or count <= burst:
+            return 0
+        return (window + 1) * period - now
+
+
+class RateLimiter(object):
+    """Limits the requests of the provider endpoints with token buckets.
+    Configure the limits of the endpoints per ``client``, ``user`` and
+    ``ip`` with Flask config::
+
+        OAUTH2_PROVIDER_RATE_LIMITS = {
+            'token': {'client': '10/minute', 'ip': '100/minute'},
+            'authorize': {'ip': '30/minute'},
+            'require_oauth': {'user': '100/second'},
+        }
+
+    The endpoints are ``authorize``, ``token``, ``revoke``, ``introspect``
+    and ``require_oauth`` of OAuth2, and ``authorize``, ``request_token``,
+    ``access_token`` and ``require_oauth`` of OAuth1.
+
+    The ``ip`` limits are checked before anything else. The ``client`` and
+    ``user`` limits are checked once the client or user is authenticated,
+    so that nobody drains the buckets of others by sending their IDs:
+
+    - ``token``, ``request_token`` and ``access_token``: the client, and
+      the user of the token, before the token is saved.
+    - ``revoke`` and ``introspect``: the client.
+    - ``require_oauth``: the client and user of the token.
+
+    Nothing is authenticated by ``authorize``, it is limited by ``ip``
+    only. A custom validator which does not extend the validators of this
+    package has the ``ip`` limits only, except for ``require_oauth``.
+
+    The limits of some clients can be overridden::
+
+        OAUTH2_PROVIDER_CLIENT_RATE_LIMITS = {
+            'trusted-client-id': {'token': '1000/minute'},
+        }
+
+    A limited request gets a ``429`` response with a ``Retry-After``
+    header. The buckets are kept in a :class:`MemoryStore` unless
+    ``OAUTH2_PROVIDER_RATE_LIMIT_STORE`` is configured, e.g. with a
+    :class:`CacheStore`.
+
+    :param limits: the limits of the endpoints
+    :param store: optional. the store of the buckets
+    :param client_limits: optional. the limits of some clients
+    """
+
+    def __init__(self, limits, store=None, client_limits=None):
+        self.store = store or MemoryStore()
+        self.limits = {}
+        for endpoint, rules in limits.items():
+            for scope in rules:
+                if scope not in ('client', 'user', 'ip'):
+                    raise ValueError('Unknown rate limit scope %r' % scope)
+            self.limits[endpoint] = [
+                (scope, parse_limit(spec)) for scope, spec in rules.items()
+            ]
+        self.client_limits = {}
+        for client_id, rules in (client_limits or {}).items():
+            self.client_limits[client_id] = dict(
+                (endpoint, parse_limit(spec))
+                for endpoint, spec in rules.items()
+            )
+
+    def check(self, endpoint, client_id=None, user_id=None,
+              remote_addr=None, scopes=None):
+        """Takes a token from the buckets of the request.
+
+        :param remote_addr: default is the address of the current request
+        :param scopes: optional. check the limits of these scopes only
+        :returns: 0 if the request is allowed, else seconds to retry after
+        """
+        rules = self.limits.get(endpoint)
+        if not rules:
+            return 0
+        retry_after = 0
+        for scope, limit in rules:
+            if scopes is not None and scope not in scopes:
+                continue
+            if scope == 'client':
+                value = client_id
+                if value in self.client_limits:
+                    limit = self.client_limits[value].get(endpoint, limit)
+            elif scope == 'user':
+                value = user_id
+            else:
+                value = remote_addr or request.remote_addr
+            if value is None:
+                continue
+            key = '%s:%s:%s' % (endpoint, scope, value)
+            retry_after = max(
+                retry_after, self.store.consume(key, limit[0], limit[1])
+            )
+        return retry_after
+
+    def response(self, retry_after):
+        """The ``429`` response of a limited request."""
+        body = json.dumps({
+            'error': 'rate_limit_exceeded',
+            'error_description': 'Too many requests.',
+        })
+        response = Response(body, 429, mimetype='application/json')
+        response.headers['Retry-After'] = str(int(math.ceil(retry_after)))
+        return response
+
+
+class RateLimited(Exception):
+    """Raised by :func:`limit_authenticated` when the authenticated client
+    or user is limited, and turned into a ``429`` response by the endpoint.
+    """
+
+    def __init__(self, retry_after):
+        Exception.__init__(self, retry_after)
+        self.retry_after = retry_after
+
+
+def check_rate_limit(provider, name, client_id=None, user_id=None,
+                     remote_addr=None):
+    """Returns a ``429`` response if the request is limited, else None."""
+    limiter = provider.rate_limiter
+    if limiter is None:
+        return None
+    retry_after = limiter.check(name, client_id, user_id, remote_addr)
+    if retry_after:
+        return limiter.response(retry_after)
+    return None
+
+
+def limit_authenticated(client_id=None, user_id=None):
+    """Checks the ``client`` and ``user`` limits of the current endpoint,
+    once they are authenticated. It is called by the validators before a
+    token is saved, and does nothing outside of a limited endpoint.
+
+    :raises: :class:`RateLimited` if the request is limited
+    """
+    ctx = _request_ctx_stack.top
+    pending = getattr(ctx, 'oauthlib_rate_limit', None)
+    if pending is None:
+        return
+    # once per request
+    ctx.oauthlib_rate_limit = None
+    limiter, name = pending
+    retry_after = limiter.check(
+        name, client_id, user_id, scopes=('client', 'user')
+    )
+    if retry_after:
+        raise RateLimited(retry_after)
+
+
+def limit_endpoint(provider, name, f):
+    """Limits an endpoint by the remote address, and by the client and
+    user once the validator authenticates them, if the rate limiter of the
+    provider is enabled.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        limiter = provider.rate_limiter
+        if limiter is None:
+            return f(*args, **kwargs)
+        retry_after = limiter.check(
+            name, remote_addr=request.remote_addr, scopes=('ip',)
+        )
+        if retry_after:
+            return limiter.response(retry_after)
+        ctx = _request_ctx_stack.top
+        ctx.oauthlib_rate_limit = (limiter, name)
+        try:
+            return f(*args, **kwargs)
+        except RateLimited as e:
+            return limiter.response(e.retry_after)
+        finally:
+            ctx.oauthlib_rate_limit = None
+    return decorated
+
+
+def create_rate_limiter(config, prefix):
+    """Creates the rate limiter of a provider from its Flask config."""
+    limits = config.get('%s_RATE_LIMITS' % prefix)
+    if isinstance(limits, RateLimiter):
+        return limits
+    if not limits:
+        return None
+    return RateLimiter(
+        limits,
+        store=config.get('%s_RATE_LIMIT_STORE' % prefix),
+        client_limits=config.get('%s_CLIENT_RATE_LIMITS' % prefix),
+    )
@@ -0,0 +1,231 @@
+# coding: utf-8
+"""
+    flask_oauthlib.provider.rotation
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Refresh token rotation with reuse detection, and single-flight of the
+    duplicate refresh requests.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from werkzeug.contrib.cache import BaseCache
+from werkzeug.security import gen_salt
+
+__all__ = ('RefreshTokenRotation', 'MemoryStore')
+
+log = logging.getLogger('flask_oauthlib')
+
+
+class MemoryStore(BaseCache):
+    """A cache in the process memory which never drops an entry before it
+    expires. Unlike :class:`SimpleCache`, it has no threshold, so the used
+    and family markers of the rotation are not evicted by the new ones.
+    """
+
+    def __init__(self, default_timeout=300):
+        super(MemoryStore, self).__init__(default_timeout)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0
+
+    def _prune(self, now):
+        if now > self._next_prune:
+            for key, (expires, _) in list(self._entries.items()):
+                if expires < now:
+                    del self._entries[key]
+            self._next_prune = now + 10
+
+    def _expires(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        if not timeout:
+            return float('inf')
+        return time.time() + timeout
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.time():
+            return None
+        return entry[1]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._prune(time.time())
+            self._entries[key] = (self._expires(timeout), value)
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            now = time.time()
+            self._prune(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= now:
+                return False
+            self._entries[key] = (self._expires(timeout), value)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+
+class RefreshTokenRotation(object):
+    """Every refresh request issues a new refresh token, and the refresh
+    token in the request is used up. The refresh tokens descending from one
+    grant belong to a family. When a used refresh token is presented again,
+    the latest token of its family is revoked, since one of the holders of
+    the family is not the legitimate client.
+
+    A client retrying a refresh request would present a used token too.
+    Requests with the same refresh token and client credentials within
+    ``window`` seconds are collapsed: one of them issues the token, the
+    others wait for it and get the same response.
+
+    Enable it with Flask config::
+
+        OAUTH2_PROVIDER_REFRESH_ROTATION = True
+        OAUTH2_PROVIDER_REFRESH_ROTATION_WINDOW = 10
+        OAUTH2_PROVIDER_REFRESH_ROTATION_CACHE = RedisCache()
+
+    The families, used tokens and responses are kept in the cache, the
+    default is a :class:`MemoryStore` of the process. Configure a cache
+    shared by the processes when there are several, with an atomic
+    ``add``, e.g. Redis. A cache which evicts entries before they expire,
+    e.g. :class:`SimpleCache` or Memcached, forgets the used tokens and
+    lets them be replayed.
+
+    The responses of the refresh requests are cached for ``window``
+    seconds as they are, with the new access and refresh tokens in plain
+    text. Only use a cache which is as private as the token database.
+
+    :param cache: optional. a werkzeug cache instance
+    :param window: seconds to collapse the duplicate requests
+    :param timeout: seconds to remember the families and used tokens,
+                    at least the life of a refresh token.
+    """
+
+    #: seconds between the checks of a waiting request
+    poll_interval = 0.05
+
+    def __init__(self, cache=None, window=10, timeout=30 * 86400):
+        self.cache = cache if cache is not None else MemoryStore()
+        self.window = window
+        self.timeout = timeout
+
+    def issue(self, refresh_token, parent=None):
+        """Adds a new refresh token to the family of its parent, or to a
+        new family.
+        """
+        family = None
+        if parent is not None:
+            family = self.cache.get('oauth2_refresh_family:%s' % parent)
+        if family is None:
+            family = gen_salt(16)
+            if parent is not None:
+                # a token issued before the rotation was enabled
+                self.cache.set(
+                    'oauth2_refresh_family:%s' % parent, family,
+                    timeout=self.timeout,
+                )
+        self.cache.set(
+            'oauth2_refresh_family:%s' % refresh_token, family,
+            timeout=self.timeout,
+        )
+        self.cache.set(
+            'oauth2_refresh_head:%s' % family, refresh_token,
+            timeout=self.timeout,
+        )
+
+    def is_used(self, refresh_token):
+        """Whether the refresh token is used already."""
+        return self.cache.get('oauth2_refresh_used:%s' % refresh_token) \
+            is not None
+
+    def claim(self, refresh_token):
+        """Marks the refresh token as used, atomically if the cache has an
+        atomic ``add``. Returns False if it is used already.
+        """
+        return self.cache.add(
+            'oauth2_refresh_used:%s' % refresh_token, 1, timeout=self.timeout
+        )
+
+    def release(self, refresh_token):
+        """Drops the claim of a refresh token whose new token failed to be
+        saved.
+        """
+        self.cache.delete('oauth2_refresh_used:%s' % refresh_token)
+
+    def family_head(self, refresh_token):
+        """Returns the latest refresh token of the family, or None."""
+        family = self.cache.get('oauth2_refresh_family:%s' % refresh_token)
+        if family is None:
+            return None
+        return self.cache.get('oauth2_refresh_head:%s' % family)
+
+    def request_key(self, req):
+        """The key of the duplicates of a refresh request: the refresh
+        token and the client credentials.
+        """
+        parts = [
+            req.values.get('refresh_token', ''),
+            req.values.get('client_id', ''),
+            req.values.get('client_secret', ''),
+            req.headers.get('Authorization', ''),
+        ]
+        digest = hashlib.sha256(u'\0'.join(parts).encode('utf-8'))
+        return 'oauth2_refresh_response:%s' % digest.hexdigest()
+
+    def single_flight(self, key, f):
+        """Calls ``f`` for the first of the duplicate requests of ``key``,
+        the others wait for its result. A successful result is returned to
+        the duplicates for ``window`` seconds.
+
+        :param f: a function returning ``(headers, body, status)``
+        """
+        lock = '%s:lock' % key
+        rv = self.cache.get(key)
+        if rv is not None:
+            return rv
+        if not self.cache.add(lock, 1, timeout=self.window):
+            deadline = time.time() + self.window
+            while time.time() < deadline:
+                time.sleep(self.poll_interval)
+                rv = self.cache.get(key)
+                if rv is not None:
+                    log.debug('Collapsed duplicate refresh request')
+                    return rv
+                if not self.cache.has(lock):
+                    # the first one failed, try it again
+                    break
+        try:
+            rv = f()
+            if rv[2] == 200:
+                self.cache.set(key, rv, timeout=self.window)
+        finally:
+            self.cache.delete(lock)
+        return rv
+
+
+def create_refresh_rotation(config, prefix):
+    """Creates the refresh token rotation of a provider from its Flask
+    config.
+    """
+    rotation = config.get('%s_REFRESH_ROTATION' % prefix)
+    if isinstance(rotation, RefreshTokenRotation):
+        return rotation
+    if not rotation:
+        return None
+    return RefreshTokenRotation(
+        cache=config.get('%s_REFRESH_ROTATION_CACHE' % prefix),
+        window=config.get('%s_REFRESH_ROTATION_WINDOW' % prefix, 10),
+    )
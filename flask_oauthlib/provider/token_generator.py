@@ -0,0 +1,88 @@
+# coding: utf-8
+"""
+    flask_oauthlib.provider.token_generator
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A fast generator of random tokens for the OAuth2 provider.
+"""
+
+import os
+import base64
+import weakref
+import threading
+from oauthlib.common import to_unicode
+
+__all__ = ('BufferedTokenGenerator', 'buffered_token_generator')
+
+_generators = weakref.WeakSet()
+_at_fork = hasattr(os, 'register_at_fork')
+
+
+def _reset_after_fork():
+    for generator in list(_generators):
+        generator._reset()
+
+
+if _at_fork:
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class BufferedTokenGenerator(object):
+    """Generates URL-safe base64 tokens from ``os.urandom``. The random
+    bytes are read and encoded in large blocks, and a token is a slice of
+    the encoded block, instead of a random choice per character. Configure
+    it as the token generator::
+
+        OAUTH2_PROVIDER_TOKEN_GENERATOR = (
+            'flask_oauthlib.provider.token_generator.buffered_token_generator'
+        )
+
+    Or with another length::
+
+        OAUTH2_PROVIDER_TOKEN_GENERATOR = BufferedTokenGenerator(length=40)
+
+    The block is dropped in a forked process, so that the processes never
+    share random bytes.
+
+    :param length: characters of a token, 6 bits of entropy each
+    :param buffer_size: bytes read from ``os.urandom`` at once
+    """
+
+    def __init__(self, length=30, buffer_size=4096):
+        self.length = length
+        # encode multiples of 3 bytes, without padding
+        self.buffer_size = max(buffer_size, length) // 3 * 3 + 3
+        self._reset()
+        _generators.add(self)
+
+    def _reset(self):
+        # a lock held by another thread is never released in a child
+        self._lock = threading.Lock()
+        self._buffer = u''
+        self._offset = 0
+        self._pid = os.getpid()
+
+    def generate(self):
+        """Returns a new token."""
+        n = self.length
+        with self._lock:
+            if not _at_fork and self._pid != os.getpid():
+                self._buffer = u''
+                self._pid = os.getpid()
+            offset = self._offset
+            if offset + n > len(self._buffer):
+                self._buffer = to_unicode(
+                    base64.urlsafe_b64encode(os.urandom(self.buffer_size)),
+                    'ascii',
+                )
+                offset = 0
+            self._offset = offset + n
+            return self._buffer[offset:offset + n]
+
+    def __call__(self, request, refresh_token=False):
+        return self.generate()
+
+
+#: a :class:`BufferedTokenGenerator` of 30 characters tokens, the length of
+#: the default tokens of oauthlib.
+buffered_token_generator = BufferedTokenGenerator()
@@ -1,8 +1,15 @@
 # coding: utf-8
 
 import base64
-from flask import request, Response
+import threading
+from functools import wraps
+from flask import request, Response, _request_ctx_stack
 from oauthlib.common import to_unicode, bytes_type
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python 2.6, items are evicted in arbitrary order
+    OrderedDict = dict
 
 
 def _get_uri_from_request(request):
@@ -17,21 +24,6 @@ def _get_uri_from_request(request):
     return uri
 
 
-def extract_params():
-    """Extract request params."""
-
-    uri = _get_uri_from_request(request)
-    http_method = request.method
-    headers = dict(request.headers)
-    if 'wsgi.input' in headers:
-        del headers['wsgi.input']
-    if 'wsgi.errors' in headers:
-        del headers['wsgi.errors']
-
-    body = request.form.to_dict()
-    return uri, http_method, body, headers
-
-
 def to_bytes(text, encoding='utf-8'):
     """Make sure text is bytes type."""
     if not text:
@@ -55,3 +47,213 @@ def create_response(headers, body, status):
 
     response.status_code = status
     return response
+
+
+def request_memoize(f):
+    """Memoize the results of a getter in the current request context, so
+    that each distinct lookup calls the getter only once per request. The
+    memo is dropped by :func:`clear_request_memo`.
+    """
+    if f is None:
+        return f
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        ctx = _request_ctx_stack.top
+        if ctx is None:
+            return f(*args, **kwargs)
+        key = (decorated, args, tuple(sorted(kwargs.items())))
+        memo = ctx.__dict__.setdefault('oauthlib_memo', {})
+        try:
+            return memo[key]
+        except KeyError:
+            rv = memo[key] = f(*args, **kwargs)
+            return rv
+        except TypeError:
+            # unhashable arguments
+            return f(*args, **kwargs)
+    return decorated
+
+
+def clear_request_memo(*getters):
+    """Drop the memoized getter results of the current request.
+
+    :param getters: the memoized getters to drop, default is all of them.
+    """
+    ctx = _request_ctx_stack.top
+    if ctx is None:
+        return
+    if not getters:
+        ctx.__dict__.pop('oauthlib_memo', None)
+        return
+    memo = ctx.__dict__.get('oauthlib_memo', {})
+    for key in list(memo):
+        if key[0] in getters:
+            del memo[key]
+
+
+FORM_MIMETYPES = frozenset([
+    'application/x-www-form-urlencoded', 'multipart/form-data',
+])
+
+
+@request_memoize
+def extract_params():
+    """Extract request params.
+
+    The result is cached in the current request, treat it as read-only.
+    The form is only parsed if the request carries a form body.
+    """
+
+    uri = _get_uri_from_request(request)
+    http_method = request.method
+    headers = dict(request.headers.items())
+
+    if request.mimetype in FORM_MIMETYPES:
+        body = request.form.to_dict()
+    else:
+        body = {}
+    return uri, http_method, body, headers
+
+
+class LRUCache(object):
+    """A thread safe mapping which keeps the most recently used items.
+
+    :param capacity: max number of items, the least recently used items
+                     are evicted when it is exceeded.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.capacity:
+                if OrderedDict is dict:
+                    self._data.popitem()
+                else:
+                    self._data.popitem(last=False)
+
+    def items(self):
+        """Returns a snapshot list of the ``(key, value)`` pairs."""
+        with self._lock:
+            return list(self._data.items())
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class ScopeList(list):
+    """A list of scopes carrying its compiled mask, created by
+    :meth:`ScopeRegistry.compile`. The mask is only valid in the registry
+    which compiled it.
+    """
+
+    def __init__(self, scopes, mask=None, registry=None):
+        super(ScopeList, self).__init__(scopes)
+        self.mask = mask
+        self.registry = registry
+
+
+class ScopeRegistry(object):
+    """Interns scopes to bit positions, so that a scope check is an integer
+    AND instead of building sets on every request.
+
+    :param scopes: optional. the known scopes. Other scopes are not interned
+                   if it is given, and checks with them fall back to sets.
+    :param max_size: max number of scopes to intern on the fly.
+    """
+
+    #: max number of cached masks
+    cache_size = 4096
+
+    def __init__(self, scopes=None, max_size=256):
+        self.max_size = max_size
+        self._bits = {}
+        self._masks = {}
+        self._lock = threading.Lock()
+        for scope in scopes or ():
+            self._bits.setdefault(scope, 1 << len(self._bits))
+        self.closed = scopes is not None
+
+    def _bit(self, scope):
+        bit = self._bits.get(scope)
+        if bit is not None or self.closed:
+            return bit
+        with self._lock:
+            bit = self._bits.get(scope)
+            if bit is None and len(self._bits) < self.max_size:
+                bit = self._bits[scope] = 1 << len(self._bits)
+        return bit
+
+    def _mask(self, scopes):
+        """Returns ``(mask, complete)``, ``complete`` is False if some of
+        the scopes are not interned, they are not in the mask.
+        """
+        mask = getattr(scopes, 'mask', None)
+        if mask is not None and getattr(scopes, 'registry', None) is self:
+            return mask, True
+
+        key = tuple(scopes)
+        try:
+            return self._masks[key]
+        except KeyError:
+            pass
+
+        mask = 0
+        complete = True
+        for scope in key:
+            bit = self._bit(scope)
+            if bit is None:
+                complete = False
+            else:
+                mask |= bit
+        if len(self._masks) >= self.cache_size:
+            self._masks.clear()
+        rv = self._masks[key] = (mask, complete)
+        return rv
+
+    def compile(self, scopes):
+        """Compiles the scopes to a :class:`ScopeList` with its mask."""
+        mask, complete = self._mask(scopes)
+        return ScopeList(scopes, mask if complete else None, self)
+
+    def issuperset(self, granted, required):
+        """Checks if the granted scopes contain all the required scopes."""
+        required_mask, complete = self._mask(required)
+        if not complete:
+            return set(granted).issuperset(set(required))
+        granted_mask = self._mask(granted)[0]
+        return granted_mask & required_mask == required_mask
+
+    def equals(self, first, second):
+        """Checks if two lists contain the same scopes."""
+        first_mask, first_complete = self._mask(first)
+        second_mask, second_complete = self._mask(second)
+        if not (first_complete and second_complete):
+            return set(first) == set(second)
+        return first_mask == second_mask
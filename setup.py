@@ -46,6 +46,9 @@ setup(
         'oauthlib>=0.6.2',
         'requests-oauthlib>=0.4.1',
     ],
+    extras_require={
+        'jwt': ['PyJWT', 'cryptography'],
+    },
     tests_require=['nose', 'Flask-SQLAlchemy', 'mock'],
     test_suite='nose.collector',
     classifiers=[
@@ -5,6 +5,8 @@ from mock import MagicMock
 from nose.tools import raises
 from flask import Flask
 from flask_oauthlib.client import OAuth, OAuthException
+from flask_oauthlib.contrib.state import CacheStateStore
+from werkzeug.contrib.cache import SimpleCache
 from .server import create_server, db
 from .client import create_client
 from .._base import BaseSuite, clean_url
@@ -96,6 +98,64 @@ class TestWebAuth(OAuthSuite):
         assert 'error' in rv.location
 
 
+class TestWebAuthWithStateStore(TestWebAuth):
+    def create_client(self, app):
+        remote = create_client(app)
+        remote.oauth.state_store = CacheStateStore(SimpleCache())
+        return remote
+
+    def test_session_handle(self):
+        rv = self.client.get('/login')
+        assert 'oauth_token' in rv.location
+        with self.client.session_transaction() as sess:
+            assert list(sess.keys()) == ['_oauth_state']
+
+
+class TestGetterMemo(OAuthSuite):
+    def create_server(self, app):
+        create_server(app)
+        oauth = app.extensions['oauthlib.provider.oauth1']
+        oauth._clientgetter = MagicMock(side_effect=oauth._clientgetter)
+        oauth._grantgetter = MagicMock(side_effect=oauth._grantgetter)
+        return app
+
+    def test_full_flow(self):
+        oauth = self.app.extensions['oauthlib.provider.oauth1']
+        rv = self.client.get('/login')
+        assert oauth._clientgetter.call_count == 1
+
+        auth_url = clean_url(rv.location)
+        rv = self.client.post(auth_url, data={'confirm': 'yes'})
+        assert oauth._grantgetter.call_count == 1
+
+        token_url = clean_url(rv.location)
+        rv = self.client.get(token_url)
+        assert 'oauth_token_secret' in u(rv.data)
+        assert oauth._clientgetter.call_count == 2
+        assert oauth._grantgetter.call_count == 2
+
+
+class TestMetrics(OAuthSuite):
+    def create_server(self, app):
+        app.config['OAUTH1_PROVIDER_METRICS'] = True
+        create_server(app)
+        return app
+
+    def test_full_flow(self):
+        rv = self.client.get('/login')
+        auth_url = clean_url(rv.location)
+        rv = self.client.post(auth_url, data={'confirm': 'yes'})
+        rv = self.client.get(clean_url(rv.location))
+        assert 'oauth_token_secret' in u(rv.data)
+
+        oauth = self.app.extensions['oauthlib.provider.oauth1']
+        data = oauth.metrics.snapshot()
+        for name in ('request_token', 'authorize', 'access_token'):
+            assert data['endpoint'][name]['count'] == 1
+        assert data['getter']['clientgetter']['count'] == 2
+        assert 'oauth1_getter_seconds_sum' in oauth.metrics.prometheus_text()
+
+
 auth_header = (
     u'OAuth realm="%(realm)s",'
     u'oauth_nonce="97392753692390970531372987366",'
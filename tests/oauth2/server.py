@@ -287,6 +287,11 @@ def create_server(app, oauth=None):
     def revoke_token():
         pass
 
+    @app.route('/oauth/introspect', methods=['POST'])
+    @oauth.introspect_handler
+    def introspect_token():
+        pass
+
     @app.route('/api/email')
     @oauth.require_oauth('email')
     def email_api():
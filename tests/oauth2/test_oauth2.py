@@ -1,16 +1,27 @@
 # coding: utf-8
 
 import json
+import time
 import base64
+import unittest
 from flask import Flask
+from oauthlib.common import Request
 from mock import MagicMock
+from werkzeug.contrib.cache import SimpleCache
+from flask_oauthlib.contrib.oauth2 import bind_cache_token, TokenCache
+from flask_oauthlib.provider.oauth2 import BearerRequest
+from flask_oauthlib.utils import extract_params
+from flask_oauthlib.provider.jwt_token import jwt
+from flask_oauthlib.provider.jwt_token import KeyRing, SignedTokenGenerator
 from .server import (
     create_server,
     db,
     cache_provider,
     sqlalchemy_provider,
     default_provider,
-    Token
+    Token,
+    User,
+    Client
 )
 from .client import create_client
 from .._base import BaseSuite, clean_url
@@ -190,6 +201,202 @@ class TestWebAuthSQLAlchemy(TestWebAuth):
         return sqlalchemy_provider(app)
 
 
+class TestGetterMemo(OAuthSuite):
+
+    def create_oauth_provider(self, app):
+        oauth = default_provider(app)
+        oauth._clientgetter = MagicMock(side_effect=oauth._clientgetter)
+        oauth._grantgetter = MagicMock(side_effect=oauth._grantgetter)
+        return oauth
+
+    def test_get_access_token(self):
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        rv = self.client.post(authorize_url, data={'confirm': 'yes'})
+        assert oauth._clientgetter.call_count == 1
+        assert oauth._grantgetter.call_count == 0
+
+        rv = self.client.get(clean_url(rv.location))
+        assert b'access_token' in rv.data
+        assert oauth._clientgetter.call_count == 2
+        assert oauth._grantgetter.call_count == 1
+
+
+class TestBearerRequest(OAuthSuite):
+
+    def create_oauth_provider(self, app):
+        return default_provider(app)
+
+    def verify(self, token, scopes):
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        headers = {'Authorization': 'Bearer %s' % token}
+        with self.app.test_request_context('/api?a=b', headers=headers):
+            valid, req = oauth.verify_request(scopes)
+            assert isinstance(req, BearerRequest)
+
+            full = Request(*extract_params())
+            for key in ('uri', 'http_method', 'body', 'decoded_body',
+                        'headers', '_params'):
+                assert getattr(req, key) == getattr(full, key)
+
+            full_valid, full_req = oauth.server.verify_request(
+                full.uri, full.http_method, full.body, full.headers, scopes
+            )
+        assert valid == full_valid
+        assert req.error_message == full_req.error_message
+        return valid, req
+
+    def test_verify(self):
+        tok = Token(user_id=1, client_id='dev', access_token='bearer',
+                    scope='email', expires_in=100)
+        db.session.add(tok)
+        db.session.commit()
+
+        valid, req = self.verify('bearer', ['email'])
+        assert valid
+        assert req.user.username == 'admin'
+        assert req.client.client_id == 'dev'
+        assert req.a == 'b'
+
+        assert not self.verify('bearer', ['address'])[0]
+        assert not self.verify('expired', ['email'])[0]
+        assert not self.verify('missing', ['email'])[0]
+
+
+class TestMetrics(OAuthSuite):
+
+    def create_oauth_provider(self, app):
+        app.config['OAUTH2_PROVIDER_METRICS'] = True
+        oauth = default_provider(app)
+        app.add_url_rule('/metrics', 'metrics', oauth.metrics.wsgi_app)
+        return oauth
+
+    def test_metrics(self):
+        rv = self.client.post(authorize_url, data={'confirm': 'yes'})
+        rv = self.client.get(clean_url(rv.location))
+        assert b'access_token' in rv.data
+        rv = self.client.get('/address')
+        assert rv.status_code == 401
+
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        data = oauth.metrics.snapshot()
+        endpoints = data['endpoint']
+        assert endpoints['authorize']['count'] == 1
+        assert endpoints['token']['count'] == 1
+        assert endpoints['require_oauth']['errors'] == {'401': 1}
+        getters = data['getter']
+        assert getters['grantgetter']['count'] == 1
+        assert getters['tokensetter']['count'] == 1
+        assert getters['tokengetter']['buckets'][-1][1] == 1
+
+        rv = self.client.get('/metrics')
+        assert b'oauth2_endpoint_seconds_count{name="token"} 1' in rv.data
+        assert (b'oauth2_endpoint_errors_total{name="require_oauth",'
+                b'error="401"} 1') in rv.data
+
+    def test_disabled(self):
+        app = self.create_app()
+        oauth = default_provider(app)
+        assert oauth.metrics is None
+
+
+class TestTracing(OAuthSuite):
+
+    def create_oauth_provider(self, app):
+        app.config['OAUTH2_PROVIDER_TRACING'] = True
+        return default_provider(app)
+
+    def test_trace(self):
+        url = ('/oauth/token?grant_type=password'
+               '&scope=email&username=admin&password=admin')
+        rv = self.client.get(url, headers={
+            'Authorization': 'Basic %s' % auth_code,
+        })
+        assert b'access_token' in rv.data
+        trace_id = rv.headers['X-OAuth-Trace']
+
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        trace = oauth.tracer.get(trace_id)
+        assert trace['endpoint'] == 'token'
+        assert trace['path'] == '/oauth/token'
+        root = trace['root']
+        assert root['duration'] > 0
+
+        calls = dict((span['name'], span) for span in root['children'])
+        assert calls['authenticate_client']['kind'] == 'validator'
+        children = calls['authenticate_client']['children']
+        assert children[0]['name'] == 'clientgetter'
+        assert calls['save_bearer_token']['children'][0]['name'] == \
+            'tokensetter'
+
+        access_token = json.loads(u(rv.data))['access_token']
+        rv = self.client.get('/api/email', headers={
+            'Authorization': 'Bearer %s' % access_token,
+        })
+        assert rv.status_code == 200
+        trace = oauth.tracer.traces()[0]
+        assert trace['id'] == rv.headers['X-OAuth-Trace']
+        assert trace['root']['children'][0]['name'] == 'validate_bearer_token'
+
+    def test_sample_rate(self):
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        oauth.tracer.sample_rate = 0
+        rv = self.client.get('/api/email')
+        assert 'X-OAuth-Trace' not in rv.headers
+        assert oauth.tracer.traces() == []
+
+
+class TestRateLimit(OAuthSuite):
+
+    def create_oauth_provider(self, app):
+        app.config['OAUTH2_PROVIDER_RATE_LIMITS'] = {
+            'token': {'client': '2/minute'},
+            'require_oauth': {'user': '1/minute'},
+        }
+        app.config['OAUTH2_PROVIDER_CLIENT_RATE_LIMITS'] = {
+            'dev': {'token': '3/minute'},
+        }
+        return default_provider(app)
+
+    def get_token(self, auth):
+        url = ('/oauth/token?grant_type=password'
+               '&scope=email&username=admin&password=admin')
+        return self.client.get(url, headers={
+            'Authorization': 'Basic %s' % auth,
+        })
+
+    def test_token(self):
+        for i in range(2):
+            assert self.get_token(auth_code).status_code == 200
+        rv = self.get_token(auth_code)
+        assert rv.status_code == 429
+        assert b'rate_limit_exceeded' in rv.data
+        assert 0 < int(rv.headers['Retry-After']) <= 30
+
+        # overridden
+        auth = _base64('dev:dev')
+        for i in range(3):
+            assert self.get_token(auth).status_code != 429
+        assert self.get_token(auth).status_code == 429
+
+    def test_unauthenticated(self):
+        # a caller without the secret does not drain the bucket
+        auth = _base64('confidential:wrong')
+        for i in range(3):
+            assert self.get_token(auth).status_code == 401
+        for i in range(2):
+            assert self.get_token(auth_code).status_code == 200
+
+    def test_require_oauth(self):
+        rv = self.get_token(auth_code)
+        access_token = json.loads(u(rv.data))['access_token']
+        headers = {'Authorization': 'Bearer %s' % access_token}
+        assert self.client.get('/api/email', headers=headers).status_code \
+            == 200
+        rv = self.client.get('/api/email', headers=headers)
+        assert rv.status_code == 429
+        assert int(rv.headers['Retry-After']) == 60
+
+
 class TestPasswordAuth(OAuthSuite):
 
     def create_oauth_provider(self, app):
@@ -337,6 +544,327 @@ class TestRevokeTokenSQLAlchemy(TestRefreshToken):
         return sqlalchemy_provider(app)
 
 
+class TestIntrospectToken(TestRevokeToken):
+
+    def introspect(self, auth=auth_code, **data):
+        return self.client.post('/oauth/introspect', data=data, headers={
+            'Authorization': 'Basic %s' % auth,
+        })
+
+    def test_introspect(self):
+        data = self.get_token()
+        rv = self.introspect(token=data['access_token'])
+        assert rv.status_code == 200
+        claims = json.loads(u(rv.data))
+        assert claims['active'] is True
+        assert claims['client_id'] == 'confidential'
+        assert claims['scope'] == 'email address'
+        assert claims['username'] == 'admin'
+        assert claims['exp'] > time.time()
+        max_age = int(rv.headers['Cache-Control'].split('=')[1])
+        assert 0 < max_age <= 60
+
+        rv = self.introspect(token=data['refresh_token'])
+        claims = json.loads(u(rv.data))
+        assert claims['token_type'] == 'refresh_token'
+
+        rv = self.introspect(token='invalid')
+        assert json.loads(u(rv.data)) == {'active': False}
+        assert rv.headers['Cache-Control'] == 'no-store'
+
+    def test_introspect_batch(self):
+        first = self.get_token()
+        second = self.get_token()
+        rv = self.introspect(tokens=[
+            first['access_token'], 'invalid', second['access_token'],
+        ])
+        tokens = json.loads(u(rv.data))['tokens']
+        assert [t['active'] for t in tokens] == [True, False, True]
+        assert 'max-age' in rv.headers['Cache-Control']
+
+    def test_introspect_unauthorized(self):
+        data = self.get_token()
+        rv = self.introspect(
+            auth=_base64('confidential:wrong'), token=data['access_token'])
+        assert rv.status_code == 401
+        rv = self.introspect()
+        assert rv.status_code == 400
+
+
+class TestTokenCache(TestRevokeToken):
+
+    def create_oauth_provider(self, app):
+        oauth = default_provider(app)
+        oauth._tokengetter = MagicMock(side_effect=oauth._tokengetter)
+        oauth._clientgetter = MagicMock(side_effect=oauth._clientgetter)
+        bind_cache_token(app, oauth)
+        return oauth
+
+    def get_email(self, data):
+        return self.client.get('/api/email', headers={
+            'Authorization': 'Bearer %s' % data['access_token'],
+        })
+
+    def test_cached(self):
+        data = self.get_token()
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        clientgetter = oauth._clientgetter
+        calls = clientgetter.call_count
+        for i in range(3):
+            rv = self.get_email(data)
+            assert b'username' in rv.data
+        assert oauth._tokengetter.call_count == 1
+        # the client is cached along
+        assert clientgetter.call_count == calls
+
+    def test_revoke_cached(self):
+        data = self.get_token()
+        rv = self.get_email(data)
+        assert b'username' in rv.data
+
+        self.client.post('/oauth/revoke', data={
+            'token': data['access_token'],
+        }, headers={
+            'Authorization': 'Basic %s' % auth_code,
+        })
+        rv = self.get_email(data)
+        assert rv.status_code == 401
+
+    def test_reissue_cached(self):
+        data = self.get_token()
+        rv = self.get_email(data)
+        assert b'username' in rv.data
+
+        Token.query.filter_by(access_token=data['access_token']).delete()
+        self.get_token()
+        rv = self.get_email(data)
+        assert rv.status_code == 401
+
+
+class TestSignedToken(TestRevokeToken):
+
+    def setUp(self):
+        if jwt is None:
+            raise unittest.SkipTest('PyJWT is not installed')
+        super(TestSignedToken, self).setUp()
+
+    def create_oauth_provider(self, app):
+        self.keyring = KeyRing()
+        self.keyring.add('k1', 'secret')
+        self.userloader = MagicMock(side_effect=lambda id: User.query.get(id))
+        app.config['OAUTH2_PROVIDER_TOKEN_GENERATOR'] = SignedTokenGenerator(
+            self.keyring, userloader=self.userloader
+        )
+        oauth = default_provider(app)
+        oauth._tokengetter = MagicMock(side_effect=oauth._tokengetter)
+        oauth._clientgetter = MagicMock(side_effect=oauth._clientgetter)
+        return oauth
+
+    def get_email(self, data):
+        return self.client.get('/api/email', headers={
+            'Authorization': 'Bearer %s' % data['access_token'],
+        })
+
+    def test_verify(self):
+        data = self.get_token()
+        assert data['access_token'].count('.') == 2
+        assert data['refresh_token'].count('.') == 0
+        claims = self.keyring.verify(data['access_token'])
+        assert claims['sub'] == '1'
+
+        rv = self.get_email(data)
+        assert b'admin' in rv.data
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        assert oauth._tokengetter.call_count == 0
+
+        data['access_token'] += 'a'
+        rv = self.get_email(data)
+        assert rv.status_code == 401
+
+    def test_lazy_lookups(self):
+        data = self.get_token()
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        oauth._clientgetter.reset_mock()
+        self.userloader.reset_mock()
+        headers = {'Authorization': 'Bearer %s' % data['access_token']}
+
+        rv = self.client.get('/api/method', headers=headers)
+        assert b'GET' in rv.data
+        assert oauth._clientgetter.call_count == 0
+        assert self.userloader.call_count == 0
+
+        rv = self.client.get('/api/client', headers=headers)
+        assert b'confidential' in rv.data
+        assert oauth._clientgetter.call_count == 1
+        assert self.userloader.call_count == 0
+
+        assert b'admin' in self.get_email(data).data
+        assert self.userloader.call_count == 1
+
+    def test_rotate(self):
+        data = self.get_token()
+        self.keyring.add('k2', 'another secret')
+        new_data = self.get_token()
+        assert b'admin' in self.get_email(data).data
+        assert b'admin' in self.get_email(new_data).data
+
+        self.keyring.remove('k1')
+        assert self.get_email(data).status_code == 401
+        assert b'admin' in self.get_email(new_data).data
+
+
+class TestKeyRing(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            from cryptography.hazmat.backends import default_backend
+            from cryptography.hazmat.primitives.asymmetric import ec, rsa
+        except ImportError:
+            raise unittest.SkipTest('cryptography is not installed')
+        if jwt is None:
+            raise unittest.SkipTest('PyJWT is not installed')
+        backend = default_backend()
+        self.rsa_key = rsa.generate_private_key(65537, 2048, backend)
+        self.ec_key = ec.generate_private_key(ec.SECP256R1(), backend)
+
+    def test_asymmetric(self):
+        keyring = KeyRing()
+        keyring.add('rsa', self.rsa_key, 'RS256')
+        rsa_token = keyring.sign({'exp': time.time() + 60})
+        keyring.add('ec', self.ec_key, 'ES256')
+        ec_token = keyring.sign({'exp': time.time() + 60})
+        assert keyring.verify(rsa_token)
+        assert keyring.verify(ec_token)
+
+        # a verifying-only key
+        verifier = KeyRing()
+        verifier.add('rsa', None, 'RS256',
+                     public_key=self.rsa_key.public_key())
+        assert verifier.current is None
+        assert verifier.verify(rsa_token)
+        assert verifier.verify(ec_token) is None
+
+    def test_expired(self):
+        keyring = KeyRing()
+        keyring.add('k1', 'secret')
+        assert keyring.verify(keyring.sign({'exp': time.time() - 60})) is None
+        assert keyring.verify(keyring.sign({'sub': '1'})) is None
+        assert keyring.verify('foo') is None
+
+
+class TestRevokeAll(TestRevokeToken):
+
+    def create_oauth_provider(self, app):
+        oauth = sqlalchemy_provider(app)
+        bind_cache_token(app, oauth)
+        return oauth
+
+    get_email = TestTokenCache.__dict__['get_email']
+
+    def test_revoke_all(self):
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        data = self.get_token()
+        assert b'username' in self.get_email(data).data
+
+        with self.app.test_request_context():
+            user = User.query.filter_by(username='admin').first()
+            # with the expired token of prepare_app
+            assert oauth.revoke_all(user=user) == 2
+        assert Token.query.filter_by(user_id=user.id).count() == 0
+        assert self.get_email(data).status_code == 401
+
+    def test_revoke_all_by_client(self):
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        data = self.get_token()
+        assert b'username' in self.get_email(data).data
+
+        with self.app.test_request_context():
+            client = Client.query.filter_by(client_id='dev').first()
+            assert oauth.revoke_all(client=client) == 1
+            assert b'username' in self.get_email(data).data
+            client = Client.query.filter_by(client_id='confidential').first()
+            assert oauth.revoke_all(client=client) == 1
+        assert self.get_email(data).status_code == 401
+
+    def test_revoke_nothing(self):
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        self.assertRaises(ValueError, oauth.revoke_all)
+
+
+class TestSharedTokenCache(object):
+
+    def create_token(self, **kwargs):
+        tok = Token(
+            client_id='dev', user_id=1, access_token='foo', scope='email',
+            expires_in=kwargs.pop('expires_in', 3600),
+        )
+        tok.user = User(id=1, username='foo')
+        return tok
+
+    def test_shared(self):
+        cache = SimpleCache()
+        a = TokenCache(cache, userloader=lambda id: id)
+        b = TokenCache(cache, userloader=lambda id: id)
+        tok = self.create_token()
+        a.set(tok)
+
+        cached = b.get('foo')
+        assert cached.user == 1
+        assert cached.client_id == 'dev'
+        assert cached.scopes == ['email']
+
+        b.invalidate('dev', tok.user)
+        assert a.get('foo') is None
+        assert b.get('foo') is None
+
+    def test_generation_timeout(self):
+        timeouts = []
+
+        class RecordingCache(SimpleCache):
+            def set(self, key, value, timeout=None):
+                if key.startswith('oauth2_token_gen:'):
+                    timeouts.append(timeout)
+                return SimpleCache.set(self, key, value, timeout)
+
+        cache = TokenCache(RecordingCache(), timeout=60,
+                           userloader=lambda id: id)
+        cache.invalidate('dev', User(id=1))
+        cache.purge(client_id='dev')
+        cache.purge(user_id=1)
+        assert timeouts == [60, 60, 60]
+
+    def test_purge(self):
+        cache = SimpleCache()
+        a = TokenCache(cache, userloader=lambda id: id)
+        b = TokenCache(cache, userloader=lambda id: id)
+        a.set(self.create_token())
+        b.purge(client_id='other')
+        assert a.get('foo') is not None
+        b.purge(user_id=1)
+        assert a.get('foo') is None
+
+        local = TokenCache()
+        local.set(self.create_token())
+        local.purge(client_id='dev')
+        assert local.get('foo') is None
+
+    def test_expires(self):
+        cache = TokenCache(timeout=60)
+        cache.set(self.create_token(expires_in=-10))
+        assert cache.get('foo') is None
+
+        cache.set(self.create_token(expires_in=10))
+        assert cache.get('foo').user.username == 'foo'
+        assert cache._local.get('foo')['deadline'] <= time.time() + 10
+
+    def test_userloader_required(self):
+        try:
+            TokenCache(SimpleCache())
+            assert False
+        except RuntimeError:
+            pass
+
+
 class TestCredentialAuth(OAuthSuite):
 
     def create_oauth_provider(self, app):
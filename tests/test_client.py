@@ -73,6 +73,59 @@ def test_raise_app():
     assert client.demo.name == 'dev'
 
 
+def test_lazy_remote_app():
+    oauth = OAuth(lazy_cache_size=2)
+    oauth.lazy_remote_app(
+        'dev', consumer_key='dev', consumer_secret='dev',
+        base_url='http://localhost/dev/')
+
+    loaded = []
+
+    @oauth.remote_app_loader
+    def load(name):
+        loaded.append(name)
+        if name.startswith('tenant'):
+            return dict(consumer_key=name, consumer_secret=name)
+
+    dev = oauth.dev
+    assert dev.base_url == 'http://localhost/dev/'
+    assert oauth['dev'] is dev
+    assert 'dev' not in oauth.remote_apps
+
+    assert oauth.tenant1.consumer_key == 'tenant1'
+    assert oauth['tenant1'] is oauth.tenant1
+    assert loaded == ['tenant1']
+
+    # evicts the least recently used one
+    oauth.tenant2
+    oauth.tenant3
+    assert oauth['tenant1'] is not None
+    assert loaded == ['tenant1', 'tenant2', 'tenant3', 'tenant1']
+    # nothing is kept for the evicted apps without a tokengetter
+    assert oauth._lazy_registrations == {}
+
+    # the tokengetter outlives the eviction
+    @oauth.tenant1.tokengetter
+    def get_token():
+        return 'token', 'secret'
+
+    oauth.tenant2
+    oauth.tenant3
+    assert oauth.tenant1._tokengetter is get_token
+    assert list(oauth._lazy_registrations) == ['tenant1']
+
+    try:
+        oauth['unknown']
+        assert False
+    except KeyError:
+        pass
+    try:
+        oauth.unknown
+        assert False
+    except AttributeError:
+        pass
+
+
 class TestOAuthRemoteApp(object):
     @raises(TypeError)
     def test_raise_init(self):
@@ -0,0 +1,141 @@
+import os
+import sys
+import unittest
+
+from flask import Flask, session
+from mock import patch
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+class OAuthServerProtocol(asyncio.Protocol if asyncio else object):
+    """A stand-in OAuth server which answers with pre-defined responses."""
+
+    def __init__(self, routes, received):
+        self.routes = routes
+        self.received = received
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while b'\r\n\r\n' in self.buffer:
+            head, _, rest = self.buffer.partition(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            method, path, _ = lines[0].split(' ')
+            headers = dict(line.split(': ', 1) for line in lines[1:])
+            length = int(headers.get('Content-Length', 0))
+            if len(rest) < length:
+                return
+            self.buffer = rest[length:]
+            self.received.append((method, path, headers, rest[:length]))
+            content_type, body = self.routes[path.split('?')[0]]
+            self.transport.write((
+                'HTTP/1.1 200 OK\r\nContent-Type: %s\r\n'
+                'Content-Length: %d\r\n\r\n%s' % (
+                    content_type, len(body), body)).encode('latin-1'))
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'requires Python 3.5')
+class AsyncApplicationSuite(unittest.TestCase):
+
+    routes = {
+        '/oauth2/token': (
+            'application/json',
+            '{"access_token": "a", "token_type": "Bearer",'
+            ' "scope": "email"}'),
+        '/oauth1/request_token': (
+            'application/x-www-form-urlencoded',
+            'oauth_token=rt&oauth_token_secret=rts'),
+        '/oauth1/access_token': (
+            'application/x-www-form-urlencoded',
+            'oauth_token=at&oauth_token_secret=ats'),
+        '/api/user': ('application/json', '{"name": "flask"}'),
+    }
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.received = []
+        self.server = self.loop.run_until_complete(self.loop.create_server(
+            lambda: OAuthServerProtocol(self.routes, self.received),
+            '127.0.0.1', 0))
+        self.base_url = 'http://127.0.0.1:%d' % (
+            self.server.sockets[0].getsockname()[1])
+
+        self.app = Flask(__name__)
+        self.app.testing = True
+        self.app.secret_key = 'testing'
+        self.clients = {}
+
+    def tearDown(self):
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_oauth2(self):
+        from flask_oauthlib.contrib.client.aio import AsyncOAuth2Application
+        remote = AsyncOAuth2Application(
+            'dev', clients=self.clients, client_id='dev',
+            client_secret='dev', scope=['email'],
+            endpoint_url=self.base_url + '/api/',
+            access_token_url=self.base_url + '/oauth2/token',
+            authorization_url=self.base_url + '/oauth2/authorize')
+
+        with patch.dict(os.environ, {'OAUTHLIB_INSECURE_TRANSPORT': '1'}):
+            with self.app.test_request_context('/login'):
+                rv = self.run_async(remote.authorize('http://localhost/cb'))
+                assert rv.location.startswith(self.base_url)
+                stored = dict(session)
+
+        state = stored['_oauth_dev_state']
+        url = '/cb?code=foo&state=%s' % state
+        with self.app.test_request_context(url):
+            session.update(stored)
+            token = self.run_async(remote.authorized_response())
+        assert token.access_token == 'a'
+        method, path, headers, body = self.received[-1]
+        assert (method, path) == ('POST', '/oauth2/token')
+        assert b'code=foo' in body
+
+        with patch.dict(os.environ, {'OAUTHLIB_INSECURE_TRANSPORT': '1'}):
+            with self.app.test_request_context():
+                rv = self.run_async(remote.get('user', token=token))
+                assert rv.json() == {'name': 'flask'}
+                rv = self.run_async(remote.get('user', token=token))
+        assert self.received[-1][2]['Authorization'] == 'Bearer a'
+        assert len(self.clients) == 1
+
+    def test_oauth1(self):
+        from flask_oauthlib.contrib.client.aio import AsyncOAuth1Application
+        remote = AsyncOAuth1Application(
+            'dev', clients=self.clients, consumer_key='dev',
+            consumer_secret='dev', endpoint_url=self.base_url + '/api/',
+            request_token_url=self.base_url + '/oauth1/request_token',
+            access_token_url=self.base_url + '/oauth1/access_token',
+            authorization_url=self.base_url + '/oauth1/authorize')
+
+        with self.app.test_request_context('/login'):
+            rv = self.run_async(remote.authorize('http://localhost/cb'))
+            assert 'oauth_token=rt' in rv.location
+            stored = dict(session)
+
+        with self.app.test_request_context('/cb?oauth_verifier=v'):
+            session.update(stored)
+            token = self.run_async(remote.authorized_response())
+        assert token.token == 'at'
+        headers = self.received[-1][2]
+        assert 'oauth_verifier="v"' in headers['Authorization']
+
+        with self.app.test_request_context():
+            rv = self.run_async(remote.post('user', token=token.token and (
+                token.token, token.token_secret), data={'a': 'b'}))
+        assert rv.json() == {'name': 'flask'}
+        assert 'oauth_token="at"' in self.received[-1][2]['Authorization']
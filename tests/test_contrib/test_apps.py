@@ -49,3 +49,12 @@ class RemoteAppFactorySuite(unittest.TestCase):
             'state': 'RandomString',
             'scope': 'c,d',
         }, c2.request_token_params
+
+    def test_lazy(self):
+        assert douban.register_to(self.oauth, 'lazy', lazy=True) is None
+        assert 'lazy' not in self.oauth.remote_apps
+        c1 = self.oauth.lazy
+        assert c1.name == 'lazy'
+        assert c1.app_key == 'LAZY'
+        assert c1.request_token_params.get('scope') == 'douban_basic_common'
+        assert self.oauth['lazy'] is c1
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from flask_oauthlib.contrib.cache import Cache
+
+
+class FakePipeline(object):
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append(('get', key))
+
+    def delete(self, key):
+        self.commands.append(('delete', key))
+
+    def execute(self):
+        self.client.round_trips += 1
+        rv = []
+        for name, key in self.commands:
+            if name == 'get':
+                rv.append(self.client.data.get(key))
+            else:
+                rv.append(int(self.client.data.pop(key, None) is not None))
+        return rv
+
+
+class FakeRedis(object):
+    """A stand-in of the redis client, counting the round trips."""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def get(self, name):
+        self.round_trips += 1
+        return self.data.get(name)
+
+    def set(self, name, value):
+        self.round_trips += 1
+        self.data[name] = value
+        return True
+
+    def setex(self, name, value, time):
+        return self.set(name, value)
+
+    def delete(self, *names):
+        self.round_trips += 1
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class CacheSuite(unittest.TestCase):
+
+    def create_cache(self, **config):
+        app = Flask(__name__)
+        app.config.update(config)
+        return Cache(app, 'OAUTH2')
+
+    def test_consume(self):
+        cache = self.create_cache(OAUTH2_CACHE_TYPE='simple')
+        cache.set('foo', 'bar')
+        assert cache.consume('foo') == 'bar'
+        assert cache.consume('foo') is None
+        assert cache.get('foo') is None
+
+    def test_consume_redis(self):
+        client = FakeRedis()
+        cache = self.create_cache(
+            OAUTH2_CACHE_TYPE='redis',
+            OAUTH2_CACHE_REDIS_HOST=client,
+            OAUTH2_CACHE_KEY_PREFIX='p:',
+        )
+        cache.set('foo', {'code': 'bar'})
+        client.round_trips = 0
+        assert cache.consume('foo') == {'code': 'bar'}
+        assert client.round_trips == 1
+        assert cache.consume('foo') is None
+        assert 'p:foo' not in client.data
+
+    def test_consume_mmap(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            cache = self.create_cache(
+                OAUTH2_CACHE_TYPE='mmap',
+                OAUTH2_CACHE_MMAP_PATH=os.path.join(tmp, 'cache'),
+                OAUTH2_CACHE_MMAP_SLOTS=64,
+            )
+            cache.set('foo', 'bar')
+            assert cache.consume('foo') == 'bar'
+            assert cache.consume('foo') is None
+        finally:
+            shutil.rmtree(tmp)
@@ -0,0 +1,136 @@
+import os
+import unittest
+
+from flask import Flask
+from mock import patch, MagicMock
+from oauthlib.oauth2 import InsecureTransportError
+from flask_oauthlib.contrib.client import OAuth
+from flask_oauthlib.contrib.client.session import OAuth2Session
+
+
+class OAuth2ApplicationSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.testing = True
+        self.app.secret_key = 'testing'
+        self.oauth = OAuth(self.app)
+        self.remote = self.oauth.remote_app(
+            'dev', client_id='dev', client_secret='dev',
+            access_token_url='http://localhost/oauth/token',
+            authorization_url='http://localhost/oauth/authorize',
+            compliance_fixes='.facebook_compliance_fix')
+
+    def fake_token_response(self, *args, **kwargs):
+        assert 'OAUTHLIB_INSECURE_TRANSPORT' not in os.environ
+        response = MagicMock()
+        response.headers = {'content-type': 'application/json'}
+        response.text = '{"access_token": "a", "token_type": "Bearer"}'
+        return response
+
+    @patch('requests.Session.request')
+    def test_insecure_transport(self, request):
+        request.side_effect = self.fake_token_response
+        url = '/authorized?code=foo&state=bar'
+        with patch.dict(os.environ, clear=True):
+            with self.app.test_request_context(url):
+                self.remote._session_state = 'bar'
+                self.remote._session_redirect_url = 'http://localhost/'
+                assert self.remote.insecure_transport
+                token = self.remote.authorized_response()
+            assert 'OAUTHLIB_INSECURE_TRANSPORT' not in os.environ
+        assert token.access_token == 'a'
+        args, kwargs = request.call_args
+        assert 'http://localhost/oauth/token' in args
+        assert kwargs['data']['code'] == 'foo'
+
+    @patch.dict(os.environ, clear=True)
+    @patch('requests.Session.request')
+    def test_insecure_fetch_token(self, request):
+        request.side_effect = self.fake_token_response
+        session = OAuth2Session('dev', insecure_transport=True)
+        token = session.fetch_token(
+            'http://localhost/oauth/token', code='foo', auth=('dev', 'dev'),
+            timeout=5, verify=False, headers={'X-Foo': 'bar'},
+            method='GET', extra='x',
+        )
+        assert token['access_token'] == 'a'
+        args, kwargs = request.call_args
+        assert args[0] == 'GET'
+        assert kwargs['auth'] == ('dev', 'dev')
+        assert kwargs['timeout'] == 5
+        assert kwargs['verify'] is False
+        assert kwargs['headers'] == {'X-Foo': 'bar'}
+        assert kwargs['params']['extra'] == 'x'
+
+        session = OAuth2Session('dev')
+        self.assertRaises(InsecureTransportError, session.fetch_token,
+                          'http://localhost/oauth/token', code='foo')
+
+    @patch.dict(os.environ, clear=True)
+    @patch('requests.Session.request')
+    def test_plain_session_unaffected(self, request):
+        import requests_oauthlib
+        from oauthlib.oauth2.rfc6749 import utils
+
+        request.side_effect = self.fake_token_response
+        plain = requests_oauthlib.OAuth2Session('dev')
+        errors = []
+
+        def hook(response):
+            # a plain session used during the exchange is still checked
+            try:
+                plain.get('http://localhost/api')
+            except InsecureTransportError as e:
+                errors.append(e)
+            return response
+
+        session = OAuth2Session('dev', insecure_transport=True)
+        session.register_compliance_hook('access_token_response', hook)
+        session.fetch_token('http://localhost/oauth/token', code='foo')
+        assert len(errors) == 1
+        assert requests_oauthlib.oauth2_session.is_secure_transport is \
+            utils.is_secure_transport
+
+        self.assertRaises(InsecureTransportError, plain.fetch_token,
+                          'http://localhost/oauth/token', code='foo')
+        self.assertRaises(InsecureTransportError, plain.get,
+                          'http://localhost/api')
+        # the insecure session only exchanges the token over plain HTTP
+        self.assertRaises(InsecureTransportError, session.get,
+                          'http://localhost/api')
+        assert request.call_count == 1
+
+    def test_missing_code(self):
+        with self.app.test_request_context('/authorized?error=denied'):
+            assert self.remote.authorized_response() is None
+
+    def test_compliance_fixes_pipeline(self):
+        calls = []
+
+        def fix_a(session):
+            calls.append('a')
+            return session
+
+        def fix_b(session):
+            calls.append('b')
+            return session
+
+        with self.app.test_request_context():
+            self.remote.compliance_fixes = None
+            self.remote.make_oauth_session()
+            assert calls == []
+
+            self.remote.compliance_fixes = [fix_a, fix_b]
+            self.remote.make_oauth_session()
+            assert calls == ['a', 'b']
+
+            self.remote.compliance_fixes = '.facebook_compliance_fix'
+            with patch('flask_oauthlib.contrib.client.application'
+                       '.import_string') as import_string:
+                import_string.return_value = fix_a
+                self.remote.make_oauth_session()
+                self.remote.make_oauth_session()
+            import_string.assert_called_once_with(
+                'requests_oauthlib.compliance_fixes.facebook_compliance_fix')
+            assert calls == ['a', 'b', 'a', 'a']
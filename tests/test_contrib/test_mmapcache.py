@@ -0,0 +1,103 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+
+from flask import Flask
+from flask_oauthlib.contrib.cache import Cache
+from flask_oauthlib.contrib.mmapcache import MmapCache
+
+
+def _incr(path, count):
+    cache = MmapCache(path, slots=64)
+    for _ in range(count):
+        cache.inc('counter')
+
+
+class MmapCacheSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache')
+        self.cache = MmapCache(self.path, slots=64)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_cache(self):
+        cache = self.cache
+        assert cache.get('foo') is None
+        assert cache.set('foo', {'a': 1})
+        assert cache.get('foo') == {'a': 1}
+        assert cache.has('foo')
+        assert not cache.add('foo', 'bar')
+        assert cache.add('bar', 'bar')
+        assert cache.get_many('foo', 'bar', 'baz') == [{'a': 1}, 'bar', None]
+        assert cache.delete('foo')
+        assert not cache.delete('foo')
+        assert cache.get('foo') is None
+        assert cache.inc('n') == 1
+        assert cache.inc('n', 2) == 3
+        assert cache.dec('n') == 2
+        cache.clear()
+        assert cache.get('bar') is None
+
+    def test_expires(self):
+        self.cache.set('foo', 'bar', timeout=1)
+        self.cache.set('forever', 'bar', timeout=0)
+        assert self.cache.get('foo') == 'bar'
+        time.sleep(1.1)
+        assert self.cache.get('foo') is None
+        assert self.cache.add('foo', 'baz')
+        assert self.cache.get('forever') == 'bar'
+
+    def test_full_bucket(self):
+        cache = MmapCache(os.path.join(self.dir, 'small'), slots=4)
+        cache.set('forever', 0, timeout=0)
+        for i in range(1, 10):
+            cache.set('key%d' % i, i, timeout=i)
+        assert cache.get('forever') == 0
+        assert cache.get('key9') == 9
+        assert cache.get('key1') is None
+        # too large for a slot
+        assert not cache.set('big', 'x' * 1024)
+        assert cache.get('big') is None
+
+    def test_shared(self):
+        self.cache.set('foo', 'bar')
+        other = MmapCache(self.path, slots=64)
+        assert other.get('foo') == 'bar'
+        other.delete('foo')
+        assert self.cache.get('foo') is None
+
+        # the file of another layout is kept for the processes mapping it
+        self.cache.set('foo', 'bar')
+        self.assertRaises(ValueError, MmapCache, self.path, slots=128)
+        self.assertRaises(ValueError, MmapCache, self.path, slot_size=256)
+        assert self.cache.get('foo') == 'bar'
+        assert os.path.getsize(self.path) == self.cache._size
+
+    def test_processes(self):
+        workers = [
+            multiprocessing.Process(target=_incr, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+        assert self.cache.get('counter') == 200
+
+    def test_cache_type(self):
+        app = Flask(__name__)
+        app.config.update({
+            'OAUTH2_CACHE_TYPE': 'mmap',
+            'OAUTH2_CACHE_MMAP_PATH': self.path,
+            'OAUTH2_CACHE_MMAP_SLOTS': 64,
+        })
+        cache = Cache(app, 'OAUTH2')
+        assert isinstance(cache.cache, MmapCache)
+        self.cache.set('foo', 'bar')
+        assert cache.get('foo') == 'bar'
@@ -0,0 +1,45 @@
+import unittest
+
+from flask import Flask, session
+from werkzeug.contrib.cache import SimpleCache
+from flask_oauthlib.contrib.client import OAuth
+from flask_oauthlib.contrib.state import CacheStateStore
+
+
+class CacheStateStoreSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.secret_key = 'testing'
+        self.cache = SimpleCache()
+        self.store = CacheStateStore(self.cache, timeout=60)
+
+    def test_store(self):
+        with self.app.test_request_context():
+            assert self.store.get('foo') is None
+            assert self.store.pop('foo', 'bar') == 'bar'
+            assert '_oauth_state' not in session
+
+            self.store['foo'] = ('token', 'secret')
+            self.store['bar'] = 'state'
+            assert list(session.keys()) == ['_oauth_state']
+            assert self.store.get('foo') == ('token', 'secret')
+
+            assert self.store.pop('foo') == ('token', 'secret')
+            assert self.store.get('foo') is None
+            assert self.store.get('bar') == 'state'
+
+    def test_contrib_client(self):
+        oauth = OAuth(self.app, state_store=self.store)
+        remote = oauth.remote_app(
+            'dev', client_id='dev', client_secret='dev',
+            access_token_url='https://localhost/oauth/token',
+            authorization_url='https://localhost/oauth/authorize')
+
+        with self.app.test_request_context():
+            rv = remote.authorize('https://localhost/authorized')
+            assert 'state=' in rv.location
+            assert list(session.keys()) == ['_oauth_state']
+            assert remote._session_state in rv.location
+            del remote._session_state
+            assert remote._session_state is None
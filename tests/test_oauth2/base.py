@@ -10,6 +10,7 @@ from sqlalchemy.orm import relationship
 from flask_oauthlib.provider import OAuth2Provider
 from flask_oauthlib.contrib.oauth2 import bind_sqlalchemy
 from flask_oauthlib.contrib.oauth2 import bind_cache_grant
+from flask_oauthlib.contrib.oauth2 import bind_stateless_grant
 
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = 'true'
 
@@ -147,6 +148,20 @@ def cache_provider(app):
     return oauth
 
 
+def stateless_provider(app):
+    oauth = OAuth2Provider(app)
+
+    bind_sqlalchemy(oauth, db.session, user=User,
+                    token=Token, client=Client, current_user=current_user)
+
+    app.config.update({
+        'OAUTH2_GRANT_KEYS': ['8J1TPVf1tsx-mVNOzwNz4Hx3XIm7zNPQQp5rqOVhDcA='],
+    })
+    bind_stateless_grant(app, oauth, current_user,
+                         lambda id: User.query.get(id))
+    return oauth
+
+
 def sqlalchemy_provider(app):
     oauth = OAuth2Provider(app)
 
@@ -1,9 +1,12 @@
 # coding: utf-8
 
 from datetime import datetime, timedelta
+from mock import patch
+from flask_oauthlib.provider import OAuth2RequestValidator
 from .base import TestCase
 from .base import create_server, sqlalchemy_provider, cache_provider
-from .base import db, Client, User, Grant
+from .base import stateless_provider
+from .base import db, Client, User, Grant, Token
 
 
 class TestDefaultProvider(TestCase):
@@ -120,3 +123,75 @@ class TestCacheProvider(TestDefaultProvider):
         url += '&client_secret=' + self.oauth_client.client_secret
         rv = self.client.get(url)
         assert b'access_token' in rv.data
+
+    def test_replay_code(self):
+        url = self.authorize_url + '&scope=email'
+        rv = self.client.post(url, data={'confirm': 'yes'})
+        code = rv.location.split('code=')[1]
+
+        url = (
+            '/oauth/token?grant_type=authorization_code'
+            '&code=%s&client_id=%s&client_secret=%s'
+        ) % (code, self.oauth_client.client_id,
+             self.oauth_client.client_secret)
+        rv = self.client.get(url)
+        assert b'access_token' in rv.data
+        rv = self.client.get(url)
+        assert b'invalid_grant' in rv.data
+
+    def test_concurrent_code(self):
+        url = self.authorize_url + '&scope=email'
+        rv = self.client.post(url, data={'confirm': 'yes'})
+        code = rv.location.split('code=')[1]
+
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        grant = oauth._grantgetter(self.oauth_client.client_id, code)
+        assert grant.code == code
+        # the getter does not delete the grant
+        assert oauth._grantgetter(self.oauth_client.client_id, code)
+
+        save_bearer_token = OAuth2RequestValidator.save_bearer_token
+
+        def save(validator, token, request, *args, **kwargs):
+            # another request exchanges the code after it is validated
+            assert grant.delete() is True
+            return save_bearer_token(
+                validator, token, request, *args, **kwargs)
+
+        url = (
+            '/oauth/token?grant_type=authorization_code'
+            '&code=%s&client_id=%s&client_secret=%s'
+        ) % (code, self.oauth_client.client_id,
+             self.oauth_client.client_secret)
+        with patch.object(OAuth2RequestValidator, 'save_bearer_token', save):
+            rv = self.client.get(url)
+        assert b'invalid_grant' in rv.data
+        assert Token.query.count() == 0
+
+
+class TestStatelessProvider(TestCacheProvider):
+    def create_server(self):
+        create_server(self.app, stateless_provider(self.app))
+
+    def test_invalid_code(self):
+        url = self.authorize_url + '&scope=email'
+        rv = self.client.post(url, data={'confirm': 'yes'})
+        code = rv.location.split('code=')[1]
+
+        url = (
+            '/oauth/token?grant_type=authorization_code'
+            '&code=%s&client_id=%s&client_secret=%s'
+        ) % (code[:-8] + 'A' * 8, self.oauth_client.client_id,
+             self.oauth_client.client_secret)
+        rv = self.client.get(url)
+        assert b'invalid_grant' in rv.data
+
+    def test_concurrent_code(self):
+        url = self.authorize_url + '&scope=email'
+        rv = self.client.post(url, data={'confirm': 'yes'})
+        code = rv.location.split('code=')[1]
+
+        # the code is used up once it is read
+        oauth = self.app.extensions['oauthlib.provider.oauth2']
+        assert oauth._grantgetter(self.oauth_client.client_id, code)
+        assert oauth._grantgetter(self.oauth_client.client_id, code) is None
@@ -1,8 +1,15 @@
 # coding: utf-8
 
+from flask import json
+from sqlalchemy import event
 from .base import TestCase
 from .base import create_server, sqlalchemy_provider, cache_provider
-from .base import db, Client, User
+from .base import default_provider
+from .base import db, Client, User, Token, Grant, current_user
+from flask_oauthlib.provider import OAuth2Provider
+from flask_oauthlib.provider.oauth2 import OAuth2RequestValidator
+from flask_oauthlib.utils import ScopeRegistry
+from flask_oauthlib.contrib.oauth2 import bind_sqlalchemy
 
 
 class TestDefaultProvider(TestCase):
@@ -90,6 +97,110 @@ class TestSQLAlchemyProvider(TestDefaultProvider):
     def create_server(self):
         create_server(self.app, sqlalchemy_provider(self.app))
 
+    def get_token(self):
+        rv = self.client.post('/oauth/token', data={
+            'grant_type': 'password',
+            'username': 'foo',
+            'password': 'right',
+            'client_id': self.oauth_client.client_id,
+            'client_secret': self.oauth_client.client_secret,
+        })
+        assert b'access_token' in rv.data
+        return json.loads(rv.data.decode('utf-8'))['access_token']
+
+    def test_replace_token(self):
+        self.get_token()
+        self.get_token()
+        assert Token.query.count() == 1
+
+    def test_query_count(self):
+        access_token = self.get_token()
+        db.session.remove()
+
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            rv = self.client.get('/api/client', headers={
+                'Authorization': 'Bearer %s' % access_token,
+            })
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        assert b'ios' in rv.data
+        # the current user, and the token with its user and client
+        assert len(statements) == 2
+
+
+class TestKeepTokens(TestSQLAlchemyProvider):
+    def create_server(self):
+        oauth = OAuth2Provider(self.app)
+        bind_sqlalchemy(oauth, db.session, user=User, token=Token,
+                        client=Client, grant=Grant,
+                        current_user=current_user, keep_tokens=2)
+        create_server(self.app, oauth)
+
+    def test_replace_token(self):
+        for i in range(3):
+            self.get_token()
+        tokens = Token.query.order_by(Token.id).all()
+        assert [tok.id for tok in tokens] == [2, 3]
+
+    def test_keep_latest_expires(self):
+        user = User.query.filter_by(username='foo').first()
+        # a larger primary key, but an older token
+        db.session.add(Token(
+            id=100, client_id=self.oauth_client.client_id, user_id=user.id,
+            access_token='old', expires_in=60,
+        ))
+        db.session.commit()
+        self.get_token()
+        self.get_token()
+        tokens = Token.query.order_by(Token.id).all()
+        assert [tok.id for tok in tokens] == [101, 102]
+
+
+class TestCustomValidator(TestDefaultProvider):
+    def create_registry(self):
+        return None
+
+    def create_server(self):
+        oauth = default_provider(self.app)
+        oauth._validator = OAuth2RequestValidator(
+            clientgetter=oauth._clientgetter,
+            tokengetter=oauth._tokengetter,
+            grantgetter=oauth._grantgetter,
+            usergetter=oauth._usergetter,
+            tokensetter=oauth._tokensetter,
+            grantsetter=oauth._grantsetter,
+            scoperegistry=self.create_registry(),
+        )
+        create_server(self.app, oauth)
+
+    def test_scope_escalation(self):
+        rv = self.client.post('/oauth/token', data={
+            'grant_type': 'password',
+            'username': 'foo',
+            'password': 'right',
+            'scope': 'address',
+            'client_id': self.oauth_client.client_id,
+            'client_secret': self.oauth_client.client_secret,
+        })
+        access_token = json.loads(rv.data.decode('utf-8'))['access_token']
+        headers = {'Authorization': 'Bearer %s' % access_token}
+        rv = self.client.get('/api/address/hangzhou', headers=headers)
+        assert rv.status_code == 200
+        # the masks of the provider mean other scopes in another registry
+        rv = self.client.get('/api/email', headers=headers)
+        assert rv.status_code == 401
+
+
+class TestOtherScopeRegistry(TestCustomValidator):
+    def create_registry(self):
+        return ScopeRegistry()
+
 
 class TestCacheProvider(TestDefaultProvider):
     def create_server(self):
@@ -1,5 +1,7 @@
 # coding: utf-8
 
+import base64
+from flask import json
 from .base import TestCase
 from .base import create_server, sqlalchemy_provider, cache_provider
 from .base import db, Client, User, Token
@@ -59,3 +61,95 @@ class TestSQLAlchemyProvider(TestDefaultProvider):
 class TestCacheProvider(TestDefaultProvider):
     def create_server(self):
         create_server(self.app, cache_provider(self.app))
+
+
+class TestRotation(TestDefaultProvider):
+    def create_server(self):
+        self.app.config['OAUTH2_PROVIDER_REFRESH_ROTATION'] = True
+        create_server(self.app, sqlalchemy_provider(self.app))
+
+    def refresh(self, refresh_token, **kwargs):
+        data = {
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': self.oauth_client.client_id,
+            'client_secret': self.oauth_client.client_secret,
+        }
+        data.update(kwargs)
+        rv = self.client.post('/oauth/token', data=data)
+        return json.loads(rv.data.decode('utf-8'))
+
+    def test_rotation(self):
+        user = User.query.first()
+        db.session.add(Token(
+            user_id=user.id,
+            client_id=self.oauth_client.client_id,
+            access_token='foo',
+            refresh_token='bar',
+            expires_in=1000,
+        ))
+        db.session.commit()
+        rotation = self.app.extensions['oauthlib.provider.oauth2']
+        rotation = rotation.refresh_rotation
+
+        # a retry gets the same token
+        token = self.refresh('bar')
+        assert token['refresh_token'] != 'bar'
+        assert self.refresh('bar') == token
+        assert Token.query.count() == 1
+
+        token = self.refresh(token['refresh_token'])
+        assert 'access_token' in token
+        assert rotation.family_head('bar') == token['refresh_token']
+
+        # reused with other credentials, the family is revoked
+        rv = self.refresh('bar', client_secret='wrong')
+        assert 'error' in rv
+        auth = base64.b64encode(b'client:secret').decode('ascii')
+        rv = self.client.post('/oauth/token', data={
+            'grant_type': 'refresh_token',
+            'refresh_token': 'bar',
+        }, headers={'Authorization': 'Basic %s' % auth})
+        assert b'invalid_grant' in rv.data
+        rv = self.refresh(token['refresh_token'])
+        assert rv['error'] == 'invalid_grant'
+        assert Token.query.count() == 0
+
+    def test_failed_refresh(self):
+        user = User.query.first()
+        db.session.add(Token(
+            user_id=user.id,
+            client_id=self.oauth_client.client_id,
+            access_token='foo',
+            refresh_token='bar',
+            scope='email',
+            expires_in=1000,
+        ))
+        db.session.commit()
+
+        # a failed refresh leaves the refresh token valid
+        rv = self.refresh('bar', scope='email address')
+        assert rv['error'] == 'invalid_scope'
+        token = self.refresh('bar')
+        assert 'access_token' in token
+        assert Token.query.count() == 1
+
+    def test_concurrent_refresh(self):
+        user = User.query.first()
+        db.session.add(Token(
+            user_id=user.id,
+            client_id=self.oauth_client.client_id,
+            access_token='foo',
+            refresh_token='bar',
+            expires_in=1000,
+        ))
+        db.session.commit()
+        rotation = self.app.extensions['oauthlib.provider.oauth2']
+        rotation = rotation.refresh_rotation
+
+        # claimed by another request after this one is validated
+        rotation.claim('bar')
+        rotation.is_used = lambda refresh_token: False
+        rv = self.refresh('bar')
+        assert rv['error'] == 'invalid_grant'
+        assert Token.query.one().access_token == 'foo'
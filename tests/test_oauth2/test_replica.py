@@ -0,0 +1,145 @@
+# coding: utf-8
+
+from flask import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from flask_oauthlib.provider import OAuth2Provider
+from flask_oauthlib.contrib.oauth2 import bind_sqlalchemy
+from flask_oauthlib.contrib.oauth2 import ClientBinding, TokenBinding
+from .base import TestCase, create_server, current_user
+from .base import db, Client, User, Token, Grant
+
+
+class TestReadReplica(TestCase):
+    def prepare_data(self):
+        engine = create_engine('sqlite://')
+        db.Model.metadata.create_all(engine)
+        self.replica = sessionmaker(bind=engine)()
+
+        oauth = OAuth2Provider(self.app)
+        bind_sqlalchemy(oauth, db.session, user=User, client=Client,
+                        token=Token, grant=Grant, current_user=current_user,
+                        read_session=self.replica)
+        create_server(self.app, oauth)
+
+        self.oauth_client = Client(
+            name='ios', client_id='code-client', client_secret='code-secret',
+            _redirect_uris='http://localhost/authorized',
+        )
+        db.session.add(User(username='foo'))
+        db.session.add(self.oauth_client)
+        db.session.commit()
+
+    def tearDown(self):
+        self.replica.close()
+        super(TestReadReplica, self).tearDown()
+
+    def test_lookups(self):
+        # a stale row of the replica
+        self.replica.add(Client(
+            name='stale', client_id='code-client', client_secret='x',
+        ))
+        self.replica.commit()
+
+        binding = ClientBinding(Client, db.session, self.replica)
+        with self.app.test_request_context():
+            assert binding.get('code-client').name == 'stale'
+            binding.mark_written()
+            assert binding.get('code-client').name == 'ios'
+
+        # not replicated yet
+        binding = ClientBinding(Client, db.session, self.replica)
+        self.replica.query(Client).delete()
+        self.replica.commit()
+        with self.app.test_request_context():
+            assert binding.get('code-client').name == 'ios'
+
+    def test_delete_token(self):
+        self.replica.add(Token(
+            id=1, user_id=1, client_id='code-client',
+            access_token='foo', refresh_token='bar', expires_in=100,
+        ))
+        self.replica.commit()
+        db.session.add(Token(
+            id=1, user_id=1, client_id='code-client',
+            access_token='foo', refresh_token='bar', expires_in=100,
+        ))
+        db.session.commit()
+        db.session.expunge_all()
+
+        binding = TokenBinding(Token, db.session, read_session=self.replica)
+        with self.app.test_request_context():
+            tok = binding.get(access_token='foo')
+            assert tok in db.session
+            tok.delete()
+        assert Token.query.count() == 0
+
+    def test_code_flow(self):
+        url = (
+            '/oauth/authorize?response_type=code&client_id=code-client'
+            '&scope=email'
+        )
+        rv = self.client.post(url, data={'confirm': 'yes'})
+        code = rv.location.split('code=')[1]
+
+        url = (
+            '/oauth/token?grant_type=authorization_code'
+            '&code=%s&client_id=code-client&client_secret=code-secret'
+        ) % code
+        rv = self.client.get(url)
+        assert b'access_token' in rv.data
+        assert Grant.query.count() == 0
+
+    def replicate(self, *rows):
+        for row in rows:
+            table = row.__table__
+            self.replica.execute(table.insert().values(**dict(
+                (c.name, getattr(row, c.name)) for c in table.columns
+            )))
+        self.replica.commit()
+
+    def test_replay_code(self):
+        url = (
+            '/oauth/authorize?response_type=code&client_id=code-client'
+            '&scope=email'
+        )
+        rv = self.client.post(url, data={'confirm': 'yes'})
+        code = rv.location.split('code=')[1]
+        self.replicate(User.query.get(1), self.oauth_client,
+                       Grant.query.first())
+
+        url = (
+            '/oauth/token?grant_type=authorization_code'
+            '&code=%s&client_id=code-client&client_secret=code-secret'
+        ) % code
+        rv = self.client.get(url)
+        assert b'access_token' in rv.data
+        access_token = json.loads(rv.data.decode('utf-8'))['access_token']
+
+        # the replica still has the used grant
+        rv = self.client.get(url)
+        assert json.loads(rv.data.decode('utf-8'))['error'] == \
+            'invalid_grant'
+        assert Token.query.one().access_token == access_token
+
+    def test_replay_refresh_token(self):
+        tok = Token(
+            id=1, user_id=1, client_id='code-client', access_token='foo',
+            refresh_token='bar', scope='email', expires_in=100,
+        )
+        db.session.add(tok)
+        db.session.commit()
+        self.replicate(User.query.get(1), self.oauth_client, tok)
+
+        url = (
+            '/oauth/token?grant_type=refresh_token&refresh_token=bar'
+            '&client_id=code-client&client_secret=code-secret'
+        )
+        rv = self.client.get(url)
+        assert b'access_token' in rv.data
+
+        # the replica still has the used refresh token
+        rv = self.client.get(url)
+        assert json.loads(rv.data.decode('utf-8'))['error'] == \
+            'invalid_grant'
+        assert Token.query.count() == 1
@@ -0,0 +1,123 @@
+# coding: utf-8
+
+import time
+from datetime import datetime, timedelta
+from flask import json
+from flask_oauthlib.contrib.oauth2 import bind_expiry_sweeper
+from .base import TestCase, create_server
+from .base import db, Client, User, Grant, Token
+
+
+class TestExpirySweeper(TestCase):
+    def prepare_data(self):
+        db.session.add(User(username='foo'))
+        db.session.add(Client(
+            name='sweep', client_id='sweep-client',
+            client_secret='sweep-secret',
+            _redirect_uris='http://localhost/authorized',
+        ))
+        for i in range(5):
+            db.session.add(Token(
+                client_id='sweep-client', user_id=1,
+                access_token='expired-%d' % i,
+                expires_in=-100,
+            ))
+        db.session.add(Token(
+            client_id='sweep-client', user_id=1,
+            access_token='valid', expires_in=100,
+        ))
+        now = datetime.utcnow()
+        for i in range(3):
+            db.session.add(Grant(
+                client_id='sweep-client', user_id=1, code='code-%d' % i,
+                expires=now - timedelta(seconds=100),
+            ))
+        db.session.add(Grant(
+            client_id='sweep-client', user_id=1, code='valid',
+            expires=now + timedelta(seconds=100),
+        ))
+        db.session.commit()
+
+    def create_sweeper(self):
+        self.app.config['OAUTH2_SWEEPER_BATCH_SIZE'] = 2
+        return bind_expiry_sweeper(
+            self.app, db.session, token=Token, grant=Grant
+        )
+
+    def assert_swept(self):
+        tokens = [tok.access_token for tok in Token.query.all()]
+        assert tokens == ['valid']
+        grants = [grant.code for grant in Grant.query.all()]
+        assert grants == ['valid']
+
+    def test_sweep(self):
+        sweeper = self.create_sweeper()
+        assert sweeper.batch_size == 2
+        assert sweeper.sweep_batch(Token) == 2
+        assert sweeper.sweep() == 6
+        self.assert_swept()
+        assert sweeper.sweep() == 0
+
+    def test_background(self):
+        sweeper = self.create_sweeper()
+        sweeper.start()
+        try:
+            for i in range(50):
+                db.session.remove()
+                if Token.query.count() == 1 and Grant.query.count() == 1:
+                    break
+                time.sleep(0.05)
+        finally:
+            sweeper.stop()
+        db.session.remove()
+        self.assert_swept()
+
+    def test_command(self):
+        from click.testing import CliRunner
+        from flask.cli import ScriptInfo
+
+        self.create_sweeper()
+        command = self.app.cli.commands['oauth2-sweep']
+        info = ScriptInfo(create_app=lambda info: self.app)
+        rv = CliRunner().invoke(command, obj=info)
+        assert 'Deleted 8 expired rows.' in rv.output
+        self.assert_swept()
+
+    def add_refreshable(self, expires_in=-100):
+        db.session.add(Token(
+            client_id='sweep-client', user_id=1,
+            access_token='expired', refresh_token='refresh',
+            expires_in=expires_in,
+        ))
+        db.session.commit()
+
+    def test_keep_refresh_token(self):
+        create_server(self.app)
+        self.add_refreshable()
+        sweeper = self.create_sweeper()
+        assert sweeper.sweep() == 8
+        tokens = [tok.access_token for tok in Token.query.all()]
+        assert sorted(tokens) == ['expired', 'valid']
+
+        rv = self.client.post('/oauth/token', data={
+            'grant_type': 'refresh_token',
+            'refresh_token': 'refresh',
+            'client_id': 'sweep-client',
+            'client_secret': 'sweep-secret',
+        })
+        data = json.loads(rv.data.decode('utf-8'))
+        assert 'access_token' in data
+
+    def test_refresh_expires_in(self):
+        self.app.config['OAUTH2_SWEEPER_REFRESH_EXPIRES_IN'] = 1000
+        self.add_refreshable()
+        sweeper = self.create_sweeper()
+        assert sweeper.sweep() == 8
+        assert Token.query.filter_by(refresh_token='refresh').count() == 1
+
+        Token.query.filter_by(refresh_token='refresh').update({
+            'expires': datetime.utcnow() - timedelta(seconds=2000),
+        })
+        db.session.commit()
+        assert sweeper.sweep() == 1
+        self.assert_swept()
@@ -0,0 +1,39 @@
+import unittest
+from flask import Flask
+from werkzeug.contrib.cache import SimpleCache
+from flask_oauthlib.provider.ratelimit import parse_limit
+from flask_oauthlib.provider.ratelimit import MemoryStore, CacheStore
+from flask_oauthlib.provider.ratelimit import RateLimiter
+
+
+class RateLimitTestSuite(unittest.TestCase):
+
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit('10/second'), (10.0, 10))
+        self.assertEqual(parse_limit('60/minutes'), (1.0, 60))
+        self.assertEqual(parse_limit('5/10'), (0.5, 5))
+        self.assertRaises(ValueError, parse_limit, '5/week')
+
+    def test_memory_store(self):
+        store = MemoryStore()
+        self.assertEqual(store.consume('a', 1.0, 2), 0)
+        self.assertEqual(store.consume('a', 1.0, 2), 0)
+        self.assertTrue(0 < store.consume('a', 1.0, 2) <= 1)
+        self.assertEqual(store.consume('b', 1.0, 2), 0)
+
+    def test_cache_store(self):
+        store = CacheStore(SimpleCache())
+        self.assertEqual(store.consume('a', 0.1, 2), 0)
+        self.assertEqual(store.consume('a', 0.1, 2), 0)
+        self.assertTrue(0 < store.consume('a', 0.1, 2) <= 20)
+
+    def test_rate_limiter(self):
+        self.assertRaises(ValueError, RateLimiter, {'token': {'x': '1/60'}})
+        limiter = RateLimiter({'token': {'ip': '1/minute'}})
+        app = Flask(__name__)
+        with app.test_request_context('/', environ_base={
+            'REMOTE_ADDR': '10.0.0.1'
+        }):
+            self.assertEqual(limiter.check('token'), 0)
+            self.assertTrue(limiter.check('token') > 0)
+            self.assertEqual(limiter.check('authorize'), 0)
@@ -0,0 +1,66 @@
+import time
+import threading
+import unittest
+from flask_oauthlib.provider.rotation import RefreshTokenRotation
+
+
+class RotationTestSuite(unittest.TestCase):
+
+    def test_family(self):
+        rotation = RefreshTokenRotation()
+        rotation.issue('a')
+        rotation.issue('b', parent='a')
+        rotation.issue('c', parent='b')
+        self.assertEqual(rotation.family_head('a'), 'c')
+        rotation.issue('x', parent='legacy')
+        self.assertEqual(rotation.family_head('legacy'), 'x')
+        self.assertEqual(rotation.family_head('unknown'), None)
+
+        self.assertFalse(rotation.is_used('a'))
+        self.assertTrue(rotation.claim('a'))
+        self.assertFalse(rotation.claim('a'))
+        self.assertTrue(rotation.is_used('a'))
+        rotation.release('a')
+        self.assertFalse(rotation.is_used('a'))
+
+    def test_no_eviction(self):
+        rotation = RefreshTokenRotation()
+        rotation.issue('token-0')
+        self.assertTrue(rotation.claim('token-0'))
+        for i in range(1, 1000):
+            rotation.issue('token-%d' % i, parent='token-%d' % (i - 1))
+            self.assertTrue(rotation.claim('token-%d' % i))
+        self.assertTrue(rotation.is_used('token-0'))
+        self.assertFalse(rotation.claim('token-0'))
+        self.assertEqual(rotation.family_head('token-0'), 'token-999')
+
+    def test_single_flight(self):
+        rotation = RefreshTokenRotation()
+        rotation.poll_interval = 0.01
+        calls = []
+
+        def issue():
+            calls.append(1)
+            time.sleep(0.1)
+            return {}, '{"access_token": "%d"}' % len(calls), 200
+
+        results = []
+
+        def refresh():
+            results.append(rotation.single_flight('key', issue))
+
+        threads = [threading.Thread(target=refresh) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(set(r[1] for r in results)), 1)
+        self.assertEqual(len(results), 5)
+
+    def test_single_flight_error(self):
+        rotation = RefreshTokenRotation()
+        rv = rotation.single_flight('key', lambda: ({}, 'error', 400))
+        self.assertEqual(rv[2], 400)
+        rv = rotation.single_flight('key', lambda: ({}, 'token', 200))
+        self.assertEqual(rv[1], 'token')
@@ -0,0 +1,34 @@
+import os
+import re
+import unittest
+from werkzeug.utils import import_string
+from flask_oauthlib.provider.token_generator import BufferedTokenGenerator
+
+
+class TokenGeneratorTestSuite(unittest.TestCase):
+
+    def test_generate(self):
+        generator = BufferedTokenGenerator(length=40, buffer_size=100)
+        tokens = set(generator(None) for _ in range(1000))
+        self.assertEqual(len(tokens), 1000)
+        for token in tokens:
+            self.assertTrue(re.match(r'^[A-Za-z0-9_-]{40}$', token))
+
+    def test_import(self):
+        generator = import_string(
+            'flask_oauthlib.provider.token_generator.buffered_token_generator'
+        )
+        self.assertEqual(len(generator(None, refresh_token=True)), 30)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_fork(self):
+        generator = BufferedTokenGenerator()
+        generator.generate()
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(w, generator.generate().encode('ascii'))
+            os._exit(0)
+        os.waitpid(pid, 0)
+        child = os.read(r, 100).decode('ascii')
+        self.assertNotEqual(child, generator.generate())
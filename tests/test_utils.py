@@ -3,7 +3,8 @@ import wsgiref.util
 from contextlib import contextmanager
 import mock
 import werkzeug.wrappers
-from flask_oauthlib.utils import extract_params
+from flask import Flask
+from flask_oauthlib.utils import extract_params, ScopeRegistry
 from oauthlib.common import Request
 
 
@@ -42,3 +43,38 @@ class UtilsTestSuite(unittest.TestCase):
             # Request constructor will try to urldecode the querystring, make
             # sure this doesn't fail.
             Request(uri, http_method, body, headers)
+
+    def test_extract_params_in_request(self):
+        app = Flask(__name__)
+        with app.test_request_context('/?a=b', method='POST', data={'c': 'd'}):
+            params = extract_params()
+            self.assertEqual(params[2], {'c': 'd'})
+            self.assertTrue(extract_params() is params)
+
+        with app.test_request_context('/', method='POST', data='{}',
+                                      content_type='application/json'):
+            self.assertEqual(extract_params()[2], {})
+
+    def test_scope_registry(self):
+        registry = ScopeRegistry()
+        required = registry.compile(['email'])
+        self.assertEqual(required, ['email'])
+        self.assertTrue(registry.issuperset(['email', 'address'], required))
+        self.assertFalse(registry.issuperset(['address'], required))
+        self.assertTrue(registry.equals(['a', 'b'], ['b', 'a']))
+        self.assertFalse(registry.equals(['a', 'b'], ['a']))
+
+        # a mask of another registry is not trusted
+        other = ScopeRegistry()
+        other.compile(['address'])
+        admin = other.compile(['admin'])
+        self.assertFalse(registry.issuperset(['email'], admin))
+
+    def test_closed_scope_registry(self):
+        registry = ScopeRegistry(['email', 'address'])
+        self.assertEqual(registry.compile(['unknown']).mask, None)
+        self.assertTrue(registry.issuperset(['email', 'x'], ['email']))
+        self.assertTrue(registry.issuperset(['x', 'email'], ['x']))
+        self.assertFalse(registry.issuperset(['email'], ['x']))
+        self.assertTrue(registry.equals(['x', 'email'], ['email', 'x']))
+        self.assertFalse(registry.equals(['y', 'email'], ['email', 'x']))